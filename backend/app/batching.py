@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class BatchLoader:
+    """
+    Coalesce individual key lookups into batched upstream calls
+
+    Callers simply `await loader.load(key)`. Keys requested by tasks running in
+    the same event loop turn (for example the branches of one asyncio.gather)
+    are collected and resolved together by `batch_fn`, in chunks of at most
+    `max_batch_size` keys. Each key is resolved at most once per loader, so a
+    loader should live no longer than the request that owns it.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]], max_batch_size: int = 50):
+        self._batch_fn = batch_fn
+        self._max_batch_size = max(1, max_batch_size)
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._pending: List[Hashable] = []
+        self._dispatch_task: Optional[asyncio.Task] = None
+
+    async def load(self, key: Hashable) -> Any:
+        """Resolve one key; returns None when the batch did not return it"""
+        future = self._futures.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._futures[key] = future
+            self._pending.append(key)
+            if self._dispatch_task is None:
+                self._dispatch_task = asyncio.ensure_future(self._dispatch())
+        # Shield the shared future so one cancelled caller doesn't cancel the others
+        return await asyncio.shield(future)
+
+    async def _dispatch(self):
+        # Yield until a whole turn passes without new keys, so nested gathers
+        # started alongside the first caller land in the same batch
+        pending_count = -1
+        while pending_count != len(self._pending):
+            pending_count = len(self._pending)
+            await asyncio.sleep(0)
+
+        keys, self._pending = self._pending, []
+        self._dispatch_task = None
+
+        chunks = [keys[i:i + self._max_batch_size] for i in range(0, len(keys), self._max_batch_size)]
+        await asyncio.gather(*(self._load_chunk(chunk) for chunk in chunks))
+
+    async def _load_chunk(self, keys: List[Hashable]):
+        try:
+            values = await self._batch_fn(keys)
+        except Exception as e:
+            for key in keys:
+                future = self._futures[key]
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key in keys:
+            future = self._futures[key]
+            if not future.done():
+                future.set_result(values.get(key))
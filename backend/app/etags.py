@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _canonical_bytes(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def make_etag(value: Any) -> str:
+    """
+    Weak ETag over a canonical (key-sorted) JSON encoding of `value`
+
+    Weak because one tag covers every representation of the payload (JSON or
+    MessagePack, identity, gzip or brotli); they are equivalent, not
+    byte-identical.
+    """
+    return 'W/"' + hashlib.blake2b(_canonical_bytes(value), digest_size=16).hexdigest() + '"'
+
+
+def graph_etag(nodes: Iterable[Dict[str, Any]], edges: Iterable[Dict[str, Any]]) -> str:
+    """ETag of a graph; independent of the order nodes and edges were discovered in"""
+    return make_etag({
+        "nodes": sorted(nodes, key=lambda node: str(node.get("id"))),
+        "edges": sorted(edges, key=lambda edge: str(edge.get("id"))),
+    })
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 prescribes for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept, Accept-Encoding"})
+
+
+class ResponseValidators:
+    """
+    The last ETag sent for a request, with the issue versions it was built from
+
+    A conditional request whose ETag is still current can then be answered
+    with 304 by checking those issues' `updated` values against the issue
+    cache, without rebuilding the response. Keys must include the user, so
+    validators are never shared between credentials.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[str, Dict[str, Optional[str]]]]" = OrderedDict()
+        self.not_modified = 0
+        self.rebuilt_not_modified = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, Dict[str, Optional[str]]]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, etag: str, versions: Dict[str, Optional[str]]):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (etag, versions)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "not_modified": self.not_modified,
+            "rebuilt_not_modified": self.rebuilt_not_modified,
+        }
+
+
+response_validators = ResponseValidators(max_entries=int(os.getenv("ETAG_VALIDATOR_MAX_ENTRIES", 1000)))
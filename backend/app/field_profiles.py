@@ -0,0 +1,57 @@
+import json
+import os
+from typing import Dict, List
+
+# Fields shown on a graph node (see process_issue_node)
+NODE_FIELDS = [
+    "summary", "issuetype", "status", "priority", "description", "updated", "created",
+    "assignee", "reporter"
+]
+
+# Fields used to find an issue's parent (see get_parent_reference)
+PARENT_FIELDS = ["parent", "customfield_10014"]
+
+DEFAULT_FIELD_PROFILES: Dict[str, List[str]] = {
+    # Issues that become nodes and whose links and parents are followed
+    "graph": NODE_FIELDS + ["issuelinks"] + PARENT_FIELDS,
+    # Nodes on the last traversal level, whose neighbours are never read
+    "leaf": NODE_FIELDS,
+    # /api/jira/issue-details
+    "details": NODE_FIELDS + ["creator", "labels", "components", "comment"],
+    # /api/jira/issue-descriptions
+    "description": ["summary", "description", "updated"],
+}
+
+
+def load_field_profiles() -> Dict[str, List[str]]:
+    """
+    Build the field profiles from the defaults and the JIRA_FIELD_PROFILES setting
+
+    JIRA_FIELD_PROFILES is a JSON object of profile name to a list of fields,
+    e.g. {"graph": ["customfield_10020"]}. Fields are added to an existing
+    profile, and unknown names define new profiles.
+    """
+    profiles = {name: list(fields) for name, fields in DEFAULT_FIELD_PROFILES.items()}
+
+    configured = os.getenv("JIRA_FIELD_PROFILES")
+    if configured:
+        try:
+            extra_profiles = json.loads(configured)
+        except ValueError as e:
+            print(f"Ignoring invalid JIRA_FIELD_PROFILES: {str(e)}")
+            extra_profiles = {}
+        for name, fields in extra_profiles.items():
+            profile = profiles.setdefault(name, [])
+            profile.extend(field for field in fields if field not in profile)
+
+    return profiles
+
+
+FIELD_PROFILES = load_field_profiles()
+
+
+def get_field_profile(name: str) -> List[str]:
+    """Return the JIRA fields requested for a named profile"""
+    if name not in FIELD_PROFILES:
+        raise ValueError(f"Unknown JIRA field profile: {name}")
+    return FIELD_PROFILES[name]
@@ -0,0 +1,299 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+# (issue, parent key or None, link references as (source id, target key, label, reversed))
+StoredIssue = Tuple[Dict[str, Any], Optional[str], List[Tuple[str, str, str, bool]]]
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK_SIZE = 500
+
+
+class GraphStore:
+    """
+    Local copy of JIRA issues, links and parent edges (SQLite)
+
+    Rows are scoped by tenant (JIRA site and user), so issues synced with one
+    user's credentials are only served back to that user. Issues are stored
+    with the fields of the "graph" profile; links and parent edges are kept
+    in their own tables, indexed on both ends, so a project graph can be
+    assembled without parsing every issue's links again.
+
+    Stored issues are only served while their project was synced less than
+    `max_age` seconds ago (0 means no limit), so a sync that keeps failing
+    (e.g. revoked credentials) falls back to live JIRA calls instead of
+    serving old data indefinitely.
+    """
+
+    def __init__(self, path: str, enabled: bool = False, max_age: float = 900.0):
+        self.path = path
+        self.enabled = enabled
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._initialized = False
+
+    def is_fresh(self, synced_at: Optional[float]) -> bool:
+        """Whether a project synced at `synced_at` may still be served from the store"""
+        if synced_at is None:
+            return False
+        return self.max_age <= 0 or time.time() - synced_at <= self.max_age
+
+    async def project_synced_at(self, tenant: str, project_key: str) -> Optional[float]:
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self._project_synced_at, tenant, project_key)
+
+    async def get_issues(self, tenant: str, issue_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored issues by key; keys that aren't stored (or are too old) are missing from the result"""
+        if not self.enabled or not issue_keys:
+            return {}
+        issues = await asyncio.to_thread(self._get_issues, tenant, issue_keys)
+        self.hits += len(issues)
+        self.misses += len(issue_keys) - len(issues)
+        return issues
+
+    async def get_project(self, tenant: str, project_key: str):
+        """
+        Return (issues, edge references by issue id) for a synced project
+
+        Edge references have the shape used for project graphs: parent edges
+        as (child id, parent key, "is child of", False) first, then links.
+        """
+        return await asyncio.to_thread(self._get_project, tenant, project_key)
+
+    async def put_issues(self, tenant: str, project_key: str, records: List[StoredIssue]):
+        if self.enabled and records:
+            await asyncio.to_thread(self._put_issues, tenant, project_key, records)
+
+    async def count_issues(self, tenant: str, project_key: str) -> int:
+        return await asyncio.to_thread(self._count_issues, tenant, project_key)
+
+    async def retain_issues(self, tenant: str, project_key: str, issue_ids: Iterable[str]) -> int:
+        """Delete the project's stored issues that are not in `issue_ids`; returns how many"""
+        return await asyncio.to_thread(self._retain_issues, tenant, project_key, set(issue_ids))
+
+    async def mark_synced(self, tenant: str, project_key: str, synced_at: float):
+        await asyncio.to_thread(self._mark_synced, tenant, project_key, synced_at)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "max_age_seconds": self.max_age,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS issues (
+                    tenant TEXT NOT NULL,
+                    issue_id TEXT NOT NULL,
+                    issue_key TEXT NOT NULL,
+                    project_key TEXT NOT NULL,
+                    updated TEXT,
+                    data TEXT NOT NULL,
+                    synced_at REAL NOT NULL,
+                    PRIMARY KEY (tenant, issue_id)
+                );
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_issues_key ON issues (tenant, issue_key);
+                CREATE INDEX IF NOT EXISTS idx_issues_project ON issues (tenant, project_key);
+                CREATE TABLE IF NOT EXISTS links (
+                    tenant TEXT NOT NULL,
+                    source_id TEXT NOT NULL,
+                    target_key TEXT NOT NULL,
+                    label TEXT NOT NULL,
+                    reversed INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_links_source ON links (tenant, source_id);
+                CREATE INDEX IF NOT EXISTS idx_links_target ON links (tenant, target_key);
+                CREATE TABLE IF NOT EXISTS parents (
+                    tenant TEXT NOT NULL,
+                    child_id TEXT NOT NULL,
+                    parent_key TEXT NOT NULL,
+                    PRIMARY KEY (tenant, child_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_parents_parent ON parents (tenant, parent_key);
+                CREATE TABLE IF NOT EXISTS projects (
+                    tenant TEXT NOT NULL,
+                    project_key TEXT NOT NULL,
+                    synced_at REAL NOT NULL,
+                    PRIMARY KEY (tenant, project_key)
+                );
+                """
+            )
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def _project_synced_at(self, tenant: str, project_key: str) -> Optional[float]:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT synced_at FROM projects WHERE tenant = ? AND project_key = ?",
+                (tenant, project_key.upper())
+            ).fetchone()
+        return row[0] if row else None
+
+    def _get_issues(self, tenant: str, issue_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        issues = {}
+        # Rows are only rewritten when an issue changes, so age is the project's last sync
+        synced_after = time.time() - self.max_age if self.max_age > 0 else float("-inf")
+        with closing(self._connect()) as connection:
+            for start in range(0, len(issue_keys), _QUERY_CHUNK_SIZE):
+                chunk = issue_keys[start:start + _QUERY_CHUNK_SIZE]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = connection.execute(
+                    f"""SELECT issues.issue_key, issues.data FROM issues
+                        JOIN projects ON projects.tenant = issues.tenant AND projects.project_key = issues.project_key
+                        WHERE issues.tenant = ? AND projects.synced_at >= ? AND issues.issue_key IN ({placeholders})""",
+                    (tenant, synced_after, *chunk)
+                )
+                issues.update((issue_key, json.loads(data)) for issue_key, data in rows)
+        return issues
+
+    def _get_project(self, tenant: str, project_key: str):
+        project_key = project_key.upper()
+        references: Dict[str, List[Tuple[str, str, str, bool]]] = {}
+        with closing(self._connect()) as connection:
+            issues = [
+                json.loads(data) for (data,) in connection.execute(
+                    "SELECT data FROM issues WHERE tenant = ? AND project_key = ?", (tenant, project_key)
+                )
+            ]
+            for child_id, parent_key in connection.execute(
+                """SELECT parents.child_id, parents.parent_key FROM parents
+                   JOIN issues ON issues.tenant = parents.tenant AND issues.issue_id = parents.child_id
+                   WHERE parents.tenant = ? AND issues.project_key = ?""",
+                (tenant, project_key)
+            ):
+                references.setdefault(child_id, []).append((child_id, parent_key, "is child of", False))
+            for source_id, target_key, label, reverse in connection.execute(
+                """SELECT links.source_id, links.target_key, links.label, links.reversed FROM links
+                   JOIN issues ON issues.tenant = links.tenant AND issues.issue_id = links.source_id
+                   WHERE links.tenant = ? AND issues.project_key = ?""",
+                (tenant, project_key)
+            ):
+                references.setdefault(source_id, []).append((source_id, target_key, label, bool(reverse)))
+        return issues, references
+
+    def _put_issues(self, tenant: str, project_key: str, records: List[StoredIssue]):
+        project_key = project_key.upper()
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            for issue, parent_key, link_references in records:
+                issue_id = issue["id"]
+                # A re-keyed issue keeps its id; drop the row holding its new key first
+                connection.execute(
+                    "DELETE FROM issues WHERE tenant = ? AND issue_key = ? AND issue_id != ?",
+                    (tenant, issue["key"], issue_id)
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO issues VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (tenant, issue_id, issue["key"], project_key,
+                     issue.get("fields", {}).get("updated"), json.dumps(issue), now)
+                )
+                connection.execute("DELETE FROM links WHERE tenant = ? AND source_id = ?", (tenant, issue_id))
+                connection.executemany(
+                    "INSERT INTO links VALUES (?, ?, ?, ?, ?)",
+                    [(tenant, source_id, target_key, label, int(reverse))
+                     for source_id, target_key, label, reverse in link_references]
+                )
+                connection.execute("DELETE FROM parents WHERE tenant = ? AND child_id = ?", (tenant, issue_id))
+                if parent_key:
+                    connection.execute("INSERT INTO parents VALUES (?, ?, ?)", (tenant, issue_id, parent_key))
+
+    def _count_issues(self, tenant: str, project_key: str) -> int:
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                "SELECT COUNT(*) FROM issues WHERE tenant = ? AND project_key = ?",
+                (tenant, project_key.upper())
+            ).fetchone()[0]
+
+    def _retain_issues(self, tenant: str, project_key: str, issue_ids: set) -> int:
+        with closing(self._connect()) as connection, connection:
+            stored_ids = [
+                issue_id for (issue_id,) in connection.execute(
+                    "SELECT issue_id FROM issues WHERE tenant = ? AND project_key = ?",
+                    (tenant, project_key.upper())
+                )
+            ]
+            removed = [(tenant, issue_id) for issue_id in stored_ids if issue_id not in issue_ids]
+            connection.executemany("DELETE FROM issues WHERE tenant = ? AND issue_id = ?", removed)
+            connection.executemany("DELETE FROM links WHERE tenant = ? AND source_id = ?", removed)
+            connection.executemany("DELETE FROM parents WHERE tenant = ? AND child_id = ?", removed)
+        return len(removed)
+
+    def _mark_synced(self, tenant: str, project_key: str, synced_at: float):
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO projects VALUES (?, ?, ?)",
+                (tenant, project_key.upper(), synced_at)
+            )
+
+
+class GraphSyncWorker:
+    """
+    Background task that keeps the configured projects synced into the graph store
+
+    Every `interval` seconds `sync_fn(project_key)` is awaited for each
+    project in turn; a failing project is logged and retried next round.
+    """
+
+    def __init__(self, projects: List[str], interval: float, sync_fn: Callable[[str], Awaitable[Dict[str, Any]]]):
+        self.projects = projects
+        self.interval = interval
+        self.sync_fn = sync_fn
+        self.status: Dict[str, Dict[str, Any]] = {project: {"last_sync": None} for project in projects}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.projects and self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            for project_key in self.projects:
+                started_at = time.time()
+                try:
+                    result = await self.sync_fn(project_key)
+                    self.status[project_key] = {
+                        "last_sync": started_at,
+                        "duration": round(time.time() - started_at, 3),
+                        "error": None,
+                        **result,
+                    }
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"Error syncing project {project_key} to the graph store: {str(e)}")
+                    self.status[project_key] = {**self.status.get(project_key, {}), "error": str(e)}
+            await asyncio.sleep(self.interval)
+
+
+graph_store = GraphStore(
+    path=os.getenv("GRAPH_STORE_PATH", os.path.join("cache", "graph_store.sqlite3")),
+    enabled=os.getenv("GRAPH_STORE_ENABLED", "false").lower() == "true",
+    # Default: three missed syncs
+    max_age=float(os.getenv("GRAPH_STORE_MAX_AGE", 3 * float(os.getenv("GRAPH_STORE_SYNC_INTERVAL", 300)))),
+)
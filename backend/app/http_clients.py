@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import httpx
+
+
+def _http2_available() -> bool:
+    """HTTP/2 support in httpx needs the optional `h2` package"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class ClientRegistry:
+    """
+    Long-lived httpx clients for upstream services (JIRA, Ollama)
+
+    Clients are keyed by base URL and a hash of the credential, so connections
+    (and any cookies the upstream sets) are never shared between users while
+    repeated calls from the same user reuse the pooled keep-alive connections.
+
+    At most `max_clients` clients are kept (least recently used first out),
+    and clients unused for `idle_timeout` seconds are dropped. A dropped
+    client is closed once its last request is past the upstream timeouts.
+    """
+
+    def __init__(self):
+        self._clients: "OrderedDict[Tuple[str, str], Tuple[httpx.AsyncClient, float]]" = OrderedDict()
+        self.max_clients = int(os.getenv("HTTP_MAX_CLIENTS", 100))
+        self.idle_timeout = float(os.getenv("HTTP_CLIENT_IDLE_TIMEOUT", 600))
+        self.evictions = 0
+        self._closing = set()
+        self.http2 = os.getenv("HTTP2_ENABLED", "true").lower() == "true" and _http2_available()
+        self.limits = httpx.Limits(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30.0)),
+        )
+        self.jira_timeout = httpx.Timeout(
+            float(os.getenv("JIRA_HTTP_TIMEOUT", 30.0)),
+            connect=float(os.getenv("JIRA_HTTP_CONNECT_TIMEOUT", 10.0)),
+        )
+        self.ollama_timeout = httpx.Timeout(
+            float(os.getenv("OLLAMA_HTTP_TIMEOUT", 30.0)),
+            connect=float(os.getenv("OLLAMA_HTTP_CONNECT_TIMEOUT", 10.0)),
+        )
+
+    def get(self, base_url: str, credential: str = "", timeout: Optional[httpx.Timeout] = None) -> httpx.AsyncClient:
+        """Return the pooled client for (base_url, credential), creating it on first use"""
+        credential_hash = hashlib.sha256(credential.encode("utf-8")).hexdigest() if credential else ""
+        key = (base_url.rstrip("/"), credential_hash)
+
+        now = time.monotonic()
+        entry = self._clients.get(key)
+        client = entry[0] if entry is not None else None
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=timeout or self.jira_timeout,
+            )
+        self._clients[key] = (client, now)
+        self._clients.move_to_end(key)
+        self._evict(now)
+        return client
+
+    def jira(self, base_url: str, username: str, api_token: str) -> httpx.AsyncClient:
+        return self.get(base_url, f"{username}:{api_token}", self.jira_timeout)
+
+    def ollama(self, base_url: str) -> httpx.AsyncClient:
+        return self.get(base_url, "", self.ollama_timeout)
+
+    def stats(self):
+        return {
+            "clients": len(self._clients),
+            "max_clients": self.max_clients,
+            "idle_timeout_seconds": self.idle_timeout,
+            "evictions": self.evictions,
+            "http2": self.http2,
+        }
+
+    async def aclose(self):
+        """Close every pooled client; called from the app lifespan on shutdown"""
+        clients = [client for client, _ in self._clients.values()]
+        self._clients.clear()
+        for task in list(self._closing):
+            task.cancel()
+        for client in clients:
+            await client.aclose()
+
+    def _evict(self, now: float):
+        # Entries are in least recently used order
+        while self._clients:
+            key, (client, last_used) = next(iter(self._clients.items()))
+            if len(self._clients) <= self.max_clients and now - last_used <= self.idle_timeout:
+                break
+            del self._clients[key]
+            self.evictions += 1
+            self._close_later(client, last_used)
+
+    def _close_later(self, client: httpx.AsyncClient, last_used: float):
+        """Close an evicted client after any request it may still be serving has timed out"""
+        grace = max(self.jira_timeout.read or 0, self.ollama_timeout.read or 0)
+
+        async def close():
+            await asyncio.sleep(max(0.0, last_used + grace - time.monotonic()))
+            await client.aclose()
+
+        try:
+            task = asyncio.get_running_loop().create_task(close())
+        except RuntimeError:
+            return
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+
+http_clients = ClientRegistry()
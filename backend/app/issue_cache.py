@@ -0,0 +1,188 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.shared_cache import SharedIssueStore, shared_issue_store
+
+
+class CachedIssue:
+    """One cached JIRA issue payload and the field set it was fetched with"""
+
+    __slots__ = ("data", "fields", "updated", "stored_at")
+
+    def __init__(self, data: Dict[str, Any], fields: Optional[frozenset], stored_at: float):
+        self.data = data
+        self.fields = fields  # None means the full payload
+        self.updated = (data.get("fields") or {}).get("updated")
+        self.stored_at = stored_at
+
+    def covers(self, fields: Optional[Iterable[str]]) -> bool:
+        if self.fields is None:
+            return True
+        if fields is None:
+            return False
+        return set(fields) <= self.fields
+
+
+class IssueCache:
+    """
+    In-process LRU cache of JIRA issue payloads with a TTL
+
+    Entries are keyed by base URL, user and issue key. The "user" part is the
+    username plus a hash of the API token, so a request with different (or
+    wrong) credentials never sees another caller's cached issues. Expired
+    entries are not dropped straight away: callers can revalidate them
+    cheaply by comparing the `updated` field (see `get_stale` / `touch`).
+
+    Cached payloads are shared between requests and must be treated as
+    read-only.
+
+    With a `shared` store, entries are also written there, and `load_shared`
+    pulls in entries other worker processes stored or revalidated.
+    """
+
+    def __init__(self, max_entries: int = 5000, ttl: float = 300.0, enabled: bool = True,
+                 shared: Optional[SharedIssueStore] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self.shared = shared if shared is not None and shared.enabled else None
+        self._entries: "OrderedDict[Tuple[str, str, str], CachedIssue]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self.shared_loads = 0
+
+    @staticmethod
+    def make_key(base_url: str, username: str, api_token: str, issue_key: str) -> Tuple[str, str, str]:
+        token_hash = hashlib.sha256(api_token.encode("utf-8")).hexdigest()[:16]
+        return (base_url.rstrip("/"), f"{username}:{token_hash}", issue_key)
+
+    def get(self, key: Tuple[str, str, str], fields: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached payload covering `fields`, counting a hit or a miss"""
+        entry = self._lookup(key, fields)
+        if entry is not None and not self.is_expired(entry):
+            self.hits += 1
+            return entry.data
+        self.misses += 1
+        return None
+
+    def get_stale(self, key: Tuple[str, str, str], fields: Optional[Iterable[str]] = None) -> Optional[CachedIssue]:
+        """Return an expired entry covering `fields` that could be revalidated"""
+        entry = self._lookup(key, fields)
+        if entry is not None and self.is_expired(entry):
+            return entry
+        return None
+
+    def peek(self, key: Tuple[str, str, str]) -> Optional[CachedIssue]:
+        """Return the entry for `key`, fresh or expired, without counting a lookup"""
+        return self._entries.get(key) if self.enabled else None
+
+    def touch(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        """Mark an entry as fresh again after its `updated` field was confirmed unchanged"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entry.stored_at = time.monotonic()
+        self._entries.move_to_end(key)
+        self.revalidated += 1
+        self._write_shared(key, entry)
+        return entry.data
+
+    def put(self, key: Tuple[str, str, str], data: Dict[str, Any], fields: Optional[Iterable[str]] = None):
+        if not self.enabled or not data:
+            return
+        new_entry = CachedIssue(data, frozenset(fields) if fields is not None else None, time.monotonic())
+        existing = self._entries.get(key)
+        if (existing is not None and existing.updated == new_entry.updated
+                and existing.covers(new_entry.fields) and not new_entry.covers(existing.fields)):
+            # Same version with a wider field set already cached; keep it
+            existing.stored_at = new_entry.stored_at
+            self._entries.move_to_end(key)
+            self._write_shared(key, existing)
+            return
+
+        self._store(key, new_entry)
+        self._write_shared(key, new_entry)
+
+    async def load_shared(self, keys: List[Tuple[str, str, str]], fields: Optional[Iterable[str]] = None):
+        """
+        Fill in entries from the shared store for keys this process can't serve fresh
+
+        Keys missing here, expired, or cached without `fields` are looked up;
+        a stored entry replaces the local one when it covers `fields` and is
+        fresher (or the local one doesn't cover them).
+        """
+        if self.shared is None or not self.enabled:
+            return
+        candidates = []
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None or not entry.covers(fields) or self.is_expired(entry):
+                candidates.append(key)
+        if not candidates:
+            return
+        now = time.monotonic()
+        for key, (data, stored_fields, age) in (await self.shared.get_many(candidates)).items():
+            loaded = CachedIssue(data, frozenset(stored_fields) if stored_fields is not None else None, now - age)
+            existing = self._entries.get(key)
+            if existing is None or (loaded.covers(fields) and
+                                    (not existing.covers(fields) or loaded.stored_at > existing.stored_at)):
+                self._store(key, loaded)
+                self.shared_loads += 1
+
+    def invalidate(self, key: Tuple[str, str, str]):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "shared_loads": self.shared_loads,
+            "shared": self.shared.stats() if self.shared is not None else None,
+        }
+
+    def _store(self, key: Tuple[str, str, str], entry: CachedIssue):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _write_shared(self, key: Tuple[str, str, str], entry: CachedIssue):
+        if self.shared is not None:
+            self.shared.enqueue(key, entry.data, entry.fields, entry.updated, time.monotonic() - entry.stored_at)
+
+    def _lookup(self, key, fields) -> Optional[CachedIssue]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or not entry.covers(fields):
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def is_expired(self, entry: CachedIssue) -> bool:
+        return time.monotonic() - entry.stored_at > self.ttl
+
+
+issue_cache = IssueCache(
+    max_entries=int(os.getenv("ISSUE_CACHE_MAX_ENTRIES", 5000)),
+    ttl=float(os.getenv("ISSUE_CACHE_TTL", 300)),
+    enabled=os.getenv("ISSUE_CACHE_ENABLED", "true").lower() == "true",
+    shared=shared_issue_store,
+)
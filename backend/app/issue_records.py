@@ -0,0 +1,98 @@
+import sys
+from typing import Any, Dict, List, Tuple, Union
+
+# JIRA issue ids are numeric strings; they are held as ints (see compact_id)
+IssueId = Union[int, str]
+EdgeReference = Tuple[IssueId, str, str, bool]  # (source id, target key, label, reversed)
+
+
+def compact_id(issue_id: Any) -> IssueId:
+    """Numeric issue ids as ints; anything else (placeholder ids) unchanged"""
+    if isinstance(issue_id, str) and issue_id.isdigit():
+        return int(issue_id)
+    return issue_id
+
+
+def intern_text(value: Any) -> Any:
+    """Share one copy of repeated strings (statuses, types, names, keys)"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def compact_references(references: List[Tuple[str, str, str, bool]]) -> List[EdgeReference]:
+    return [
+        (compact_id(source_id), intern_text(target_key), intern_text(label), reverse)
+        for source_id, target_key, label, reverse in references
+    ]
+
+
+class IssueRecord:
+    """
+    Compact copy of one graph node; project snapshots keep these
+
+    Holds only the fields a graph node shows, with categorical strings
+    interned and the id as an int, so the raw JIRA payload can be dropped as
+    soon as it is parsed. Node dicts are produced by `to_node` when a
+    response is serialized.
+    """
+
+    __slots__ = ("id", "category", "key", "summary", "status", "issue_type", "priority",
+                 "description", "updated", "created", "assignee", "reporter")
+
+    def __init__(self, issue_id: IssueId, category: str, key: str, summary: str, status: str, issue_type: str,
+                 priority: str, description: Any, updated: str, created: str, assignee: str, reporter: str):
+        self.id = issue_id
+        self.category = intern_text(category)
+        self.key = intern_text(key)
+        self.summary = summary
+        self.status = intern_text(status)
+        self.issue_type = intern_text(issue_type)
+        self.priority = intern_text(priority)
+        self.description = description
+        self.updated = updated
+        self.created = created
+        self.assignee = intern_text(assignee)
+        self.reporter = intern_text(reporter)
+
+    @classmethod
+    def from_issue(cls, issue_data: Dict[str, Any], category: str) -> "IssueRecord":
+        """Pick the node fields out of a JIRA issue payload, with the defaults graph nodes show"""
+        fields = issue_data.get("fields", {})
+        return cls(
+            compact_id(issue_data.get("id", f"unknown-{id(issue_data)}")),
+            category,
+            issue_data.get("key", "Unknown"),
+            fields.get("summary", "No summary"),
+            fields.get("status", {}).get("name", "Unknown"),
+            fields.get("issuetype", {}).get("name", "Unknown"),
+            fields.get("priority", {}).get("name", "None"),
+            fields.get("description", ""),
+            fields.get("updated", ""),
+            fields.get("created", ""),
+            fields.get("assignee", {}).get("displayName", "Unassigned") if fields.get("assignee") else "Unassigned",
+            fields.get("reporter", {}).get("displayName", "Unknown") if fields.get("reporter") else "Unknown",
+        )
+
+    def to_node(self) -> Dict[str, Any]:
+        return {
+            "id": str(self.id),
+            "type": self.category,
+            "data": {
+                "key": self.key,
+                "summary": self.summary,
+                "status": self.status,
+                "issue_type": self.issue_type,
+                "priority": self.priority,
+                "description": self.description,
+                "updated": self.updated,
+                "created": self.created,
+                "assignee": self.assignee,
+                "reporter": self.reporter,
+            }
+        }
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, IssueRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
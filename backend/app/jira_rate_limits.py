@@ -0,0 +1,294 @@
+import asyncio
+import email.utils
+import os
+import random
+import re
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.metrics import JIRA_REQUEST_DURATION, JIRA_REQUESTS, JIRA_REQUESTS_IN_FLIGHT
+from app.request_trace import trace_call
+from app.workers import per_worker
+
+# Responses that mean "slow down and try again"
+THROTTLED_STATUSES = {429, 503}
+# Responses worth retrying after a backoff even without a rate limit signal
+RETRYABLE_STATUSES = THROTTLED_STATUSES | {502, 504}
+
+_ISSUE_PATH = re.compile(r"(/rest/api/\d+/issue/)[^/?]+")
+
+
+def jira_endpoint(url: str, base_url: str) -> str:
+    """URL path with issue keys replaced, for metric labels (/rest/api/2/issue/{key})"""
+    path = url[len(base_url.rstrip("/")):] if url.startswith(base_url.rstrip("/")) else httpx.URL(url).path
+    return _ISSUE_PATH.sub(r"\1{key}", path.split("?", 1)[0])
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta seconds or an HTTP date)"""
+    if not value:
+        return None
+    now = time.time() if now is None else now
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_rate_limit_reset(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds until an X-RateLimit-Reset time
+
+    JIRA Cloud sends an ISO 8601 timestamp; epoch seconds and plain delta
+    seconds are accepted too.
+    """
+    if not value:
+        return None
+    now = time.time() if now is None else now
+    value = value.strip()
+    try:
+        number = float(value)
+        return max(0.0, number - now if number > 1e9 else number)
+    except ValueError:
+        pass
+    try:
+        reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if reset_at.tzinfo is None:
+        reset_at = reset_at.replace(tzinfo=timezone.utc)
+    return max(0.0, reset_at.timestamp() - now)
+
+
+class TenantRateLimiter:
+    """
+    Client-side rate limiting for one JIRA site
+
+    Requests pass three gates: a pause set when JIRA says the quota is used
+    up (Retry-After, or X-RateLimit-Remaining of 0 with X-RateLimit-Reset), a
+    token bucket of `rate` requests per second, and an AIMD concurrency limit
+    that is halved when JIRA throttles and grows by about one per round of
+    successful requests, up to `max_concurrency`.
+    """
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int, min_concurrency: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.concurrency_limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._last_decrease = 0.0
+        self._condition: Optional[asyncio.Condition] = None
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.gave_up = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait until a request may be sent, and hold a concurrency slot while it runs"""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        await self._wait_until_unpaused()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.concurrency_limit))
+            self.in_flight += 1
+        try:
+            await self._take_token()
+            self.requests += 1
+            yield
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def on_response(self, response: httpx.Response) -> Optional[float]:
+        """
+        Update the limits from a response
+
+        Returns the delay JIRA asked for (None if it gave none) when the
+        response is throttled; successful responses grow the concurrency limit.
+        """
+        headers = response.headers
+        now = time.time()
+        reset_in = None
+        if headers.get("X-RateLimit-Remaining", "").strip() == "0":
+            reset_in = parse_rate_limit_reset(headers.get("X-RateLimit-Reset"), now)
+
+        if response.status_code in THROTTLED_STATUSES:
+            self.throttled += 1
+            delay = parse_retry_after(headers.get("Retry-After"), now)
+            if delay is None:
+                delay = reset_in
+            self._decrease()
+            if delay is not None:
+                self._pause(delay)
+            return delay
+
+        if reset_in:
+            # Quota used up but this request got through: hold the next ones
+            self._pause(reset_in)
+        if response.status_code < 400:
+            self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1 / self.concurrency_limit)
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "concurrency_limit": int(self.concurrency_limit),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 3),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+        }
+
+    def _decrease(self):
+        # Responses to requests sent before the last decrease don't count again
+        now = time.monotonic()
+        if now - self._last_decrease >= 1.0:
+            self._last_decrease = now
+            self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+
+    def _pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def _wait_until_unpaused(self):
+        while True:
+            remaining = self.paused_until - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(remaining)
+
+    async def _take_token(self):
+        if self.rate <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+            self._refilled_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class JiraRateLimiter:
+    """
+    Sends JIRA requests through per-site rate limiters, retrying throttled ones
+
+    Throttled (429/503) and gateway-error responses, and connection errors,
+    are retried with jittered exponential backoff (or after the delay JIRA
+    asked for) until `max_retries` or the `deadline` in seconds is reached;
+    the last response is then returned, or the last error raised.
+    """
+
+    def __init__(self, rate: float = 20.0, burst: int = 40, max_concurrency: int = 16,
+                 max_retries: int = 5, deadline: float = 30.0, backoff_base: float = 0.5, backoff_max: float = 10.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._tenants: Dict[str, TenantRateLimiter] = {}
+
+    def for_tenant(self, base_url: str) -> TenantRateLimiter:
+        tenant = base_url.rstrip("/")
+        limiter = self._tenants.get(tenant)
+        if limiter is None:
+            limiter = TenantRateLimiter(self.rate, self.burst, self.max_concurrency)
+            self._tenants[tenant] = limiter
+        return limiter
+
+    async def send(self, client: httpx.AsyncClient, method: str, url: str, base_url: str,
+                   semaphore: Optional[asyncio.Semaphore] = None, **kwargs) -> httpx.Response:
+        """
+        Send one request with rate limiting and retries
+
+        `semaphore` (e.g. the global JIRA bound) is held only while a request
+        is on the wire, not during backoff.
+        """
+        limiter = self.for_tenant(base_url)
+        endpoint = jira_endpoint(url, base_url)
+        give_up_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            try:
+                async with limiter.slot():
+                    if semaphore is not None:
+                        async with semaphore:
+                            response = await self._request(client, method, url, endpoint, **kwargs)
+                    else:
+                        response = await self._request(client, method, url, endpoint, **kwargs)
+                requested_delay = limiter.on_response(response)
+                if response.status_code not in RETRYABLE_STATUSES:
+                    return response
+                error = None
+            except httpx.TransportError as e:
+                response, requested_delay, error = None, None, e
+
+            delay = self._backoff(attempt, requested_delay)
+            if attempt >= self.max_retries or time.monotonic() + delay > give_up_at:
+                limiter.gave_up += 1
+                if error is not None:
+                    raise error
+                return response
+            attempt += 1
+            limiter.retries += 1
+            print(f"JIRA request to {url} {'failed' if error else f'returned {response.status_code}'}, "
+                  f"retrying in {delay:.2f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    async def _request(client: httpx.AsyncClient, method: str, url: str, endpoint: str, **kwargs) -> httpx.Response:
+        JIRA_REQUESTS_IN_FLIGHT.inc()
+        started_at = time.perf_counter()
+        status = "error"
+        size = None
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+            size = len(response.content)
+            return response
+        finally:
+            JIRA_REQUESTS_IN_FLIGHT.dec()
+            JIRA_REQUESTS.inc(endpoint=endpoint, status=status)
+            JIRA_REQUEST_DURATION.observe(time.perf_counter() - started_at, endpoint=endpoint)
+            trace_call("jira", endpoint, started_at, method=method, status=status, bytes=size)
+
+    def stats(self) -> Dict[str, Any]:
+        return {tenant: limiter.stats() for tenant, limiter in self._tenants.items()}
+
+    def _backoff(self, attempt: int, requested_delay: Optional[float]) -> float:
+        if requested_delay is not None:
+            # Honour JIRA's delay; a little jitter keeps waiting requests from returning together
+            return requested_delay + random.uniform(0, min(1.0, requested_delay * 0.1 + 0.1))
+        backoff = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(backoff / 2, backoff)
+
+
+# The limits are for the whole server; each worker process gets its share
+jira_rate_limiter = JiraRateLimiter(
+    rate=per_worker(float(os.getenv("JIRA_RATE_LIMIT", 20)), minimum=0),
+    burst=per_worker(int(os.getenv("JIRA_RATE_BURST", 40))),
+    max_concurrency=per_worker(int(os.getenv("JIRA_TENANT_CONCURRENCY", 16))),
+    max_retries=int(os.getenv("JIRA_MAX_RETRIES", 5)),
+    deadline=float(os.getenv("JIRA_RETRY_DEADLINE", 30)),
+)
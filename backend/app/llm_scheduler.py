@@ -0,0 +1,229 @@
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.singleflight import SingleFlight
+from app.workers import per_worker
+
+# Lower rank is served first
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+
+class LLMSchedulerBusy(Exception):
+    """Raised when a request is not admitted: the queue is full or its queue deadline passed"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"LLM service is busy ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class LLMSlot:
+    """One admitted generation; release it (or leave the `async with`) when the generation ends"""
+
+    def __init__(self, scheduler: "LLMScheduler"):
+        self._scheduler = scheduler
+        self._started_at = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._scheduler._release(time.monotonic() - self._started_at)
+
+    async def __aenter__(self) -> "LLMSlot":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the LLM
+
+    At most `concurrency` generations run at once. Other requests wait in a
+    priority queue (interactive before batch, FIFO within a class) holding at
+    most `max_queue` requests; when it is full, or a request waits longer than
+    its class's entry in `queue_timeouts`, LLMSchedulerBusy is raised with a
+    retry hint derived from the recent generation time. `run` also coalesces
+    identical in-flight requests, so callers sending the same prompt share one
+    generation. On shutdown, `drain` stops admitting and waits for running
+    generations to finish.
+    """
+
+    def __init__(self, concurrency: int = 2, max_queue: int = 32,
+                 queue_timeouts: Optional[Dict[str, Optional[float]]] = None):
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max_queue
+        self.queue_timeouts = queue_timeouts or {}
+        self._active = 0
+        self._waiters: List[Tuple[int, int, str, asyncio.Future]] = []  # heap
+        self._sequence = itertools.count()
+        self._queued = {priority: 0 for priority in PRIORITIES}
+        self._flights = SingleFlight()
+        self._wait_times: deque = deque(maxlen=1000)
+        self._service_time: Optional[float] = None  # moving average, seconds
+        self.admitted = {priority: 0 for priority in PRIORITIES}
+        self.rejected = {"queue_full": 0, "queue_timeout": 0, "shutting_down": 0}
+        self.completed = 0
+        self.draining = False
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self._queued.values())
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to be free, for Retry-After headers"""
+        service_time = self._service_time if self._service_time is not None else 10.0
+        return max(1, math.ceil(service_time * (self.queue_depth + 1) / self.concurrency))
+
+    async def acquire(self, priority: str = "interactive") -> LLMSlot:
+        """Wait for a generation slot; raises LLMSchedulerBusy if the request is not admitted"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown LLM priority: {priority}")
+        queued_at = time.monotonic()
+
+        if self.draining:
+            self.rejected["shutting_down"] += 1
+            raise LLMSchedulerBusy("shutting_down", self.retry_after())
+
+        if self._active < self.concurrency and not self.queue_depth:
+            self._active += 1
+            self._admit(priority, queued_at)
+            return LLMSlot(self)
+
+        if self.queue_depth >= self.max_queue:
+            self.rejected["queue_full"] += 1
+            raise LLMSchedulerBusy("queue_full", self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITIES[priority], next(self._sequence), priority, future))
+        self._queued[priority] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeouts.get(priority))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done():
+                # The slot was handed over just as we gave up; pass it on
+                self._active -= 1
+                self._wake_next()
+            else:
+                future.cancel()
+                self._queued[priority] -= 1
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected["queue_timeout"] += 1
+                raise LLMSchedulerBusy("queue_timeout", self.retry_after())
+            raise
+        self._admit(priority, queued_at)
+        return LLMSlot(self)
+
+    async def run(self, key: Optional[str], request_fn: Callable[[], Awaitable[Any]],
+                  priority: str = "interactive") -> Any:
+        """
+        Run `request_fn` in a generation slot, sharing the result with identical calls
+
+        Calls with the same `key` made while one is in flight wait for that
+        call's result (or exception) instead of queueing a generation of their
+        own. Pass key=None to opt out of coalescing.
+        """
+        async def generate():
+            async with await self.acquire(priority):
+                return await request_fn()
+
+        if key is None:
+            return await generate()
+        return await self._flights.do(key, generate)
+
+    async def drain(self, timeout: Optional[float]) -> bool:
+        """
+        Stop admitting generations and wait up to `timeout` for running ones
+
+        Queued requests are turned away with LLMSchedulerBusy("shutting_down").
+        Returns False if generations were still running at the deadline.
+        """
+        self.draining = True
+        while self._waiters:
+            _, _, priority, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._queued[priority] -= 1
+                self.rejected["shutting_down"] += 1
+                future.set_exception(LLMSchedulerBusy("shutting_down", self.retry_after()))
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self._active and (deadline is None or time.monotonic() < deadline):
+            await asyncio.sleep(0.1)
+        return not self._active
+
+    def stats(self) -> Dict[str, Any]:
+        wait_times = sorted(self._wait_times)
+
+        def percentile(fraction: float) -> float:
+            if not wait_times:
+                return 0.0
+            return round(wait_times[min(len(wait_times) - 1, int(fraction * len(wait_times)))], 4)
+
+        return {
+            "concurrency": self.concurrency,
+            "draining": self.draining,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "queue_depth": self.queue_depth,
+            "queued": dict(self._queued),
+            "inflight_prompts": self._flights.stats()["in_flight"],
+            "admitted": dict(self.admitted),
+            "completed": self.completed,
+            "rejected": dict(self.rejected),
+            "coalesced": self._flights.shared,
+            "wait_seconds": {
+                "avg": round(sum(wait_times) / len(wait_times), 4) if wait_times else 0.0,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(wait_times[-1], 4) if wait_times else 0.0,
+            },
+            "generation_seconds_avg": round(self._service_time, 4) if self._service_time is not None else None,
+            "retry_after": self.retry_after(),
+        }
+
+    def _admit(self, priority: str, queued_at: float):
+        self.admitted[priority] += 1
+        self._wait_times.append(time.monotonic() - queued_at)
+
+    def _release(self, service_time: float):
+        self._active -= 1
+        self.completed += 1
+        if self._service_time is None:
+            self._service_time = service_time
+        else:
+            self._service_time = 0.8 * self._service_time + 0.2 * service_time
+        self._wake_next()
+
+    def _wake_next(self):
+        while self._waiters and self._active < self.concurrency:
+            _, _, priority, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue  # gave up waiting
+            self._queued[priority] -= 1
+            self._active += 1
+            future.set_result(None)
+
+
+def _optional_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a timeout setting; empty or 0 means wait without a deadline"""
+    if not value or float(value) <= 0:
+        return None
+    return float(value)
+
+
+llm_scheduler = LLMScheduler(
+    # Ollama serves every worker, so its concurrency and queue are split between them
+    concurrency=per_worker(int(os.getenv("OLLAMA_CONCURRENCY", 2))),
+    max_queue=per_worker(int(os.getenv("OLLAMA_MAX_QUEUE", 32))),
+    queue_timeouts={
+        "interactive": _optional_seconds(os.getenv("OLLAMA_QUEUE_TIMEOUT", "30")),
+        "batch": _optional_seconds(os.getenv("OLLAMA_BATCH_QUEUE_TIMEOUT")),
+    },
+)
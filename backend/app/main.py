@@ -1,17 +1,74 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel
 import httpx
+import asyncio
 import base64
+import functools
 import os
 import json
-from typing import Optional, List, Dict, Any, Union
+import math
+import time
+from typing import Optional, List, Dict, Any, AsyncIterator
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from app.http_clients import http_clients
+from app.batching import BatchLoader
+from app.issue_cache import CachedIssue, issue_cache
+from app.shared_cache import shared_issue_store, shared_records
+from app.workers import LeaderLock
+from app.project_snapshots import ProjectSnapshot, project_snapshots
+from app.issue_records import IssueRecord, compact_id, compact_references
+from app.field_profiles import get_field_profile
+from app.test_case_cache import test_case_cache
+from app.test_case_jobs import test_case_jobs
+from app.streaming_json import IncrementalArrayParser
+from app.llm_scheduler import LLMSchedulerBusy, llm_scheduler
+from app.singleflight import SingleFlight
+from app.jira_rate_limits import THROTTLED_STATUSES, jira_rate_limiter
+from app.graph_store import GraphSyncWorker, graph_store
+from app.metrics import (
+    CACHE_HIT_RATIO, CACHE_HITS, CACHE_MISSES, JIRA_FETCHES_SHARED, LLM_GENERATIONS_IN_FLIGHT, LLM_QUEUE_DEPTH,
+    OLLAMA_GENERATED_TOKENS, OLLAMA_GENERATION_DURATION, OLLAMA_TOKENS_PER_SECOND, TEST_CASE_FALLBACKS,
+    TEST_CASE_RESULTS, MetricsMiddleware, metrics
+)
+from app.request_trace import REQUEST_TRACE_ENABLED, RequestTraceMiddleware, trace_call, trace_store, traced
+from app.serialization import response_encoder
+from app.etags import etag_matches, graph_etag, make_etag, not_modified, response_validators
+
+# How long shutdown waits for running Ollama generations (batch jobs included)
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", 60))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Own the pooled upstream HTTP clients and background jobs for the lifetime of the app
+
+    With several workers only the one holding the graph sync lock syncs the
+    graph store. On shutdown, running LLM generations are given
+    SHUTDOWN_DRAIN_TIMEOUT seconds to finish before batch jobs are cancelled.
+    """
+    if graph_sync_worker is not None and graph_sync_lock.acquire():
+        graph_sync_worker.start()
+    yield
+    if graph_sync_worker is not None:
+        await graph_sync_worker.stop()
+    graph_sync_lock.release()
+    if not await llm_scheduler.drain(SHUTDOWN_DRAIN_TIMEOUT):
+        print(f"Shutting down with LLM generations still running after {SHUTDOWN_DRAIN_TIMEOUT}s")
+    await test_case_jobs.shutdown()
+    await shared_issue_store.flush()
+    await shared_records.flush()
+    await http_clients.aclose()
+
 app = FastAPI(title="JIRA Visualization API", 
-              description="API for fetching and visualizing JIRA issues and their relationships")
+              description="API for fetching and visualizing JIRA issues and their relationships",
+              lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -21,6 +78,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestTraceMiddleware, store=trace_store, enabled=REQUEST_TRACE_ENABLED)
+app.add_middleware(MetricsMiddleware)
 
 class JiraCredentials(BaseModel):
     username: str
@@ -29,22 +88,73 @@ class JiraCredentials(BaseModel):
     project_id: str
     central_jira_id: str
 
-class JiraIssue(BaseModel):
-    id: str
-    key: str
-    summary: str
-    issue_type: str
-    status: str
-    description: Optional[str] = None
+class GraphTraversalOptions(BaseModel):
+    max_depth: Optional[int] = None  # Hops from the central issue, VISUALIZE_MAX_DEPTH when not set
+    link_types: Optional[List[str]] = None  # Link type names or relationship labels to follow
+    issue_types: Optional[List[str]] = None  # Issue type names to include
+    direction: str = "both"  # "both", "inward" or "outward" issue links
+    include_parents: bool = True
+
+class VisualizeRequest(JiraCredentials, GraphTraversalOptions):
+    pass
 
 class GraphData(BaseModel):
     nodes: List[Dict[str, Any]]
     edges: List[Dict[str, Any]]
+    sync_token: Optional[str] = None  # Pass to /api/jira/visualize-project/delta to refresh incrementally
+
+class ProjectSyncRequest(JiraCredentials):
+    sync_token: Optional[str] = None
+
+class GraphDelta(BaseModel):
+    full: bool  # True when the token was unknown and added_nodes/added_edges hold the whole graph
+    sync_token: str
+    added_nodes: List[Dict[str, Any]]
+    changed_nodes: List[Dict[str, Any]]
+    removed_nodes: List[str]  # Issue ids
+    added_edges: List[Dict[str, Any]]
+    removed_edges: List[Dict[str, Any]]
 
 @app.get("/")
 async def root():
     return {"message": "JIRA Visualization API is running"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics: route and upstream latencies, cache hit rates, queue depths"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@metrics.on_collect
+def collect_component_metrics():
+    """Copy the counters kept by caches and schedulers into the metrics at scrape time"""
+    for name, stats in (("issue", issue_cache.stats()), ("test_case", test_case_cache.stats()),
+                        ("graph_store", graph_store.stats())):
+        CACHE_HITS.set_total(stats["hits"], cache=name)
+        CACHE_MISSES.set_total(stats["misses"], cache=name)
+        CACHE_HIT_RATIO.set(stats["hit_rate"], cache=name)
+    scheduler_stats = llm_scheduler.stats()
+    for priority, depth in scheduler_stats["queued"].items():
+        LLM_QUEUE_DEPTH.set(depth, priority=priority)
+    LLM_GENERATIONS_IN_FLIGHT.set(scheduler_stats["active"])
+    JIRA_FETCHES_SHARED.set_total(jira_fetches.shared)
+
+@app.get("/api/debug/traces/{trace_id}")
+async def get_request_trace(trace_id: str):
+    """
+    Upstream call waterfall of a request sent with the X-Debug-Trace header
+
+    The trace id comes from that response's X-Trace-Id header.
+    """
+    trace = await trace_store.get_dict(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return trace
+
+@app.get("/api/jira/cache-stats")
+async def get_cache_stats():
+    """Hit/miss counters of the shared issue cache"""
+    return issue_cache.stats()
+
 @app.get("/api/jira/default-credentials")
 async def get_default_credentials():
     """Get default JIRA credentials from the .env file"""
@@ -63,27 +173,351 @@ def get_auth_header(credentials: JiraCredentials):
     base64_auth = base64_bytes.decode('ascii')
     return {"Authorization": f"Basic {base64_auth}"}
 
-async def fetch_issue(credentials: JiraCredentials, issue_key: str):
-    """Fetch a single JIRA issue by key"""
-    headers = get_auth_header(credentials)
-    async with httpx.AsyncClient() as client:
-        url = f"{credentials.base_url}/rest/api/2/issue/{issue_key}"
-        try:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 401:
-                raise HTTPException(status_code=401, detail="Authentication failed. Check your JIRA credentials.")
-            elif e.response.status_code == 404:
-                raise HTTPException(status_code=404, detail=f"JIRA issue {issue_key} not found.")
-            else:
-                raise HTTPException(status_code=e.response.status_code, detail=f"JIRA API error: {str(e)}")
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=500, detail=f"Error connecting to JIRA: {str(e)}")
+def get_jira_client(credentials: JiraCredentials) -> httpx.AsyncClient:
+    """Return the pooled JIRA client for this tenant and user"""
+    return http_clients.jira(credentials.base_url, credentials.username, credentials.api_token)
+
+@app.get("/api/http-client-stats")
+async def get_http_client_stats():
+    """Pooled upstream clients: how many are open, evictions and whether HTTP/2 is on"""
+    return http_clients.stats()
+
+# Upper bound on JIRA calls in flight across all requests, and the default
+# bound for the fan-out of a single request
+JIRA_GLOBAL_CONCURRENCY = int(os.getenv("JIRA_GLOBAL_CONCURRENCY", 32))
+JIRA_REQUEST_CONCURRENCY = int(os.getenv("JIRA_REQUEST_CONCURRENCY", 8))
+
+_jira_global_semaphore: Optional[asyncio.Semaphore] = None
+
+def get_jira_global_semaphore() -> asyncio.Semaphore:
+    """Create the global semaphore lazily so it binds to the running event loop"""
+    global _jira_global_semaphore
+    if _jira_global_semaphore is None:
+        _jira_global_semaphore = asyncio.Semaphore(JIRA_GLOBAL_CONCURRENCY)
+    return _jira_global_semaphore
+
+def new_request_semaphore() -> asyncio.Semaphore:
+    """Per-request bound shared by every fan-out made while serving one request"""
+    return asyncio.Semaphore(JIRA_REQUEST_CONCURRENCY)
+
+async def send_jira_request(credentials: JiraCredentials, method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Send a JIRA API request under the global bound and the site's rate limits
+
+    Throttled requests are retried within the retry deadline (see
+    jira_rate_limits.py); the caller gets the final response.
+    """
+    return await jira_rate_limiter.send(
+        get_jira_client(credentials), method, url, credentials.base_url,
+        semaphore=get_jira_global_semaphore(), headers=get_auth_header(credentials), **kwargs
+    )
+
+def jira_rate_limit_exception(response: httpx.Response) -> HTTPException:
+    """
+    HTTPException for a request JIRA kept throttling past the retry deadline
+
+    JIRA's status is kept (429, or 503 when it is unavailable), so clients
+    and metrics can tell throttling from an outage; its Retry-After is passed on.
+    """
+    retry_after = response.headers.get("Retry-After")
+    if response.status_code == 429:
+        detail = "JIRA rate limit exceeded. Try again later."
+    else:
+        detail = f"JIRA is unavailable ({response.status_code}). Try again later."
+    return HTTPException(status_code=response.status_code, detail=detail,
+                         headers={"Retry-After": retry_after} if retry_after else None)
+
+@app.get("/api/jira/rate-limit-stats")
+async def get_rate_limit_stats():
+    """Per-site JIRA rate limiter state: concurrency limit, throttled and retried requests"""
+    return jira_rate_limiter.stats()
+
+# Concurrent fetches of the same issue by the same user for the same field
+# profile share one upstream call, e.g. when a team opens one graph together
+jira_fetches = SingleFlight()
+
+@app.get("/api/jira/fetch-stats")
+async def get_fetch_stats():
+    """How many issue fetches were answered by another request's in-flight call"""
+    return jira_fetches.stats()
+
+def issue_cache_key(credentials: JiraCredentials, issue_key: str):
+    return issue_cache.make_key(credentials.base_url, credentials.username, credentials.api_token, issue_key)
+
+def cache_issues(credentials: JiraCredentials, issues, fields: Optional[List[str]] = None):
+    """Store fetched issues in the shared issue cache"""
+    for issue in issues:
+        if isinstance(issue, dict) and issue.get("key"):
+            issue_cache.put(issue_cache_key(credentials, issue["key"]), issue, fields)
+
+async def revalidate_cached_issues(credentials: JiraCredentials, stale_entries: Dict[str, CachedIssue]):
+    """
+    Revalidate expired cache entries with one light search on the `updated` field
+
+    Returns the cached payloads of the issues that haven't changed; issues that
+    changed (or couldn't be checked) are left out and must be refetched.
+    """
+    try:
+        current = await search_issues_by_keys(credentials, list(stale_entries), fields=["updated"])
+    except HTTPException as e:
+        print(f"Error revalidating cached issues: {str(e)}")
+        return {}
+    
+    revalidated = {}
+    for issue_key, entry in stale_entries.items():
+        current_updated = (current.get(issue_key) or {}).get("fields", {}).get("updated")
+        if current_updated and current_updated == entry.updated:
+            revalidated[issue_key] = issue_cache.touch(issue_cache_key(credentials, issue_key))
+    return revalidated
+
+def cached_issue_versions(credentials: JiraCredentials, issue_keys) -> Optional[Dict[str, Optional[str]]]:
+    """The `updated` value of each issue as held in the issue cache; None if any isn't cached"""
+    versions = {}
+    for issue_key in issue_keys:
+        entry = issue_cache.peek(issue_cache_key(credentials, issue_key))
+        if entry is None:
+            return None
+        versions[issue_key] = entry.updated
+    return versions
+
+async def cached_issues_unchanged(credentials: JiraCredentials, versions: Dict[str, Optional[str]]) -> bool:
+    """
+    True when every issue is still cached at the recorded version
+
+    Expired entries are revalidated with one light search on `updated`, as
+    fetch_issue would do before reusing them.
+    """
+    stale = {}
+    for issue_key, updated in versions.items():
+        entry = issue_cache.peek(issue_cache_key(credentials, issue_key))
+        if entry is None or entry.updated != updated:
+            return False
+        if issue_cache.is_expired(entry):
+            if not entry.updated:
+                return False
+            stale[issue_key] = entry
+    if stale:
+        revalidated = await revalidate_cached_issues(credentials, stale)
+        return all(revalidated.get(issue_key) for issue_key in stale)
+    return True
+
+async def validated_not_modified(credentials: JiraCredentials, validator_key, if_none_match: Optional[str]) -> Optional[Response]:
+    """
+    Answer a conditional request with 304 without rebuilding the response
+
+    Applies when If-None-Match names the last ETag sent for this request and
+    the issues that response was built from haven't changed since.
+    """
+    entry = response_validators.get(validator_key)
+    if not if_none_match or entry is None:
+        return None
+    etag, versions = entry
+    if etag_matches(if_none_match, etag) and await cached_issues_unchanged(credentials, versions):
+        response_validators.not_modified += 1
+        return not_modified(etag)
+    return None
+
+def remember_validator(credentials: JiraCredentials, validator_key, etag: str, issue_keys):
+    versions = cached_issue_versions(credentials, issue_keys)
+    if versions is None:
+        response_validators.discard(validator_key)
+    else:
+        response_validators.put(validator_key, etag, versions)
+
+@app.get("/api/jira/etag-stats")
+async def get_etag_stats():
+    """304 responses answered from remembered validators vs. after a rebuild"""
+    return response_validators.stats()
+
+async def fetch_issue(credentials: JiraCredentials, issue_key: str, profile: str = "graph"):
+    """
+    Fetch a single JIRA issue by key, served from the issue cache when possible
+
+    Entries other workers cached are picked up from the shared store first
+    (see IssueCache.load_shared), and issues synced into the local graph
+    store are read from there. Only the fields of the named field profile
+    are requested (see field_profiles.py), and concurrent fetches of the
+    same issue and profile share one call.
+    """
+    started_at = time.perf_counter()
+    fields = get_field_profile(profile)
+    cache_key = issue_cache_key(credentials, issue_key)
+    await issue_cache.load_shared([cache_key], fields)
+    cached = issue_cache.get(cache_key, fields)
+    if cached is not None:
+        trace_call("lookup", "fetch_issue", started_at, profile=profile, cache="hit")
+        return cached
+    if graph_store_covers(fields):
+        stored = await graph_store.get_issues(graph_store_tenant(credentials), [issue_key])
+        if issue_key in stored:
+            trace_call("lookup", "fetch_issue", started_at, profile=profile, cache="store")
+            return stored[issue_key]
+    stale = issue_cache.get_stale(cache_key, fields)
+    if stale is not None and stale.updated:
+        revalidated = await revalidate_cached_issues(credentials, {issue_key: stale})
+        if revalidated.get(issue_key):
+            trace_call("lookup", "fetch_issue", started_at, profile=profile, cache="revalidated")
+            return revalidated[issue_key]
+    
+    flight_key = ("issue", *cache_key[:2], profile, issue_key)
+    issue_data = await jira_fetches.do(flight_key, lambda: request_issue(credentials, issue_key, fields))
+    trace_call("lookup", "fetch_issue", started_at, profile=profile, cache="miss")
+    return issue_data
+
+async def request_issue(credentials: JiraCredentials, issue_key: str, fields: List[str]):
+    """Fetch a single JIRA issue from the API and store it in the issue cache"""
+    url = f"{credentials.base_url}/rest/api/2/issue/{issue_key}"
+    try:
+        response = await send_jira_request(credentials, "GET", url, params={"fields": ",".join(fields)})
+        response.raise_for_status()
+        issue_data = response.json()
+        issue_cache.put(issue_cache_key(credentials, issue_key), issue_data, fields)
+        return issue_data
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 401:
+            raise HTTPException(status_code=401, detail="Authentication failed. Check your JIRA credentials.")
+        elif e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail=f"JIRA issue {issue_key} not found.")
+        elif e.response.status_code in THROTTLED_STATUSES:
+            raise jira_rate_limit_exception(e.response)
+        else:
+            raise HTTPException(status_code=e.response.status_code, detail=f"JIRA API error: {str(e)}")
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=500, detail=f"Error connecting to JIRA: {str(e)}")
+
+# Most results JIRA returns for one search, whatever maxResults asks for
+JIRA_MAX_RESULTS = 100
+# Issues per `key in (...)` search when resolving neighbours in batches
+JIRA_BATCH_SIZE = max(1, min(int(os.getenv("JIRA_BATCH_SIZE", 50)), JIRA_MAX_RESULTS))
+
+async def search_issues_by_keys(credentials: JiraCredentials, issue_keys: List[str], fields: Optional[List[str]] = None):
+    """
+    Fetch many JIRA issues with a single `key in (...)` search
 
-async def fetch_parent_issue(credentials: JiraCredentials, issue_data):
-    """Fetch the parent issue of a given JIRA issue"""
+    Returns a dictionary of issue key to issue data. Keys that don't exist (or
+    aren't visible to the user) are simply missing from the result, since the
+    query is validated in "warn" mode instead of failing the whole search.
+    More keys than JIRA returns per search are split into concurrent searches
+    of JIRA_BATCH_SIZE keys.
+    """
+    if not issue_keys:
+        return {}
+    if len(issue_keys) > JIRA_BATCH_SIZE:
+        chunks = [issue_keys[start:start + JIRA_BATCH_SIZE] for start in range(0, len(issue_keys), JIRA_BATCH_SIZE)]
+        results = {}
+        for chunk_result in await asyncio.gather(*(search_issues_by_keys(credentials, chunk, fields) for chunk in chunks)):
+            results.update(chunk_result)
+        return results
+    if fields is None:
+        fields = get_field_profile("graph")
+        
+    url = f"{credentials.base_url}/rest/api/2/search"
+    quoted_keys = ", ".join('"' + key.replace('"', '\\"') + '"' for key in issue_keys)
+    payload = {
+        "jql": f"key in ({quoted_keys})",
+        "fields": fields,
+        "maxResults": len(issue_keys),
+        "validateQuery": "warn"
+    }
+    try:
+        response = await send_jira_request(credentials, "POST", url, json=payload)
+        response.raise_for_status()
+        data = response.json()
+        return {issue.get("key"): issue for issue in data.get("issues", []) if isinstance(issue, dict)}
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 401:
+            raise HTTPException(status_code=401, detail="Authentication failed. Check your JIRA credentials.")
+        elif e.response.status_code in THROTTLED_STATUSES:
+            raise jira_rate_limit_exception(e.response)
+        else:
+            raise HTTPException(status_code=e.response.status_code, detail=f"JIRA API error: {str(e)}")
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=500, detail=f"Error connecting to JIRA: {str(e)}")
+
+async def fetch_issues_by_keys(credentials: JiraCredentials, issue_keys: List[str], profile: str = "graph"):
+    """
+    Fetch many JIRA issues, using the issue cache first
+
+    Fresh cache entries (including ones other workers put in the shared
+    store) are returned as-is, then issues synced into the local graph
+    store are read from there; expired cache entries are revalidated with a
+    single `updated`-only search, and only the remaining keys are fetched with
+    a `key in (...)` search for the fields of the profile. Keys another request
+    is already searching for (same user and profile) are shared with it.
+    """
+    started_at = time.perf_counter()
+    fields = get_field_profile(profile)
+    results = {}
+    stale_entries = {}
+    missing_keys = []
+    uncached_keys = []
+    sources = {"hit": 0, "store": 0, "revalidated": 0, "miss": 0}
+    await issue_cache.load_shared([issue_cache_key(credentials, issue_key) for issue_key in issue_keys], fields)
+    for issue_key in issue_keys:
+        cached = issue_cache.get(issue_cache_key(credentials, issue_key), fields)
+        if cached is not None:
+            results[issue_key] = cached
+        else:
+            uncached_keys.append(issue_key)
+    sources["hit"] = len(results)
+    
+    if uncached_keys and graph_store_covers(fields):
+        stored = await graph_store.get_issues(graph_store_tenant(credentials), uncached_keys)
+        results.update(stored)
+        sources["store"] = len(stored)
+        uncached_keys = [issue_key for issue_key in uncached_keys if issue_key not in stored]
+    
+    for issue_key in uncached_keys:
+        stale = issue_cache.get_stale(issue_cache_key(credentials, issue_key), fields)
+        if stale is not None and stale.updated:
+            stale_entries[issue_key] = stale
+        else:
+            missing_keys.append(issue_key)
+    
+    if stale_entries:
+        revalidated = await revalidate_cached_issues(credentials, stale_entries)
+        results.update(revalidated)
+        sources["revalidated"] = len(revalidated)
+        missing_keys.extend(key for key in stale_entries if key not in revalidated)
+    
+    if missing_keys:
+        async def search_missing(keys):
+            fetched = await search_issues_by_keys(credentials, keys, fields)
+            cache_issues(credentials, fetched.values(), fields)
+            return fetched
+        
+        flight_prefix = ("search", *issue_cache_key(credentials, "")[:2], profile)
+        results.update(await jira_fetches.do_many(flight_prefix, missing_keys, search_missing))
+        sources["miss"] = len(missing_keys)
+    
+    trace_call("lookup", "fetch_issues_by_keys", started_at, profile=profile, keys=len(issue_keys), cache=sources)
+    return results
+
+def new_issue_resolver(credentials: JiraCredentials, semaphore: Optional[asyncio.Semaphore] = None,
+                       profile: str = "graph") -> BatchLoader:
+    """
+    Create a per-request loader that resolves issue keys in batched searches
+
+    Keys requested concurrently (e.g. all neighbours of one traversal level)
+    are fetched together, in chunks of JIRA_BATCH_SIZE, each chunk bounded by
+    the request semaphore.
+    """
+    if semaphore is None:
+        semaphore = new_request_semaphore()
+        
+    async def resolve(issue_keys):
+        async with semaphore:
+            return await fetch_issues_by_keys(credentials, issue_keys, profile)
+            
+    return BatchLoader(resolve, JIRA_BATCH_SIZE)
+
+def get_parent_reference(issue_data):
+    """
+    Find the parent of a JIRA issue without fetching it
+
+    Returns a dictionary with the parent "key" plus its "id" and "issue_type"
+    when the issue payload includes them, or None when there is no parent.
+    """
     
     # Validate input to avoid NoneType errors
     if not issue_data or not isinstance(issue_data, dict):
@@ -96,167 +530,203 @@ async def fetch_parent_issue(credentials: JiraCredentials, issue_data):
     
     # Check for parent field - different JIRA instances might use different parent field names
     # Common ones are "parent" or inside "customfield" with a key like "Epic Link"
-    parent_key = None
+    parent = None
     
     # Check for standard parent field
     if "parent" in fields and isinstance(fields["parent"], dict):
-        parent_key = fields["parent"].get("key")
+        parent = fields["parent"]
     
     # If no standard parent field, check for Epic Link
     elif "customfield_10014" in fields:  # Epic Link is often stored in this field
-        parent_key = fields.get("customfield_10014")
+        parent = fields.get("customfield_10014")
     
     # Check for any field that might contain "parent" in its name
     else:
         for field_name, field_value in fields.items():
             if "parent" in field_name.lower() and field_value:
-                if isinstance(field_value, dict) and "key" in field_value:
-                    parent_key = field_value.get("key")
-                elif isinstance(field_value, str):
-                    parent_key = field_value
+                if isinstance(field_value, (dict, str)):
+                    parent = field_value
                 break
     
-    if parent_key:
-        try:
-            parent_data = await fetch_issue(credentials, parent_key)
-            
-            # Safely get issue type
-            issue_type = "Unknown"
-            if parent_data and "fields" in parent_data:
-                if "issuetype" in parent_data["fields"]:
-                    issue_type = parent_data["fields"]["issuetype"].get("name", "Unknown")
-            
-            return {
-                "key": parent_key,
-                "data": parent_data,
-                "relationship": "is child of",  # The current issue is a child of the parent
-                "direction": "inward",  # Parent is inward from child
-                "issue_type": issue_type
-            }
-        except HTTPException as e:
-            print(f"Error fetching parent issue {parent_key}: {str(e)}")
-            return None
-        except Exception as e:
-            print(f"Unexpected error with parent issue {parent_key}: {str(e)}")
-            return None
-    
+    if isinstance(parent, str) and parent:
+        return {"key": parent, "id": None, "issue_type": None}
+    if isinstance(parent, dict) and parent.get("key"):
+        return {
+            "key": parent.get("key"),
+            "id": parent.get("id"),
+            "issue_type": (parent.get("fields", {}).get("issuetype") or {}).get("name")
+        }
     return None
 
-async def fetch_project_issues(credentials: JiraCredentials, project_key: str, max_results: int = 100):
+def get_issue_links(issue_data):
     """
-    Fetch all issues from a specific JIRA project
-    
-    Args:
-        credentials: JIRA credentials
-        project_key: The project key (e.g., "LEARNJIRA")
-        max_results: Maximum number of issues to fetch (default: 100)
-        
-    Returns:
-        List of issue data dictionaries
+    List the issue links of a JIRA issue without fetching the linked issues
+
+    Each entry holds the linked issue "key" and "id", the link type name, the
+    relationship label as seen from this issue, the link type's outward label,
+    the link "direction" and the linked issue type when JIRA included it in
+    the link payload.
     """
-    if not project_key:
-        return []
-        
-    headers = get_auth_header(credentials)
-    
-    # JQL query to fetch issues from the project
-    jql = f"project = {project_key} ORDER BY created DESC"
-    
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            url = f"{credentials.base_url}/rest/api/2/search"
-            params = {
-                "jql": jql,
-                "maxResults": max_results,
-                "fields": "summary,issuetype,status,description,issuelinks,parent"
-            }
-            
-            print(f"Fetching issues for project: {project_key}")
-            response = await client.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            if not data or "issues" not in data:
-                print(f"No issues found for project: {project_key}")
-                return []
-                
-            print(f"Found {len(data['issues'])} issues for project {project_key}")
-            return data["issues"]
-    except httpx.HTTPStatusError as e:
-        print(f"HTTP error fetching project issues: {e}")
-        if e.response.status_code == 401:
-            raise HTTPException(status_code=401, detail="Authentication failed. Check your JIRA credentials.")
-        elif e.response.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"JIRA project {project_key} not found.")
-        else:
-            raise HTTPException(status_code=e.response.status_code, detail=f"JIRA API error: {str(e)}")
-    except httpx.RequestError as e:
-        print(f"Request error fetching project issues: {e}")
-        raise HTTPException(status_code=500, detail=f"Error connecting to JIRA: {str(e)}")
-    except Exception as e:
-        print(f"Unexpected error fetching project issues: {e}")
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
-        
-async def fetch_linked_issues(credentials: JiraCredentials, issue_data):
-    """Extract and fetch all linked issues from a JIRA issue"""
-    linked_issues = []
+    links = []
     
     # Validate input to avoid NoneType errors
     if not issue_data or not isinstance(issue_data, dict):
-        return linked_issues
+        return links
     
     # Check if the fields key exists and has issuelinks
     fields = issue_data.get("fields", {})
     if not fields or not fields.get("issuelinks"):
-        return linked_issues
+        return links
     
     for link in fields.get("issuelinks", []):
         if not link or not isinstance(link, dict):
             continue
             
-        linked_issue_key = None
+        linked_issue = None
         link_type = link.get("type", {}).get("name", "relates to")
         inward = link.get("type", {}).get("inward", "relates to")
         outward = link.get("type", {}).get("outward", "relates to")
         
-        # Get the linked issue key safely
+        # Get the linked issue safely
         if "inwardIssue" in link and isinstance(link["inwardIssue"], dict):
-            linked_issue_key = link["inwardIssue"].get("key")
+            linked_issue = link["inwardIssue"]
             direction = "inward"
             relationship = inward
         elif "outwardIssue" in link and isinstance(link["outwardIssue"], dict):
-            linked_issue_key = link["outwardIssue"].get("key")
+            linked_issue = link["outwardIssue"]
             direction = "outward"
             relationship = outward
         
-        if linked_issue_key:
-            try:
-                linked_issue_data = await fetch_issue(credentials, linked_issue_key)
-                
-                # Safely get issue type
-                issue_type = "Unknown"
-                if linked_issue_data and "fields" in linked_issue_data:
-                    if "issuetype" in linked_issue_data["fields"]:
-                        issue_type = linked_issue_data["fields"]["issuetype"].get("name", "Unknown")
-                
-                linked_issues.append({
-                    "key": linked_issue_key,
-                    "data": linked_issue_data,
-                    "relationship": relationship,
-                    "direction": direction,
-                    "issue_type": issue_type
-                })
-            except HTTPException as e:
-                print(f"Error fetching linked issue {linked_issue_key}: {str(e)}")
-                # Log error but continue with other links
-                pass
-            except Exception as e:
-                print(f"Unexpected error with linked issue {linked_issue_key}: {str(e)}")
-                # Continue with other links
-                pass
-    
-    return linked_issues
+        if linked_issue and linked_issue.get("key"):
+            links.append({
+                "key": linked_issue.get("key"),
+                "id": linked_issue.get("id"),
+                "link_type": link_type,
+                "relationship": relationship,
+                "outward_relationship": outward,
+                "direction": direction,
+                "issue_type": (linked_issue.get("fields", {}).get("issuetype") or {}).get("name")
+            })
+    
+    return links
+
+def get_issue_type_name(issue_data):
+    """Safely get the issue type name of a fetched JIRA issue"""
+    if issue_data and "fields" in issue_data:
+        if "issuetype" in issue_data["fields"] and issue_data["fields"]["issuetype"]:
+            return issue_data["fields"]["issuetype"].get("name", "Unknown")
+    return "Unknown"
+
+# Page size requested from /search (JIRA may return smaller pages) and the
+# number of pages fetched in parallel for one project
+JIRA_SEARCH_PAGE_SIZE = int(os.getenv("JIRA_SEARCH_PAGE_SIZE", 100))
+JIRA_PAGE_CONCURRENCY = int(os.getenv("JIRA_PAGE_CONCURRENCY", 4))
+
+PROJECT_ISSUE_FIELDS = ",".join(get_field_profile("graph"))
+
+async def search_issues_page(credentials: JiraCredentials, jql: str, start_at: int = 0,
+                             max_results: int = JIRA_SEARCH_PAGE_SIZE, fields: str = PROJECT_ISSUE_FIELDS):
+    """
+    Fetch one page of a JQL search; returns the raw search response
 
+    Pages are not put in the issue cache: project graphs keep compact issue
+    records, and caching every raw page would hold the payloads regardless.
+    """
+    url = f"{credentials.base_url}/rest/api/2/search"
+    params = {
+        "jql": jql,
+        "startAt": start_at,
+        "maxResults": max_results,
+        "fields": fields
+    }
+    
+    response = await send_jira_request(credentials, "GET", url, params=params)
+    response.raise_for_status()
+    return response.json() or {}
+
+async def iter_project_issue_pages(credentials: JiraCredentials, project_key: str,
+                                   max_results: Optional[int] = None, jql: Optional[str] = None,
+                                   fields: str = PROJECT_ISSUE_FIELDS) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yield the issues of a JIRA project page by page
+
+    The first page tells us the total; the remaining pages are then requested
+    concurrently (at most JIRA_PAGE_CONCURRENCY at a time) and yielded in the
+    order they arrive, so callers can build the graph while later pages are
+    still in flight.
+    
+    Args:
+        credentials: JIRA credentials
+        project_key: The project key (e.g., "LEARNJIRA")
+        max_results: Stop after this many issues (default: all issues)
+        jql: Narrower query within the project (default: every issue)
+        fields: Fields to request for each issue
+    """
+    if not project_key:
+        return
+        
+    # JQL query to fetch issues from the project
+    if jql is None:
+        jql = f"project = {project_key} ORDER BY created DESC"
+    
+    try:
+        print(f"Fetching issues for project: {project_key}")
+        first_page_size = JIRA_SEARCH_PAGE_SIZE if max_results is None else min(JIRA_SEARCH_PAGE_SIZE, max_results)
+        data = await search_issues_page(credentials, jql, 0, first_page_size, fields)
+        issues = data.get("issues") or []
+        if not issues:
+            print(f"No issues found for project: {project_key}")
+            return
+        
+        total = data.get("total", len(issues))
+        if max_results is not None:
+            total = min(total, max_results)
+        print(f"Found {total} issues for project {project_key}")
+        # JIRA may cap maxResults below what we asked for; page by what it returned
+        first_page_count = len(issues)
+        page_size = max(1, min(data.get("maxResults") or first_page_count, first_page_count))
+        yield issues
+        issues = data = None  # Don't hold the raw page while the rest arrive
+        
+        # Pages are handed over through a queue rather than as task results,
+        # so a raw page is released as soon as the caller has processed it
+        page_semaphore = asyncio.Semaphore(JIRA_PAGE_CONCURRENCY)
+        pages = asyncio.Queue()
+        
+        async def fetch_page(start_at):
+            async with page_semaphore:
+                try:
+                    page = await search_issues_page(credentials, jql, start_at, min(page_size, total - start_at), fields)
+                    pages.put_nowait((page.get("issues") or [], None))
+                except Exception as e:
+                    pages.put_nowait((None, e))
+        
+        tasks = [asyncio.ensure_future(fetch_page(start_at)) for start_at in range(first_page_count, total, page_size)]
+        try:
+            for _ in tasks:
+                next_page, error = await pages.get()
+                if error is not None:
+                    raise error
+                yield next_page
+                next_page = None
+        finally:
+            for task in tasks:
+                task.cancel()
+    except httpx.HTTPStatusError as e:
+        print(f"HTTP error fetching project issues: {e}")
+        if e.response.status_code == 401:
+            raise HTTPException(status_code=401, detail="Authentication failed. Check your JIRA credentials.")
+        elif e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail=f"JIRA project {project_key} not found.")
+        elif e.response.status_code in THROTTLED_STATUSES:
+            raise jira_rate_limit_exception(e.response)
+        else:
+            raise HTTPException(status_code=e.response.status_code, detail=f"JIRA API error: {str(e)}")
+    except httpx.RequestError as e:
+        print(f"Request error fetching project issues: {e}")
+        raise HTTPException(status_code=500, detail=f"Error connecting to JIRA: {str(e)}")
+
+@traced("process_issue_node")
 def process_issue_node(issue_data, node_type="central"):
     """Convert JIRA issue data to a node for visualization"""
     if not issue_data:
@@ -278,217 +748,405 @@ def process_issue_node(issue_data, node_type="central"):
             }
         }
         
-    fields = issue_data.get("fields", {})
-    
-    # Process description - clean and truncate for display if needed
-    description = fields.get("description", "")
-    
-    # Use get method with defaults for all dictionary access to prevent NoneType errors
+    return IssueRecord.from_issue(issue_data, node_type).to_node()
+
+DESCRIPTION_EXCERPT_LENGTH = int(os.getenv("DESCRIPTION_EXCERPT_LENGTH", 200))
+
+def slim_node(node):
+    """
+    A graph node with only key, summary, status, type and priority, and a
+    description excerpt
+
+    Graph endpoints return these when called with ?slim=true; the frontend
+    loads the full description of a selected node from /api/jira/issue-details
+    (/api/jira/issue-descriptions returns several at once).
+    """
+    data = node.get("data", {})
+    description = data.get("description") or ""
+    if not isinstance(description, str):
+        description = json.dumps(description)
     return {
-        "id": issue_data.get("id", f"unknown-{id(issue_data)}"),
-        "type": node_type,
+        "id": node.get("id"),
+        "type": node.get("type"),
         "data": {
-            "key": issue_data.get("key", "Unknown"),
-            "summary": fields.get("summary", "No summary"),
-            "status": fields.get("status", {}).get("name", "Unknown"),
-            "issue_type": fields.get("issuetype", {}).get("name", "Unknown"),
-            "priority": fields.get("priority", {}).get("name", "None"),
-            "description": description,  # Add full description for LLM processing
-            "updated": fields.get("updated", ""),
-            "created": fields.get("created", ""),
-            "assignee": fields.get("assignee", {}).get("displayName", "Unassigned") if fields.get("assignee") else "Unassigned",
-            "reporter": fields.get("reporter", {}).get("displayName", "Unknown") if fields.get("reporter") else "Unknown",
+            "key": data.get("key"),
+            "summary": data.get("summary"),
+            "status": data.get("status"),
+            "issue_type": data.get("issue_type"),
+            "priority": data.get("priority"),
+            "description_excerpt": description[:DESCRIPTION_EXCERPT_LENGTH],
+            "description_length": len(description),
         }
     }
 
+def output_nodes(nodes, slim: bool):
+    """Node dicts for a response, from node dicts or IssueRecords"""
+    nodes = [node.to_node() if isinstance(node, IssueRecord) else node for node in nodes]
+    return [slim_node(node) for node in nodes] if slim else nodes
+
+def output_edges(edge_keys):
+    """Edge dicts for a response, from (source id, target id, label) keys"""
+    return [process_edge(str(source_id), str(target_id), relationship)
+            for source_id, target_id, relationship in edge_keys]
+
+@traced("process_edge")
 def process_edge(source_id, target_id, relationship):
-    """Create an edge between two nodes"""
+    """Create an edge between two nodes; the id includes the label, as two issues can share several links"""
     return {
-        "id": f"e{source_id}-{target_id}",
+        "id": f"e{source_id}-{target_id}-{relationship}",
         "source": source_id,
         "target": target_id,
         "label": relationship
     }
 
+# Default and maximum number of hops /api/jira/visualize expands, and a
+# cap on the number of nodes a single traversal may add
+VISUALIZE_MAX_DEPTH = int(os.getenv("VISUALIZE_MAX_DEPTH", 2))
+VISUALIZE_MAX_DEPTH_LIMIT = int(os.getenv("VISUALIZE_MAX_DEPTH_LIMIT", 4))
+VISUALIZE_MAX_NODES = int(os.getenv("VISUALIZE_MAX_NODES", 500))
+
+def get_issue_type_category(issue_type):
+    """Map a JIRA issue type name to the node category used by the graph view"""
+    issue_type = (issue_type or "").lower()
+    if "requirement" in issue_type:
+        return "requirement"
+    elif "test" in issue_type:
+        return "test"
+    elif "bug" in issue_type or "defect" in issue_type:
+        return "defect"
+    return "related"
+
+def matches_any(value, candidates):
+    """Case-insensitive membership test; an empty filter matches everything"""
+    if not candidates:
+        return True
+    return (value or "").lower() in {candidate.lower() for candidate in candidates}
+
+async def expand_issue_graph(credentials: JiraCredentials, central_issue, options: GraphTraversalOptions):
+    """
+    Breadth-first expansion of the issue graph around a central issue
+
+    Each level collects the parents and issue links of every issue found on the
+    previous level, applies the link type, direction and issue type filters,
+    and resolves all unseen neighbours through one batched lookup. Issues are
+    visited once (keyed by issue id); edges between issues already in the
+    graph are still added, deduplicated by (source, target, label). The last
+    level is never expanded, so it is fetched with the slimmer "leaf" profile.
+    
+    Returns:
+        Tuple of (nodes, edges)
+    """
+    semaphore = new_request_semaphore()
+    resolver = new_issue_resolver(credentials, semaphore)
+    leaf_resolver = new_issue_resolver(credentials, semaphore, profile="leaf")
+    
+    max_depth = VISUALIZE_MAX_DEPTH if options.max_depth is None else options.max_depth
+    max_depth = max(0, min(max_depth, VISUALIZE_MAX_DEPTH_LIMIT))
+    
+    central_id = central_issue.get("id")
+    nodes = [process_issue_node(central_issue, "central")]
+    edges = []
+    edge_keys = set()
+    visited = {central_id}
+    key_to_id = {central_issue.get("key"): central_id}
+    truncated = False
+    
+    def add_edge(source_id, target_id, relationship):
+        if source_id not in visited or target_id not in visited:
+            return
+        edge_key = (source_id, target_id, relationship)
+        if edge_key not in edge_keys:
+            edge_keys.add(edge_key)
+            edges.append(process_edge(source_id, target_id, relationship))
+    
+    async def load_safely(issue_key, level_resolver):
+        try:
+            return await level_resolver.load(issue_key)
+        except HTTPException as e:
+            if e.status_code in THROTTLED_STATUSES:
+                # Still throttled after retrying: fail instead of returning a partial graph
+                raise
+            print(f"Error fetching issue {issue_key}: {str(e)}")
+        except Exception as e:
+            print(f"Unexpected error with issue {issue_key}: {str(e)}")
+        return None
+    
+    frontier = [central_issue]
+    for depth in range(max_depth):
+        level_resolver = leaf_resolver if depth == max_depth - 1 else resolver
+        # Collect this level's neighbour references: (source id, reference, is parent)
+        references = []
+        for issue in frontier:
+            source_id = issue.get("id")
+            
+            if options.include_parents:
+                parent = get_parent_reference(issue)
+                if parent and (not parent["issue_type"] or matches_any(parent["issue_type"], options.issue_types)):
+                    references.append((source_id, parent, True))
+            
+            for link in get_issue_links(issue):
+                if options.direction != "both" and link["direction"] != options.direction:
+                    continue
+                if options.link_types and not (matches_any(link["link_type"], options.link_types)
+                                               or matches_any(link["relationship"], options.link_types)):
+                    continue
+                # Skip the fetch entirely when the link payload already tells us the type
+                if link["issue_type"] and not matches_any(link["issue_type"], options.issue_types):
+                    continue
+                references.append((source_id, link, False))
+        
+        # Resolve every unseen neighbour of the level in one batch
+        keys_to_fetch = []
+        for _, reference, _ in references:
+            if reference["key"] in key_to_id or reference.get("id") in visited:
+                continue
+            if reference["key"] not in keys_to_fetch:
+                keys_to_fetch.append(reference["key"])
+        fetched = dict(zip(keys_to_fetch, await asyncio.gather(*(load_safely(key, level_resolver) for key in keys_to_fetch))))
+        
+        next_frontier = []
+        for source_id, reference, is_parent in references:
+            issue_key = reference["key"]
+            target_id = key_to_id.get(issue_key)
+            if target_id is None and reference.get("id") in visited:
+                target_id = reference["id"]
+            
+            if target_id is None:
+                issue_data = fetched.get(issue_key)
+                if not issue_data or not issue_data.get("id"):
+                    continue
+                issue_type = get_issue_type_name(issue_data)
+                if not matches_any(issue_type, options.issue_types):
+                    continue
+                
+                target_id = issue_data["id"]
+                if target_id not in visited:
+                    if len(nodes) >= VISUALIZE_MAX_NODES:
+                        if not truncated:
+                            print(f"Graph for {central_issue.get('key')} truncated at {VISUALIZE_MAX_NODES} nodes")
+                            truncated = True
+                        continue
+                    visited.add(target_id)
+                    category = "parent" if is_parent else get_issue_type_category(issue_type)
+                    nodes.append(process_issue_node(issue_data, category))
+                    next_frontier.append(issue_data)
+                # Only keys of issues in the graph, so later links to an issue
+                # left out by the node cap don't produce dangling edges
+                key_to_id[issue_key] = target_id
+            
+            # Links always point from the outward issue to the inward one with the
+            # outward label (as in get_link_edge_references), so a link seen from
+            # both of its issues yields the same edge
+            if is_parent:
+                add_edge(source_id, target_id, "is child of")
+            elif reference["direction"] == "inward":
+                add_edge(target_id, source_id, reference["outward_relationship"])
+            else:
+                add_edge(source_id, target_id, reference["outward_relationship"])
+        
+        frontier = next_frontier
+        if not frontier:
+            break
+    
+    return nodes, edges
+
 @app.post("/api/jira/visualize", response_model=GraphData)
-async def visualize_jira(credentials: JiraCredentials):
+async def visualize_jira(credentials: VisualizeRequest, request: Request, slim: bool = False):
     """
     Fetch JIRA issues and build a visualization graph
+
+    The graph is expanded breadth-first from the central issue; the optional
+    traversal settings (max_depth, link_types, issue_types, direction and
+    include_parents) control how far and along which links it goes.
+    Graph responses are encoded by response_encoder (MessagePack via Accept,
+    brotli/gzip via Accept-Encoding) and carry an ETag over the sorted nodes
+    and edges; a request with a matching If-None-Match gets a 304, without a
+    rebuild when the issues behind the graph are unchanged in the issue cache.
+    With ?slim=true nodes are returned without full descriptions (see slim_node).
     """
     try:
         # Validate input
         if not credentials or not credentials.central_jira_id:
             raise HTTPException(status_code=400, detail="Missing JIRA credentials or central issue ID")
+        if credentials.direction not in ("both", "inward", "outward"):
+            raise HTTPException(status_code=400, detail="direction must be one of: both, inward, outward")
 
+        validator_key = ("visualize", *issue_cache_key(credentials, "")[:2], json.dumps(credentials.dict(
+            include={"central_jira_id", "max_depth", "link_types", "issue_types", "direction", "include_parents"}
+        ), sort_keys=True), slim)
+        if_none_match = request.headers.get("if-none-match")
+        cached_response = await validated_not_modified(credentials, validator_key, if_none_match)
+        if cached_response is not None:
+            return cached_response
+        
         # Fetch central issue
         central_issue = await fetch_issue(credentials, credentials.central_jira_id)
         if not central_issue or not isinstance(central_issue, dict) or "id" not in central_issue:
             raise HTTPException(status_code=404, detail=f"Central issue {credentials.central_jira_id} not found or has invalid format")
         
-        # Initialize graph data
-        central_node = process_issue_node(central_issue, "central")
-        nodes = [central_node]
-        edges = []
-        processed_issues = {central_issue.get("id"): True}
+        nodes, edges = await expand_issue_graph(credentials, central_issue, credentials)
+        issue_keys = [node["data"]["key"] for node in nodes]
+        nodes = output_nodes(nodes, slim)
+
+        etag = graph_etag(nodes, edges)
+        remember_validator(credentials, validator_key, etag, issue_keys)
+        if etag_matches(if_none_match, etag):
+            response_validators.rebuilt_not_modified += 1
+            return not_modified(etag)
+        return response_encoder.response(request, {"nodes": nodes, "edges": edges, "sync_token": None},
+                                         headers={"ETag": etag})
+    
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing JIRA data: {str(e)}")
+
+def get_project_node_category(issue_type):
+    """Map a JIRA issue type name to the node category used in project graphs"""
+    issue_type = (issue_type or "").lower()
+    if "requirement" in issue_type:
+        return "requirement"
+    elif "test" in issue_type:
+        return "test"
+    elif "bug" in issue_type or "defect" in issue_type:
+        return "defect"
+    elif "story" in issue_type:
+        return "central"
+    elif "epic" in issue_type:
+        return "parent"
+    return "related"
+
+def get_project_edge_references(issue):
+    """
+    List the edges an issue contributes to a project graph, by target key
+
+    Each reference is (source id, target key, label, reversed). Both ends of an
+    issue link list it, so links are always recorded in their outward form
+    (outward issue -> inward issue, outward label) and the two copies collapse
+    into one edge once resolved.
+    """
+    references = []
+    
+    # Parent-child relationship: edge from child to parent
+    parent = get_parent_reference(issue)
+    if parent:
+        references.append((issue.get("id"), parent["key"], "is child of", False))
+    
+    references.extend(get_link_edge_references(issue))
+    return references
+
+def get_link_edge_references(issue):
+    """The issue-link part of get_project_edge_references"""
+    issue_id = issue.get("id")
+    references = []
+    for link in issue.get("fields", {}).get("issuelinks") or []:
+        if not link:
+            continue
+        relationship = link.get("type", {}).get("outward", "is linked to")
         
-        # Check for parent issue
-        parent_issue = await fetch_parent_issue(credentials, central_issue)
+        # Handle inward links (another issue --> this issue)
+        if isinstance(link.get("inwardIssue"), dict) and link["inwardIssue"].get("key"):
+            references.append((issue_id, link["inwardIssue"]["key"], relationship, True))
         
-        # Process parent issue if it exists
-        if parent_issue and parent_issue.get("data") and parent_issue["data"].get("id"):
-            parent_data = parent_issue.get("data", {})
-            parent_id = parent_data.get("id")
-            
-            # Only process if we haven't seen this issue before
-            if parent_id and parent_id not in processed_issues:
-                # Determine issue type category for parent
-                parent_type = parent_issue.get("issue_type", "").lower()
-                parent_type_category = "parent"  # New category for parent issues
-                
-                # Create parent node
-                parent_node = process_issue_node(parent_data, parent_type_category)
-                nodes.append(parent_node)
-                
-                # Create edge from child to parent
-                central_id = central_issue.get("id")
-                edges.append(process_edge(central_id, parent_id, "is child of"))
-                
-                processed_issues[parent_id] = True
-                
-                # Fetch parents of parent (grandparents) recursively up to 2 levels
-                grandparent_issue = await fetch_parent_issue(credentials, parent_data)
-                if grandparent_issue and grandparent_issue.get("data") and grandparent_issue["data"].get("id"):
-                    gparent_data = grandparent_issue.get("data", {})
-                    gparent_id = gparent_data.get("id")
-                    
-                    if gparent_id and gparent_id not in processed_issues:
-                        # Create grandparent node
-                        gparent_node = process_issue_node(gparent_data, "parent")
-                        nodes.append(gparent_node)
-                        
-                        # Create edge from parent to grandparent
-                        edges.append(process_edge(parent_id, gparent_id, "is child of"))
-                        
-                        processed_issues[gparent_id] = True
-        
-        # Fetch directly linked issues
-        direct_links = await fetch_linked_issues(credentials, central_issue)
-        
-        # Process all linked issues
-        for link in direct_links:
-            # Skip invalid links
-            if not link or not isinstance(link, dict) or "key" not in link or "data" not in link:
+        # Handle outward links (this issue --> another issue)
+        if isinstance(link.get("outwardIssue"), dict) and link["outwardIssue"].get("key"):
+            references.append((issue_id, link["outwardIssue"]["key"], relationship, False))
+    
+    return references
+
+@traced("resolve_project_edges")
+def resolve_project_edges(key_to_id, edge_references):
+    """
+    Resolve edge references against the key -> id index
+
+    Returns an ordered set (a dict with None values) of (source id, target id,
+    label) keys; see output_edges for the edge dicts.
+    """
+    edges = {}
+    for references in edge_references:
+        for source_id, target_key, relationship, reverse in references:
+            target_id = key_to_id.get(target_key)
+            if target_id is None:
                 continue
-                
-            link_data = link.get("data", {})
-            link_id = link_data.get("id")
-            
-            # Skip already processed issues and validate ID
-            if not link_id or link_id in processed_issues:
+            if reverse:
+                source_id, target_id = target_id, source_id
+            edges[(source_id, target_id, relationship)] = None
+    return edges
+
+@traced("process_issue_node")
+def add_record_to_snapshot(snapshot: ProjectSnapshot, issue, edge_references):
+    """
+    Add or replace one issue's record and edge references; returns the record
+
+    Traced under the same section as process_issue_node, so node building
+    shows up alike in issue and project traces.
+    """
+    issue_type = issue.get("fields", {}).get("issuetype", {}).get("name", "")
+    record = IssueRecord.from_issue(issue, get_project_node_category(issue_type))
+    snapshot.nodes[record.id] = record
+    snapshot.key_to_id[record.key] = record.id
+    snapshot.edge_references[record.id] = compact_references(edge_references)
+    return record
+
+def apply_issue_to_snapshot(snapshot: ProjectSnapshot, issue):
+    """Add or replace one issue from a JIRA payload, which isn't kept; returns the record"""
+    return add_record_to_snapshot(snapshot, issue, get_project_edge_references(issue))
+
+async def build_project_snapshot(credentials: JiraCredentials, project_key: str) -> ProjectSnapshot:
+    """
+    Fetch a whole project and build its graph
+
+    Pass 1 builds the nodes and a key -> id index while pages arrive, and only
+    records edge references; pass 2 resolves them against the index, so links
+    to issues on later pages are kept.
+    """
+    snapshot = ProjectSnapshot()
+    started_at = time.time()
+    
+    async for page in iter_project_issue_pages(credentials, project_key):
+        for issue in page:
+            if not issue or "id" not in issue:
                 continue
-                
-            # Determine issue type category
-            issue_type = link.get("issue_type", "").lower()
-            issue_type_category = "related"
-            
-            if "requirement" in issue_type:
-                issue_type_category = "requirement"
-            elif "test" in issue_type:
-                issue_type_category = "test"
-            elif "bug" in issue_type or "defect" in issue_type:
-                issue_type_category = "defect"
-            
-            # Process node and add it
-            link_node = process_issue_node(link_data, issue_type_category)
-            nodes.append(link_node)
-            
-            # Create edge based on direction
-            central_id = central_issue.get("id")
-            if link.get("direction") == "inward":
-                edges.append(process_edge(link_id, central_id, link.get("relationship", "relates to")))
-            else:
-                edges.append(process_edge(central_id, link_id, link.get("relationship", "relates to")))
-            
-            processed_issues[link_id] = True
-                
-            # If it's a requirement, fetch tests linked to it
-            if issue_type_category == "requirement":
-                req_links = await fetch_linked_issues(credentials, link_data)
-                for req_link in req_links:
-                    # Skip invalid links
-                    if not req_link or not isinstance(req_link, dict) or "key" not in req_link or "data" not in req_link:
-                        continue
-                            
-                        req_link_data = req_link.get("data", {})
-                        req_link_id = req_link_data.get("id")
-                        
-                        # Skip already processed issues and validate ID
-                        if not req_link_id or req_link_id in processed_issues:
-                            continue
-                        
-                        # Determine the issue type
-                        req_issue_type = "related"
-                        if "test" in req_link.get("issue_type", "").lower():
-                            req_issue_type = "test"
-                            
-                            # If it's a test, process it and fetch defects linked to it
-                            if req_issue_type == "test":
-                                nodes.append(process_issue_node(req_link_data, req_issue_type))
-                                
-                                # Safe access to direction and relationship using get method
-                                direction = req_link.get("direction")
-                                relationship = req_link.get("relationship", "relates to")
-                                
-                                # Create edges depending on direction
-                                if direction == "inward":
-                                    edges.append(process_edge(req_link_id, link_id, relationship))
-                                else:
-                                    edges.append(process_edge(link_id, req_link_id, relationship))
-                                
-                                processed_issues[req_link_id] = True
-                                
-                                # Fetch defects linked to test
-                                test_links = await fetch_linked_issues(credentials, req_link_data)
-                                for test_link in test_links:
-                                    # Skip invalid links
-                                    if not test_link or not isinstance(test_link, dict) or "key" not in test_link or "data" not in test_link:
-                                        continue
-                                        
-                                    test_link_data = test_link.get("data", {})
-                                    test_link_id = test_link_data.get("id")
-                                    
-                                    # Skip already processed issues and validate ID
-                                    if not test_link_id or test_link_id in processed_issues:
-                                        continue
-                                    
-                                    # Check if it's a bug/defect
-                                    test_link_issue_type = test_link.get("issue_type", "").lower()
-                                    if ("bug" in test_link_issue_type or "defect" in test_link_issue_type):
-                                        nodes.append(process_issue_node(test_link_data, "defect"))
-                                        
-                                        # Safe access to direction and relationship
-                                        test_direction = test_link.get("direction")
-                                        test_relationship = test_link.get("relationship", "relates to")
-                                        
-                                        # Create edges depending on direction
-                                        if test_direction == "inward":
-                                            edges.append(process_edge(test_link_id, req_link_id, test_relationship))
-                                        else:
-                                            edges.append(process_edge(req_link_id, test_link_id, test_relationship))
-                                        
-                                        processed_issues[test_link_id] = True
-
-        return GraphData(nodes=nodes, edges=edges)
+            if compact_id(issue.get("id")) in snapshot.nodes:
+                continue
+            apply_issue_to_snapshot(snapshot, issue)
     
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing JIRA data: {str(e)}")
+    snapshot.edges = resolve_project_edges(snapshot.key_to_id, snapshot.edge_references.values())
+    snapshot.new_token(started_at)
+    return snapshot
+
+async def load_project_snapshot_from_store(credentials: JiraCredentials, project_key: str) -> Optional[ProjectSnapshot]:
+    """
+    Build a project graph from the local graph store
+
+    Returns None unless the project has been synced for these credentials
+    within the store's max age. The snapshot is dated to the last sync, so a
+    delta refresh picks up whatever changed in JIRA since then.
+    """
+    tenant = graph_store_tenant(credentials)
+    synced_at = await graph_store.project_synced_at(tenant, project_key)
+    if not graph_store.is_fresh(synced_at):
+        return None
+    
+    issues, edge_references = await graph_store.get_project(tenant, project_key)
+    snapshot = ProjectSnapshot()
+    for issue in issues:
+        add_record_to_snapshot(snapshot, issue, edge_references.get(issue.get("id"), []))
+    snapshot.edges = resolve_project_edges(snapshot.key_to_id, snapshot.edge_references.values())
+    snapshot.new_token(synced_at)
+    return snapshot
+
+def project_snapshot_key(credentials: JiraCredentials, project_key: str):
+    return project_snapshots.make_key(credentials.base_url, credentials.username, credentials.api_token, project_key)
 
 @app.post("/api/jira/visualize-project", response_model=GraphData)
-async def visualize_jira_project(credentials: JiraCredentials):
+async def visualize_jira_project(credentials: JiraCredentials, request: Request, slim: bool = False):
     """
     Fetch all issues from a JIRA project and build a visualization graph
+
+    The response carries a sync_token; later refreshes can post it to
+    /api/jira/visualize-project/delta to receive only what changed. With
+    ?slim=true nodes are returned without full descriptions.
     """
     try:
         # Use project_id from credentials as the project key
@@ -499,101 +1157,21 @@ async def visualize_jira_project(credentials: JiraCredentials):
             
         print(f"Visualizing entire project: {project_key}")
         
-        # Fetch all issues in the project
-        issues = await fetch_project_issues(credentials, project_key)
+        snapshot = await load_project_snapshot_from_store(credentials, project_key)
+        if snapshot is None:
+            snapshot = await build_project_snapshot(credentials, project_key)
         
-        if not issues:
+        if not snapshot.nodes:
             raise HTTPException(status_code=404, detail=f"No issues found for project {project_key}")
-            
-        # Initialize graph data
-        nodes = []
-        edges = []
-        processed_issues = {}
         
-        # Process each issue
-        for issue in issues:
-            if not issue or "id" not in issue:
-                continue
-                
-            issue_id = issue.get("id")
-            if issue_id in processed_issues:
-                continue
-                
-            # Determine issue type category
-            issue_type = issue.get("fields", {}).get("issuetype", {}).get("name", "").lower()
-            issue_type_category = "related"
-            
-            if "requirement" in issue_type:
-                issue_type_category = "requirement"
-            elif "test" in issue_type:
-                issue_type_category = "test"
-            elif "bug" in issue_type or "defect" in issue_type:
-                issue_type_category = "defect"
-            elif "story" in issue_type:
-                issue_type_category = "central"
-            elif "epic" in issue_type:
-                issue_type_category = "parent"
-                
-            # Process node and add it
-            node = process_issue_node(issue, issue_type_category)
-            nodes.append(node)
-            processed_issues[issue_id] = True
-            
-            # Process parent-child relationships
-            if "fields" in issue and "parent" in issue["fields"] and issue["fields"]["parent"]:
-                parent_key = issue["fields"]["parent"].get("key")
-                if parent_key:
-                    # Find if we already have this parent in our nodes
-                    parent_id = None
-                    for existing_node in nodes:
-                        if existing_node.get("data", {}).get("key") == parent_key:
-                            parent_id = existing_node.get("data", {}).get("id")
-                            break
-                    
-                    if parent_id:
-                        # Create edge from child to parent
-                        edges.append(process_edge(issue_id, parent_id, "is child of"))
+        project_snapshots.put(project_snapshot_key(credentials, project_key), snapshot)
             
-            # Process issue links
-            if "fields" in issue and "issuelinks" in issue["fields"]:
-                for link in issue["fields"]["issuelinks"]:
-                    if not link:
-                        continue
-                        
-                    # Handle inward links (another issue --> this issue)
-                    if "inwardIssue" in link:
-                        inward_key = link["inwardIssue"].get("key")
-                        inward_id = link["inwardIssue"].get("id")
-                        if inward_id and inward_key:
-                            # Check if we already have this issue in our nodes
-                            linked_id = None
-                            for existing_node in nodes:
-                                if existing_node.get("data", {}).get("key") == inward_key:
-                                    linked_id = existing_node.get("data", {}).get("id")
-                                    break
-                            
-                            if linked_id:
-                                relationship = link.get("type", {}).get("inward", "is linked to")
-                                edges.append(process_edge(linked_id, issue_id, relationship))
-                    
-                    # Handle outward links (this issue --> another issue)
-                    if "outwardIssue" in link:
-                        outward_key = link["outwardIssue"].get("key")
-                        outward_id = link["outwardIssue"].get("id")
-                        if outward_id and outward_key:
-                            # Check if we already have this issue in our nodes
-                            linked_id = None
-                            for existing_node in nodes:
-                                if existing_node.get("data", {}).get("key") == outward_key:
-                                    linked_id = existing_node.get("data", {}).get("id")
-                                    break
-                            
-                            if linked_id:
-                                relationship = link.get("type", {}).get("outward", "is linked to")
-                                edges.append(process_edge(issue_id, linked_id, relationship))
-                                
         # Return the visualization data
-        return {"nodes": nodes, "edges": edges}
+        return response_encoder.response(request, {
+            "nodes": output_nodes(snapshot.nodes.values(), slim),
+            "edges": output_edges(snapshot.edges),
+            "sync_token": snapshot.token
+        })
     
     except HTTPException as e:
         raise e
@@ -602,22 +1180,314 @@ async def visualize_jira_project(credentials: JiraCredentials):
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error processing JIRA data: {str(e)}")
+
+def format_stream_record(record: Dict[str, Any], server_sent_events: bool) -> bytes:
+    """Encode one stream record as an NDJSON line or a server-sent event"""
+    body, _ = response_encoder.encode(record)
+    if server_sent_events:
+        return b"event: " + record["type"].encode("utf-8") + b"\ndata: " + body + b"\n\n"
+    return body + b"\n"
+
+async def stream_project_graph(credentials: JiraCredentials, project_key: str, server_sent_events: bool,
+                               slim: bool = False):
+    """
+    Build a project graph page by page and yield it as stream records
+
+    For every JIRA page a "nodes" record is emitted, followed by an "edges"
+    record with the edges that could be resolved so far. Edge references whose
+    target hasn't arrived yet wait in a map keyed by target key and are
+    emitted with the page that brings the target. Issue payloads are dropped
+    once their page's records are written; their compact records are kept,
+    as the finished graph becomes the project snapshot for delta refreshes.
+    When the graph store holds a fresh sync of the project, the graph is
+    read from there instead and sent as one "nodes" and one "edges" record.
+    A final "summary" record with the snapshot's sync_token (or an "error"
+    record) ends the stream.
+    """
+    pages = 0
+    
+    try:
+        snapshot = await load_project_snapshot_from_store(credentials, project_key)
+        if snapshot is not None:
+            yield format_stream_record({"type": "nodes", "nodes": output_nodes(snapshot.nodes.values(), slim)},
+                                       server_sent_events)
+            yield format_stream_record({"type": "edges", "edges": output_edges(snapshot.edges)}, server_sent_events)
+        else:
+            snapshot = ProjectSnapshot()
+            started_at = time.time()
+            pending_references = {}  # target key -> [(source id, label, reversed)]
+            
+            def resolve(source_id, target_id, relationship, reverse, edges):
+                if reverse:
+                    source_id, target_id = target_id, source_id
+                edge_key = (source_id, target_id, relationship)
+                if edge_key not in snapshot.edges:
+                    snapshot.edges[edge_key] = None
+                    edges.append(edge_key)
+            
+            async for page in iter_project_issue_pages(credentials, project_key):
+                pages += 1
+                records = []
+                edges = []
+                for issue in page:
+                    if not issue or "id" not in issue or issue.get("key") in snapshot.key_to_id:
+                        continue
+                    record = apply_issue_to_snapshot(snapshot, issue)
+                    records.append(record)
+                    
+                    for source_id, target_key, relationship, reverse in snapshot.edge_references[record.id]:
+                        target_id = snapshot.key_to_id.get(target_key)
+                        if target_id is not None:
+                            resolve(source_id, target_id, relationship, reverse, edges)
+                        else:
+                            pending_references.setdefault(target_key, []).append((source_id, relationship, reverse))
+                    
+                    # References recorded by earlier issues that were waiting for this one
+                    for source_id, relationship, reverse in pending_references.pop(record.key, []):
+                        resolve(source_id, record.id, relationship, reverse, edges)
+                
+                if records:
+                    yield format_stream_record({"type": "nodes", "nodes": output_nodes(records, slim)},
+                                               server_sent_events)
+                if edges:
+                    yield format_stream_record({"type": "edges", "edges": output_edges(edges)}, server_sent_events)
+            snapshot.new_token(started_at)
+        
+        if snapshot.nodes:
+            project_snapshots.put(project_snapshot_key(credentials, project_key), snapshot)
+        yield format_stream_record({
+            "type": "summary",
+            "project": project_key,
+            "pages": pages,
+            "nodes": len(snapshot.nodes),
+            "edges": len(snapshot.edges),
+            "sync_token": snapshot.token
+        }, server_sent_events)
+    except HTTPException as e:
+        yield format_stream_record({"type": "error", "status": e.status_code, "detail": e.detail}, server_sent_events)
+    except Exception as e:
+        print(f"Error streaming project: {str(e)}")
+        yield format_stream_record({"type": "error", "status": 500, "detail": f"Error processing JIRA data: {str(e)}"}, server_sent_events)
+
+@app.post("/api/jira/visualize-project/stream")
+async def visualize_jira_project_stream(credentials: JiraCredentials, request: Request, slim: bool = False):
+    """
+    Stream a project graph as it is built
+
+    Responds with NDJSON by default, or with server-sent events when the
+    client sends `Accept: text/event-stream`. Records are
+    {"type": "nodes", "nodes": [...]}, {"type": "edges", "edges": [...]},
+    and finally {"type": "summary", "sync_token": ...} or {"type": "error", ...};
+    the token can be posted to /api/jira/visualize-project/delta. With
+    ?slim=true nodes are sent without full descriptions.
+    """
+    project_key = credentials.project_id
+    if not project_key:
+        raise HTTPException(status_code=400, detail="Missing project key. Please provide a valid JIRA project key.")
+    
+    server_sent_events = "text/event-stream" in request.headers.get("accept", "")
+    media_type = "text/event-stream" if server_sent_events else "application/x-ndjson"
+    return StreamingResponse(
+        stream_project_graph(credentials, project_key, server_sent_events, slim),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/jira/visualize-project/delta", response_model=GraphDelta)
+async def visualize_jira_project_delta(request: ProjectSyncRequest, http_request: Request, slim: bool = False):
+    """
+    Incrementally refresh a project graph
+
+    With the sync_token of the last response, only issues updated since then
+    are fetched (`project = X AND updated >= -Nm`) and merged into the
+    server-side snapshot; the response lists the added, changed and removed
+    nodes and edges plus a new token. Without a known token the whole graph
+    is returned in added_nodes/added_edges with full=True.
+
+    Removed (deleted or moved) issues don't show up in an `updated` query,
+    so the project's issue count is checked with one empty search and the
+    full key list is only read when the count doesn't match.
+
+    The changes are applied to a copy of the snapshot, which replaces it
+    only once every page has been read; if JIRA fails part way, the old
+    snapshot and token stay valid and a retry fetches the same changes.
+
+    With ?slim=true nodes are sent without full descriptions; a node whose
+    description changed is still listed in changed_nodes.
+    """
+    try:
+        project_key = request.project_id
+        if not project_key:
+            raise HTTPException(status_code=400, detail="Missing project key. Please provide a valid JIRA project key.")
+        
+        snapshot_key = project_snapshot_key(request, project_key)
+        snapshot = project_snapshots.get(snapshot_key)
+        
+        if snapshot is None or not request.sync_token or request.sync_token != snapshot.token:
+            snapshot = await build_project_snapshot(request, project_key)
+            if not snapshot.nodes:
+                raise HTTPException(status_code=404, detail=f"No issues found for project {project_key}")
+            project_snapshots.put(snapshot_key, snapshot)
+            return response_encoder.response(http_request, {
+                "full": True,
+                "sync_token": snapshot.token,
+                "added_nodes": output_nodes(snapshot.nodes.values(), slim),
+                "changed_nodes": [],
+                "removed_nodes": [],
+                "added_edges": output_edges(snapshot.edges),
+                "removed_edges": []
+            })
+        
+        # JQL dates are interpreted in the JIRA user's time zone; a relative
+        # duration isn't, so ask for everything updated in the last N minutes
+        # (rounded up, plus a minute of clock-skew margin)
+        started_at = time.time()
+        minutes = math.ceil((started_at - snapshot.synced_at) / 60) + 1
+        jql = f"project = {project_key} AND updated >= -{minutes}m ORDER BY updated DESC"
+        previous_edges = snapshot.edges
+        snapshot = snapshot.copy()
+        
+        added_nodes = []
+        changed_nodes = []
+        async for page in iter_project_issue_pages(request, project_key, jql=jql):
+            for issue in page:
+                if not issue or "id" not in issue:
+                    continue
+                previous = snapshot.nodes.get(compact_id(issue.get("id")))
+                record = apply_issue_to_snapshot(snapshot, issue)
+                if previous is None:
+                    added_nodes.append(record)
+                elif previous != record:
+                    changed_nodes.append(record)
+        
+        removed_nodes = []
+        count = await search_issues_page(request, f"project = {project_key}", 0, 0, "id")
+        if count.get("total", len(snapshot.nodes)) != len(snapshot.nodes):
+            current_ids = set()
+            async for page in iter_project_issue_pages(request, project_key, fields="id"):
+                current_ids.update(compact_id(issue.get("id")) for issue in page if issue)
+            for issue_id in [issue_id for issue_id in snapshot.nodes if issue_id not in current_ids]:
+                record = snapshot.nodes.pop(issue_id)
+                snapshot.edge_references.pop(issue_id, None)
+                snapshot.key_to_id.pop(record.key, None)
+                removed_nodes.append(str(issue_id))
+        
+        snapshot.edges = resolve_project_edges(snapshot.key_to_id, snapshot.edge_references.values())
+        snapshot.new_token(started_at)
+        project_snapshots.put(snapshot_key, snapshot)
+        
+        return response_encoder.response(http_request, {
+            "full": False,
+            "sync_token": snapshot.token,
+            "added_nodes": output_nodes(added_nodes, slim),
+            "changed_nodes": output_nodes(changed_nodes, slim),
+            "removed_nodes": removed_nodes,
+            "added_edges": output_edges(edge_key for edge_key in snapshot.edges if edge_key not in previous_edges),
+            "removed_edges": output_edges(edge_key for edge_key in previous_edges if edge_key not in snapshot.edges)
+        })
+    
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(f"Error refreshing project: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing JIRA data: {str(e)}")
+
+def graph_store_tenant(credentials: JiraCredentials) -> str:
+    """Graph store rows are scoped to the JIRA site and user that synced them"""
+    return "|".join(issue_cache_key(credentials, "")[:2])
+
+def graph_store_covers(fields: List[str]) -> bool:
+    """Whether issues in the graph store (synced with the "graph" profile) have all these fields"""
+    return graph_store.enabled and set(fields) <= set(get_field_profile("graph"))
+
+def graph_store_record(issue):
+    parent = get_parent_reference(issue)
+    return (issue, parent["key"] if parent else None, get_link_edge_references(issue))
+
+async def sync_project_to_graph_store(credentials: JiraCredentials, project_key: str):
+    """
+    Bring one project's issues in the graph store up to date
+
+    The first sync reads the whole project; later ones only read issues
+    updated since the previous sync (see visualize_jira_project_delta), then
+    compare the issue count with JIRA and drop deleted or moved issues when it
+    doesn't match.
+    """
+    tenant = graph_store_tenant(credentials)
+    started_at = time.time()
+    synced_at = await graph_store.project_synced_at(tenant, project_key)
+    jql = None
+    if synced_at is not None:
+        minutes = math.ceil((started_at - synced_at) / 60) + 1
+        jql = f"project = {project_key} AND updated >= -{minutes}m ORDER BY updated DESC"
+    
+    updated = 0
+    async for page in iter_project_issue_pages(credentials, project_key, jql=jql):
+        records = [graph_store_record(issue) for issue in page if issue and "id" in issue]
+        await graph_store.put_issues(tenant, project_key, records)
+        updated += len(records)
+    
+    removed = 0
+    count = await search_issues_page(credentials, f"project = {project_key}", 0, 0, "id")
+    stored = await graph_store.count_issues(tenant, project_key)
+    if count.get("total", stored) != stored:
+        current_ids = set()
+        async for page in iter_project_issue_pages(credentials, project_key, fields="id"):
+            current_ids.update(issue.get("id") for issue in page if issue)
+        removed = await graph_store.retain_issues(tenant, project_key, current_ids)
+    
+    await graph_store.mark_synced(tenant, project_key, started_at)
+    return {"full": synced_at is None, "updated": updated, "removed": removed}
+
+def create_graph_sync_worker() -> Optional[GraphSyncWorker]:
+    """
+    Sync worker for GRAPH_STORE_PROJECTS (default: JIRA_PROJECT_ID) using the
+    default JIRA credentials from the environment; None when the store is off
+    """
+    projects = [project.strip().upper() for project in
+                os.getenv("GRAPH_STORE_PROJECTS", os.getenv("JIRA_PROJECT_ID", "")).split(",") if project.strip()]
+    if not graph_store.enabled or not projects:
+        return None
+    credentials = JiraCredentials(
+        username=os.getenv("JIRA_USERNAME", ""),
+        api_token=os.getenv("JIRA_API_TOKEN", ""),
+        base_url=os.getenv("JIRA_BASE_URL", ""),
+        project_id="",
+        central_jira_id=""
+    )
+    if not credentials.base_url:
+        print("Graph store sync disabled: JIRA_BASE_URL is not set")
+        return None
+    return GraphSyncWorker(
+        projects,
+        float(os.getenv("GRAPH_STORE_SYNC_INTERVAL", 300)),
+        lambda project_key: sync_project_to_graph_store(credentials, project_key)
+    )
+
+graph_sync_worker = create_graph_sync_worker()
+graph_sync_lock = LeaderLock(os.getenv("GRAPH_SYNC_LOCK_PATH", os.path.join("cache", "graph_sync.lock")))
+
+@app.get("/api/jira/graph-store-stats")
+async def get_graph_store_stats():
+    """Graph store lookups and the state of each synced project"""
+    return {
+        **graph_store.stats(),
+        "projects": graph_sync_worker.status if graph_sync_worker is not None else {}
+    }
         
 @app.post("/api/jira/test-connection")
 async def test_connection(credentials: JiraCredentials):
     """Test JIRA API connection with provided credentials"""
     try:
-        headers = get_auth_header(credentials)
-        async with httpx.AsyncClient() as client:
-            url = f"{credentials.base_url}/rest/api/2/myself"
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            user_data = response.json()
-            return {
-                "success": True,
-                "message": f"Successfully connected to JIRA as {user_data.get('displayName', 'user')}",
-                "user": user_data
-            }
+        url = f"{credentials.base_url}/rest/api/2/myself"
+        response = await send_jira_request(credentials, "GET", url)
+        response.raise_for_status()
+        user_data = response.json()
+        return {
+            "success": True,
+            "message": f"Successfully connected to JIRA as {user_data.get('displayName', 'user')}",
+            "user": user_data
+        }
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 401:
             raise HTTPException(status_code=401, detail="Authentication failed. Check your JIRA credentials.")
@@ -634,11 +1504,14 @@ class IssueDetailsRequest(BaseModel):
     issue_key: str
 
 @app.post("/api/jira/issue-details")
-async def get_issue_details(request: IssueDetailsRequest):
+async def get_issue_details(request: IssueDetailsRequest, http_request: Request, response: Response):
     """
     Fetch detailed information for a specific JIRA issue
     This endpoint provides comprehensive information including the full description 
     that can be used for LLM analysis or detailed display
+
+    The response carries an ETag over the returned fields; a request with a
+    matching If-None-Match gets a 304.
     """
     credentials = JiraCredentials(
         username=request.username,
@@ -652,9 +1525,15 @@ async def get_issue_details(request: IssueDetailsRequest):
         # Validate input
         if not issue_key:
             raise HTTPException(status_code=400, detail="Missing JIRA issue key")
+        
+        validator_key = ("details", *issue_cache_key(credentials, issue_key))
+        if_none_match = http_request.headers.get("if-none-match")
+        cached_response = await validated_not_modified(credentials, validator_key, if_none_match)
+        if cached_response is not None:
+            return cached_response
             
         # Fetch issue data
-        issue_data = await fetch_issue(credentials, issue_key)
+        issue_data = await fetch_issue(credentials, issue_key, "details")
         
         # Validate response
         if not issue_data or not isinstance(issue_data, dict):
@@ -689,6 +1568,12 @@ async def get_issue_details(request: IssueDetailsRequest):
             ]
         }
         
+        etag = make_etag(detailed_data)
+        remember_validator(credentials, validator_key, etag, [issue_key])
+        if etag_matches(if_none_match, etag):
+            response_validators.rebuilt_not_modified += 1
+            return not_modified(etag)
+        response.headers["ETag"] = etag
         return detailed_data
     
     except HTTPException as e:
@@ -696,6 +1581,51 @@ async def get_issue_details(request: IssueDetailsRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing JIRA data: {str(e)}")
 
+class IssueDescriptionsRequest(BaseModel):
+    username: str
+    api_token: str
+    base_url: str
+    project_id: str = ""
+    issue_keys: List[str]
+
+ISSUE_DESCRIPTIONS_MAX_KEYS = int(os.getenv("ISSUE_DESCRIPTIONS_MAX_KEYS", 200))
+
+@app.post("/api/jira/issue-descriptions")
+async def get_issue_descriptions(request: IssueDescriptionsRequest):
+    """
+    Fetch the full descriptions of several issues at once
+
+    Companion to the slim graph nodes: returns {"descriptions": {key: text},
+    "missing": [keys]}, served from the issue cache where possible and
+    otherwise fetched with one batched search.
+    """
+    credentials = JiraCredentials(
+        username=request.username,
+        api_token=request.api_token,
+        base_url=request.base_url,
+        project_id=request.project_id,
+        central_jira_id=""
+    )
+    issue_keys = list(dict.fromkeys(key.strip() for key in request.issue_keys if key and key.strip()))
+    if not issue_keys:
+        raise HTTPException(status_code=400, detail="Missing JIRA issue keys")
+    if len(issue_keys) > ISSUE_DESCRIPTIONS_MAX_KEYS:
+        raise HTTPException(status_code=400, detail=f"At most {ISSUE_DESCRIPTIONS_MAX_KEYS} issue keys per request")
+    
+    try:
+        issues = await fetch_issues_by_keys(credentials, issue_keys, "description")
+        return {
+            "descriptions": {
+                issue_key: (issues[issue_key].get("fields") or {}).get("description") or ""
+                for issue_key in issue_keys if issues.get(issue_key)
+            },
+            "missing": [issue_key for issue_key in issue_keys if not issues.get(issue_key)]
+        }
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing JIRA data: {str(e)}")
+
 class StructuredData(BaseModel):
     acceptance_criteria: Optional[str] = None
     requirements: Optional[str] = None
@@ -710,9 +1640,15 @@ class IssueForTestCase(BaseModel):
     status: str
     description: str
     structured_data: Optional[StructuredData] = None
+    base_url: Optional[str] = None  # JIRA site of the issue; scopes test case cache invalidation
 
 class TestCaseRequest(BaseModel):
     issueData: IssueForTestCase
+    bypass_cache: bool = False  # Regenerate even if a cached test case exists
+
+class BatchTestCaseRequest(BaseModel):
+    issues: List[IssueForTestCase]
+    bypass_cache: bool = False
 
 class TestStep(BaseModel):
     step: str
@@ -750,12 +1686,7 @@ class TestCase(BaseModel):
         }
     }
 
-@app.post("/api/jira/generate-test-case")
-async def generate_test_case(request: TestCaseRequest):
-    """Generate a test case in XRay format using Ollama LLM"""
-    try:
-        # Construct prompt for Ollama
-        system_prompt = """You are an expert test case generator for XRay test management within JIRA.
+TEST_CASE_SYSTEM_PROMPT = """You are an expert test case generator for XRay test management within JIRA.
         Given a JIRA issue (which could be a user story, bug, or requirement), generate a comprehensive test case in XRay format.
         
         Follow these guidelines to create a high-quality test case:
@@ -814,200 +1745,443 @@ async def generate_test_case(request: TestCaseRequest):
         
         Respond ONLY with valid JSON. Do not include any additional text, markdown code blocks, or explanation.
         """
+
+# Model and generation options sent to Ollama for test case generation
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "deepseek-r1:8b")
+OLLAMA_GENERATION_OPTIONS = {
+    "temperature": 0.7,
+    "format": "json"  # Request JSON format
+}
+
+def get_ollama_api_base():
+    """Get the Ollama API base URL from environment variables or use default"""
+    ollama_api_base = os.getenv("OLLAMA_API_BASE", "http://localhost:11434")
+    # Use localhost when running locally, or host.docker.internal when in Docker
+    if ollama_api_base == "http://localhost:11434" and os.environ.get("DOCKER_CONTAINER", "false") == "true":
+        ollama_api_base = "http://host.docker.internal:11434"
+    return ollama_api_base
+
+def build_test_case_prompt(issue_data):
+    """Build the user prompt for a JIRA issue (a dict of IssueForTestCase fields)"""
+    # Create user prompt with structured data if available
+    structured_data = issue_data.get('structured_data', {})
+    
+    # Start with basic issue information
+    prompt_parts = [
+        f"Please generate a test case in XRay format for the following JIRA issue:",
+        f"",
+        f"Issue Key: {issue_data['key']}",
+        f"Summary: {issue_data['summary']}",
+        f"Issue Type: {issue_data['issue_type']}",
+        f"Status: {issue_data['status']}",
+    ]
+    
+    # Add structured sections if available
+    if structured_data:
+        if structured_data.get('acceptance_criteria'):
+            prompt_parts.extend([
+                f"",
+                f"Acceptance Criteria:",
+                f"{structured_data.get('acceptance_criteria')}"
+            ])
         
-        # Get issue data
-        issue_data = request.issueData.dict()
+        if structured_data.get('requirements'):
+            prompt_parts.extend([
+                f"",
+                f"Requirements:",
+                f"{structured_data.get('requirements')}"
+            ])
+        
+        if structured_data.get('steps_to_reproduce'):
+            prompt_parts.extend([
+                f"",
+                f"Steps to Reproduce:",
+                f"{structured_data.get('steps_to_reproduce')}"
+            ])
         
-        # Create user prompt with structured data if available
-        structured_data = issue_data.get('structured_data', {})
-        
-        # Start with basic issue information
-        prompt_parts = [
-            f"Please generate a test case in XRay format for the following JIRA issue:",
-            f"",
-            f"Issue Key: {issue_data['key']}",
-            f"Summary: {issue_data['summary']}",
-            f"Issue Type: {issue_data['issue_type']}",
-            f"Status: {issue_data['status']}",
+        if structured_data.get('expected_behavior'):
+            prompt_parts.extend([
+                f"",
+                f"Expected Behavior:",
+                f"{structured_data.get('expected_behavior')}"
+            ])
+        
+        if structured_data.get('actual_behavior'):
+            prompt_parts.extend([
+                f"",
+                f"Actual Behavior:",
+                f"{structured_data.get('actual_behavior')}"
+            ])
+    
+    # Add the full description at the end
+    prompt_parts.extend([
+        f"",
+        f"Full Description:",
+        f"{issue_data['description']}",
+        f"",
+        f"Generate a comprehensive test case with at least 3-5 test steps."
+    ])
+    
+    # Join all parts to create the complete prompt
+    user_prompt = "\n".join(prompt_parts)
+    return user_prompt
+
+def build_fallback_test_case(issue_data):
+    """Static test case returned when the LLM can't produce one"""
+    return TestCase(
+        summary=f"Test Case for {issue_data['key']}: {issue_data['summary']}",
+        description=f"This test verifies the functionality described in {issue_data['key']}",
+        precondition="User is logged in to the system with appropriate permissions",
+        type="Functional",
+        priority="Medium",
+        related_issue=issue_data['key'],
+        steps=[
+            TestStep(
+                step="Navigate to the relevant page/module",
+                expected="Page loads successfully with all required elements"
+            ),
+            TestStep(
+                step="Perform the main action described in the issue",
+                expected="System processes the action correctly"
+            ),
+            TestStep(
+                step="Verify the results",
+                expected="Results match the expected outcome as described in the issue requirements"
+            ),
+            TestStep(
+                step="Test edge cases and error scenarios",
+                expected="System handles edge cases gracefully with appropriate error messages"
+            )
         ]
+    )
+
+@app.get("/api/jira/test-case-cache-stats")
+async def get_test_case_cache_stats():
+    """Hit/miss counters of the persistent test case cache"""
+    return test_case_cache.stats()
+
+def record_ollama_generation(generation: Dict[str, Any], mode: str):
+    """Record token counts and speed from the eval_count/eval_duration (ns) Ollama reports"""
+    eval_count = generation.get("eval_count")
+    eval_duration = generation.get("eval_duration")
+    if eval_count:
+        OLLAMA_GENERATED_TOKENS.inc(eval_count, mode=mode)
+        if eval_duration:
+            OLLAMA_TOKENS_PER_SECOND.observe(eval_count / (eval_duration / 1e9), mode=mode)
+
+def parse_test_case_response(response_text: str, issue_key: str) -> TestCase:
+    """
+    Parse and validate the test case JSON produced by the LLM
+
+    Raises json.JSONDecodeError when no JSON can be found in the response.
+    """
+    # Clean up the response to handle various formats
+    # First try to parse as-is (direct JSON)
+    try:
+        test_case_data = json.loads(response_text)
+    except json.JSONDecodeError:
+        # If direct parsing fails, try to extract JSON from markdown
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0].strip()
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0].strip()
         
-        # Add structured sections if available
-        if structured_data:
-            if structured_data.get('acceptance_criteria'):
-                prompt_parts.extend([
-                    f"",
-                    f"Acceptance Criteria:",
-                    f"{structured_data.get('acceptance_criteria')}"
-                ])
-            
-            if structured_data.get('requirements'):
-                prompt_parts.extend([
-                    f"",
-                    f"Requirements:",
-                    f"{structured_data.get('requirements')}"
-                ])
-            
-            if structured_data.get('steps_to_reproduce'):
-                prompt_parts.extend([
-                    f"",
-                    f"Steps to Reproduce:",
-                    f"{structured_data.get('steps_to_reproduce')}"
-                ])
-            
-            if structured_data.get('expected_behavior'):
-                prompt_parts.extend([
-                    f"",
-                    f"Expected Behavior:",
-                    f"{structured_data.get('expected_behavior')}"
-                ])
-            
-            if structured_data.get('actual_behavior'):
-                prompt_parts.extend([
-                    f"",
-                    f"Actual Behavior:",
-                    f"{structured_data.get('actual_behavior')}"
-                ])
-        
-        # Add the full description at the end
-        prompt_parts.extend([
-            f"",
-            f"Full Description:",
-            f"{issue_data['description']}",
-            f"",
-            f"Generate a comprehensive test case with at least 3-5 test steps."
-        ])
-        
-        # Join all parts to create the complete prompt
-        user_prompt = "\n".join(prompt_parts)
-        
-        # First attempt - try with deepseek-r1:8b model
-        try:
-            # Get the Ollama API base URL from environment variables or use default
-            ollama_api_base = os.getenv("OLLAMA_API_BASE", "http://localhost:11434")
-            # Use localhost when running locally, or host.docker.internal when in Docker
-            if ollama_api_base == "http://localhost:11434" and os.environ.get("DOCKER_CONTAINER", "false") == "true":
-                ollama_api_base = "http://host.docker.internal:11434"
-                
-            ollama_endpoint = f"{ollama_api_base}/api/generate"
-            print(f"Connecting to Ollama at: {ollama_endpoint}")
-            
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
+        # Try parsing again
+        test_case_data = json.loads(response_text)
+    
+    # Add the related issue
+    test_case_data["related_issue"] = issue_key
+    
+    # Convert to our model and validate
+    return TestCase(**test_case_data)
+
+@app.get("/api/jira/llm-scheduler-stats")
+async def get_llm_scheduler_stats():
+    """Queue depth, wait times, rejections and coalesced requests of the LLM scheduler"""
+    return llm_scheduler.stats()
+
+def llm_busy_exception(error: LLMSchedulerBusy) -> HTTPException:
+    return HTTPException(status_code=503, detail=f"Ollama LLM service is busy: {error.reason}",
+                         headers={"Retry-After": str(error.retry_after)})
+
+async def generate_test_case_for_issue(issue_data, bypass_cache: bool = False, priority: str = "interactive"):
+    """
+    Generate (or load from cache) the test case for one issue
+
+    Generations go through the LLM scheduler: identical prompts in flight share
+    one generation, and LLMSchedulerBusy is raised when the request is not
+    admitted (it is not turned into a fallback test case).
+
+    Args:
+        issue_data: Dictionary of IssueForTestCase fields
+        bypass_cache: Skip the cache lookup (the new result is still stored)
+        priority: LLM scheduler priority class, "interactive" or "batch"
+        
+    Returns:
+        Dictionary with the "test_case", its "source" ("cache", "llm" or
+        "fallback"), the "cache" status ("hit", "miss" or "bypass") and the
+        "error" that caused a fallback, if any
+    """
+    # Construct prompt for Ollama
+    system_prompt = TEST_CASE_SYSTEM_PROMPT
+    user_prompt = build_test_case_prompt(issue_data)
+    
+    cache_key = test_case_cache.make_key(OLLAMA_MODEL, system_prompt, user_prompt, OLLAMA_GENERATION_OPTIONS)
+    if bypass_cache:
+        cache_status = "bypass"
+    else:
+        lookup_started_at = time.perf_counter()
+        cached_test_case = await test_case_cache.get(cache_key)
+        trace_call("lookup", "test_case_cache", lookup_started_at, cache="miss" if cached_test_case is None else "hit")
+        if cached_test_case is not None:
+            TEST_CASE_RESULTS.inc(source="cache")
+            return {"test_case": cached_test_case, "source": "cache", "cache": "hit", "error": None}
+        cache_status = "miss"
+    
+    # First attempt - try with deepseek-r1:8b model
+    try:
+        ollama_api_base = get_ollama_api_base()
+        ollama_endpoint = f"{ollama_api_base}/api/generate"
+        print(f"Connecting to Ollama at: {ollama_endpoint}")
+        
+        client = http_clients.ollama(ollama_api_base)
+        
+        async def request_generation():
+            generation_started_at = time.perf_counter()
+            with OLLAMA_GENERATION_DURATION.time(mode="blocking"):
+                ollama_response = await client.post(
                     ollama_endpoint,
                     json={
-                        "model": "deepseek-r1:8b",
+                        "model": OLLAMA_MODEL,
                         "prompt": user_prompt,
                         "system": system_prompt,
                         "stream": False,
-                        "temperature": 0.7,
-                        "format": "json"  # Request JSON format
+                        **OLLAMA_GENERATION_OPTIONS
                     }
                 )
-                
-                if response.status_code != 200:
-                    raise HTTPException(status_code=response.status_code, 
-                                      detail=f"Ollama API error: {response.text}")
-                
-                result = response.json()
-        
-        except Exception as e:
-            # If first model fails, provide a fallback test case directly
-            print(f"Error with primary model, using fallback: {str(e)}")
-            
-            # Create a fallback test case
-            test_case = TestCase(
-                summary=f"Test Case for {issue_data['key']}: {issue_data['summary']}",
-                description=f"This test verifies the functionality described in {issue_data['key']}",
-                precondition="User is logged in to the system with appropriate permissions",
-                type="Functional",
-                priority="Medium",
-                related_issue=issue_data['key'],
-                steps=[
-                    TestStep(
-                        step="Navigate to the relevant page/module",
-                        expected="Page loads successfully with all required elements"
-                    ),
-                    TestStep(
-                        step="Perform the main action described in the issue",
-                        expected="System processes the action correctly"
-                    ),
-                    TestStep(
-                        step="Verify the results",
-                        expected="Results match the expected outcome as described in the issue requirements"
-                    ),
-                    TestStep(
-                        step="Test edge cases and error scenarios",
-                        expected="System handles edge cases gracefully with appropriate error messages"
-                    )
-                ]
-            )
-            
-            return test_case.dict()
-            
-        # Process the LLM response
-        try:
-            response_text = result.get("response", "")
-            
-            # Clean up the response to handle various formats
-            # First try to parse as-is (direct JSON)
-            try:
-                test_case_data = json.loads(response_text)
-            except json.JSONDecodeError:
-                # If direct parsing fails, try to extract JSON from markdown
-                if "```json" in response_text:
-                    response_text = response_text.split("```json")[1].split("```")[0].strip()
-                elif "```" in response_text:
-                    response_text = response_text.split("```")[1].split("```")[0].strip()
-                
-                # Try parsing again
-                test_case_data = json.loads(response_text)
-            
-            # Add the related issue
-            test_case_data["related_issue"] = issue_data["key"]
             
-            # Convert to our model and validate
-            test_case = TestCase(**test_case_data)
+            if ollama_response.status_code != 200:
+                raise HTTPException(status_code=ollama_response.status_code, 
+                                  detail=f"Ollama API error: {ollama_response.text}")
             
-            # Return the validated test case
-            return test_case.dict()
-        except json.JSONDecodeError as e:
-            # If JSON parsing fails, create a fallback test case
-            print(f"Failed to parse LLM response as JSON: {str(e)}")
-            print(f"LLM Response: {response_text}")
-            
-            # Create a fallback test case
-            test_case = TestCase(
-                summary=f"Test Case for {issue_data['key']}: {issue_data['summary']}",
-                description=f"This test verifies the functionality described in {issue_data['key']}",
-                precondition="User is logged in to the system with appropriate permissions",
-                type="Functional",
-                priority="Medium",
-                related_issue=issue_data['key'],
-                steps=[
-                    TestStep(
-                        step="Navigate to the relevant page/module",
-                        expected="Page loads successfully with all required elements"
-                    ),
-                    TestStep(
-                        step="Perform the main action described in the issue",
-                        expected="System processes the action correctly"
-                    ),
-                    TestStep(
-                        step="Verify the results",
-                        expected="Results match the expected outcome as described in the issue requirements"
-                    ),
-                    TestStep(
-                        step="Test edge cases and error scenarios",
-                        expected="System handles edge cases gracefully with appropriate error messages"
-                    )
-                ]
-            )
-            
-            return test_case.dict()
+            generation = ollama_response.json()
+            record_ollama_generation(generation, "blocking")
+            trace_call("ollama", "/api/generate", generation_started_at, status=ollama_response.status_code,
+                       bytes=len(ollama_response.content), tokens=generation.get("eval_count"))
+            return generation
+        
+        result = await llm_scheduler.run(cache_key, request_generation, priority)
+    
+    except LLMSchedulerBusy:
+        raise
+    except Exception as e:
+        # If first model fails, provide a fallback test case directly
+        print(f"Error with primary model, using fallback: {str(e)}")
+        TEST_CASE_FALLBACKS.inc(reason="ollama_error")
+        TEST_CASE_RESULTS.inc(source="fallback")
+        
+        # Create a fallback test case
+        test_case = build_fallback_test_case(issue_data)
+        
+        return {"test_case": test_case.dict(), "source": "fallback", "cache": cache_status, "error": str(e)}
+        
+    # Process the LLM response
+    try:
+        response_text = result.get("response", "")
+        test_case = parse_test_case_response(response_text, issue_data["key"])
+        
+        # Return the validated test case
+        test_case_dict = test_case.dict()
+        await test_case_cache.put(cache_key, test_case_cache.make_scope(issue_data.get("base_url")), issue_data["key"],
+                                  test_case_cache.content_hash(user_prompt), test_case_dict)
+        TEST_CASE_RESULTS.inc(source="llm")
+        return {"test_case": test_case_dict, "source": "llm", "cache": cache_status, "error": None}
+    except json.JSONDecodeError as e:
+        # If JSON parsing fails, create a fallback test case
+        print(f"Failed to parse LLM response as JSON: {str(e)}")
+        print(f"LLM Response: {response_text}")
+        TEST_CASE_FALLBACKS.inc(reason="invalid_json")
+        TEST_CASE_RESULTS.inc(source="fallback")
+        
+        # Create a fallback test case
+        test_case = build_fallback_test_case(issue_data)
+        
+        return {"test_case": test_case.dict(), "source": "fallback", "cache": cache_status,
+                "error": f"Failed to parse LLM response as JSON: {str(e)}"}
+
+@app.post("/api/jira/generate-test-case")
+async def generate_test_case(request: TestCaseRequest, response: Response):
+    """
+    Generate a test case in XRay format using Ollama LLM
+
+    Successful generations are kept in the persistent test case cache, keyed by
+    the model, prompts and options; set bypass_cache to regenerate. The
+    X-Test-Case-Cache response header reports hit, miss or bypass.
+    """
+    try:
+        # Get issue data
+        issue_data = request.issueData.dict()
+        
+        result = await generate_test_case_for_issue(issue_data, request.bypass_cache)
+        response.headers["X-Test-Case-Cache"] = result["cache"]
+        return result["test_case"]
             
+    except LLMSchedulerBusy as e:
+        raise llm_busy_exception(e)
     except httpx.RequestError as e:
         raise HTTPException(status_code=500, 
                            detail=f"Error connecting to Ollama LLM service: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, 
                            detail=f"Unexpected error generating test case: {str(e)}")
+
+async def stream_cached_test_case(cached_test_case):
+    """Replay a cached test case as the step events and final event of a generation stream"""
+    for index, step in enumerate(cached_test_case.get("steps", [])):
+        yield format_stream_record({"type": "step", "index": index, "step": step}, True)
+    TEST_CASE_RESULTS.inc(source="cache")
+    yield format_stream_record({"type": "test_case", "test_case": cached_test_case, "source": "cache", "error": None}, True)
+
+async def stream_test_case_generation(issue_data, user_prompt: str, cache_key: str, slot):
+    """
+    Generate a test case with Ollama streaming and yield server-sent events
+
+    The LLM scheduler slot is acquired by the caller and released here when
+    the generation ends.
+
+    Events:
+        token: {"text": ...} for every chunk of generated text
+        step: {"index": n, "step": {...}} as soon as a test step's JSON object is complete
+        test_case: {"test_case": {...}, "source": "llm"|"fallback", "error": ...}, always last
+    """
+    system_prompt = TEST_CASE_SYSTEM_PROMPT
+    response_parts = []
+    step_parser = IncrementalArrayParser("steps")
+    step_count = 0
+    try:
+        ollama_api_base = get_ollama_api_base()
+        ollama_endpoint = f"{ollama_api_base}/api/generate"
+        print(f"Streaming from Ollama at: {ollama_endpoint}")
+        
+        client = http_clients.ollama(ollama_api_base)
+        started_at = time.perf_counter()
+        async with slot:
+            async with client.stream(
+                "POST",
+                ollama_endpoint,
+                json={
+                    "model": OLLAMA_MODEL,
+                    "prompt": user_prompt,
+                    "system": system_prompt,
+                    "stream": True,
+                    **OLLAMA_GENERATION_OPTIONS
+                }
+            ) as ollama_response:
+                if ollama_response.status_code != 200:
+                    error_text = (await ollama_response.aread()).decode("utf-8", "replace")
+                    raise HTTPException(status_code=ollama_response.status_code, detail=f"Ollama API error: {error_text}")
+                
+                async for line in ollama_response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise HTTPException(status_code=500, detail=f"Ollama API error: {chunk['error']}")
+                    text = chunk.get("response", "")
+                    if text:
+                        response_parts.append(text)
+                        yield format_stream_record({"type": "token", "text": text}, True)
+                        for step in step_parser.feed(text):
+                            yield format_stream_record({"type": "step", "index": step_count, "step": step}, True)
+                            step_count += 1
+                    if chunk.get("done"):
+                        OLLAMA_GENERATION_DURATION.observe(time.perf_counter() - started_at, mode="stream")
+                        record_ollama_generation(chunk, "stream")
+                        trace_call("ollama", "/api/generate", started_at, status=ollama_response.status_code,
+                                   bytes=sum(len(part) for part in response_parts), tokens=chunk.get("eval_count"))
+                        break
+        
+        test_case = parse_test_case_response("".join(response_parts), issue_data["key"])
+        test_case_dict = test_case.dict()
+        await test_case_cache.put(cache_key, test_case_cache.make_scope(issue_data.get("base_url")), issue_data["key"],
+                                  test_case_cache.content_hash(user_prompt), test_case_dict)
+        TEST_CASE_RESULTS.inc(source="llm")
+        yield format_stream_record({"type": "test_case", "test_case": test_case_dict, "source": "llm", "error": None}, True)
+    except Exception as e:
+        print(f"Error streaming test case, using fallback: {str(e)}")
+        TEST_CASE_FALLBACKS.inc(reason="stream_error")
+        TEST_CASE_RESULTS.inc(source="fallback")
+        test_case = build_fallback_test_case(issue_data)
+        yield format_stream_record({"type": "test_case", "test_case": test_case.dict(), "source": "fallback", "error": str(e)}, True)
+
+@app.post("/api/jira/generate-test-case/stream")
+async def generate_test_case_stream(request: TestCaseRequest):
+    """
+    Generate a test case and stream the LLM output as server-sent events
+
+    Tokens are relayed as they are generated, each test step is sent once its
+    JSON object is complete, and the validated test case (or the fallback)
+    ends the stream. Responds 503 with Retry-After when the LLM scheduler does
+    not admit the request.
+    """
+    issue_data = request.issueData.dict()
+    user_prompt = build_test_case_prompt(issue_data)
+    cache_key = test_case_cache.make_key(OLLAMA_MODEL, TEST_CASE_SYSTEM_PROMPT, user_prompt, OLLAMA_GENERATION_OPTIONS)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    
+    if not request.bypass_cache:
+        cached_test_case = await test_case_cache.get(cache_key)
+        if cached_test_case is not None:
+            return StreamingResponse(stream_cached_test_case(cached_test_case),
+                                     media_type="text/event-stream", headers=headers)
+    
+    try:
+        slot = await llm_scheduler.acquire("interactive")
+    except LLMSchedulerBusy as e:
+        raise llm_busy_exception(e)
+    
+    # The background task frees the slot even if the client disconnects
+    # before the stream starts
+    return StreamingResponse(
+        stream_test_case_generation(issue_data, user_prompt, cache_key, slot),
+        media_type="text/event-stream",
+        headers=headers,
+        background=BackgroundTask(slot.release)
+    )
+
+# Maximum number of issues accepted by one batch test case job
+TEST_CASE_JOB_MAX_ITEMS = int(os.getenv("TEST_CASE_JOB_MAX_ITEMS", 200))
+
+@app.post("/api/jira/generate-test-cases", status_code=202)
+async def create_test_case_job(request: BatchTestCaseRequest):
+    """
+    Start generating test cases for many issues in the background
+
+    Returns a job id right away; poll /api/jira/generate-test-cases/{job_id}
+    for progress, partial results and per-item errors.
+    """
+    if not request.issues:
+        raise HTTPException(status_code=400, detail="No issues provided")
+    if len(request.issues) > TEST_CASE_JOB_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A job can contain at most {TEST_CASE_JOB_MAX_ITEMS} issues")
+    
+    job = test_case_jobs.submit([issue.dict() for issue in request.issues],
+                                functools.partial(generate_test_case_for_issue, priority="batch"),
+                                request.bypass_cache)
+    return job.to_dict(include_results=False)
+
+@app.get("/api/jira/generate-test-cases/{job_id}")
+async def get_test_case_job(job_id: str, include_results: bool = True):
+    """Progress of a batch test case job, with the results generated so far"""
+    job = await test_case_jobs.get_state(job_id, include_results)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Test case job {job_id} not found")
+    return job
+
+@app.delete("/api/jira/generate-test-cases/{job_id}")
+async def cancel_test_case_job(job_id: str):
+    """Cancel a running batch test case job; finished items are kept"""
+    job = await test_case_jobs.cancel_state(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Test case job {job_id} not found")
+    return job
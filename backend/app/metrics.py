@@ -0,0 +1,252 @@
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; covers fast cache-served routes up to slow LLM generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels):
+        """Mirror a total counted elsewhere (e.g. a cache's own hit counter)"""
+        self._values[self._key(labels)] = value
+
+    def _samples(self):
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * len(self.buckets)
+            self._sums[key] = 0.0
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        self._sums[key] += value
+
+    def time(self, **labels) -> "_Timer":
+        return _Timer(self, labels)
+
+    def _samples(self):
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(self._sums[key])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram.observe(time.perf_counter() - self._started_at, **self._labels)
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus text exposition (format 0.0.4) without extra dependencies
+
+    Collectors registered with `on_collect` run before each scrape, for values
+    that are read from other components (cache counters, queue depths).
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def on_collect(self, collector: Callable[[], None]):
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Metrics collector failed: {str(e)}")
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, count and in-flight requests per route
+
+    The route label is the path template of the matched route (e.g.
+    /api/jira/generate-test-cases/{job_id}), so ids don't multiply the series.
+    Latency runs until the last body chunk is sent, so streamed responses are
+    measured in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Dict[object, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        method = scope.get("method", "")
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started_at
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = self._route_path(scope)
+            HTTP_REQUESTS.inc(method=method, route=route, status=status["code"])
+            HTTP_REQUEST_DURATION.observe(duration, method=method, route=route)
+
+    def _route_path(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            path = next((route.path for route in getattr(scope.get("app"), "routes", [])
+                         if getattr(route, "endpoint", None) is endpoint), "unmatched")
+            self._route_paths[endpoint] = path
+        return path
+
+
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.register(Counter(
+    "http_requests_total", "HTTP requests handled, by route and status", ("method", "route", "status")))
+HTTP_REQUEST_DURATION = metrics.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response is fully sent", ("method", "route")))
+HTTP_REQUESTS_IN_FLIGHT = metrics.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being handled"))
+
+JIRA_REQUESTS = metrics.register(Counter(
+    "jira_requests_total", "JIRA API calls, by endpoint and status (error = no response)", ("endpoint", "status")))
+JIRA_REQUEST_DURATION = metrics.register(Histogram(
+    "jira_request_duration_seconds", "JIRA API call latency", ("endpoint",)))
+JIRA_REQUESTS_IN_FLIGHT = metrics.register(Gauge(
+    "jira_requests_in_flight", "JIRA API calls on the wire"))
+
+OLLAMA_GENERATION_DURATION = metrics.register(Histogram(
+    "ollama_generation_duration_seconds", "Ollama generation latency", ("mode",)))
+OLLAMA_TOKENS_PER_SECOND = metrics.register(Histogram(
+    "ollama_tokens_per_second", "Ollama generation speed reported by eval_count / eval_duration", ("mode",),
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200)))
+OLLAMA_GENERATED_TOKENS = metrics.register(Counter(
+    "ollama_generated_tokens_total", "Tokens generated by Ollama", ("mode",)))
+TEST_CASE_RESULTS = metrics.register(Counter(
+    "test_case_results_total", "Generated test cases by source (cache, llm, fallback)", ("source",)))
+TEST_CASE_FALLBACKS = metrics.register(Counter(
+    "test_case_fallbacks_total", "Fallback test cases, by the failure that caused them", ("reason",)))
+
+CACHE_HITS = metrics.register(Counter("cache_hits_total", "Cache hits", ("cache",)))
+CACHE_MISSES = metrics.register(Counter("cache_misses_total", "Cache misses", ("cache",)))
+CACHE_HIT_RATIO = metrics.register(Gauge("cache_hit_ratio", "Cache hits / lookups since start", ("cache",)))
+
+LLM_QUEUE_DEPTH = metrics.register(Gauge(
+    "llm_queue_depth", "Generations waiting for an Ollama slot, by priority", ("priority",)))
+LLM_GENERATIONS_IN_FLIGHT = metrics.register(Gauge(
+    "llm_generations_in_flight", "Generations running in Ollama"))
+JIRA_FETCHES_SHARED = metrics.register(Counter(
+    "jira_fetches_shared_total", "Issue fetches answered by another request's in-flight call"))
+
+RESPONSE_ENCODE_DURATION = metrics.register(Histogram(
+    "response_encode_duration_seconds", "Time to serialize and compress graph responses", ("format", "encoding"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)))
+RESPONSE_SIZE = metrics.register(Histogram(
+    "response_size_bytes", "Encoded size of graph responses", ("format", "encoding"),
+    buckets=(1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7)))
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import secrets
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.issue_records import EdgeReference, IssueId, IssueRecord
+
+
+class ProjectSnapshot:
+    """
+    Server-side copy of the last project graph sent to a client
+
+    Besides the nodes and edges it keeps the edge references each issue
+    contributed, so a changed issue's edges can be recomputed without
+    refetching the rest of the project. Nodes are compact IssueRecords and
+    edges are bare (source id, target id, label) keys; both are turned into
+    dicts only when a response is serialized.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[IssueId, IssueRecord] = {}  # issue id -> node
+        self.key_to_id: Dict[str, IssueId] = {}
+        self.edge_references: Dict[IssueId, List[EdgeReference]] = {}  # issue id -> references
+        self.edges: Dict[Tuple[IssueId, IssueId, str], None] = {}  # ordered set of (source, target, label)
+        self.synced_at = time.time()
+        self.token = secrets.token_urlsafe(16)
+
+    def copy(self) -> "ProjectSnapshot":
+        """
+        A copy to apply a refresh to; records and reference lists are
+        replaced rather than changed, so they are shared with this snapshot
+        """
+        snapshot = ProjectSnapshot()
+        snapshot.nodes = dict(self.nodes)
+        snapshot.key_to_id = dict(self.key_to_id)
+        snapshot.edge_references = dict(self.edge_references)
+        snapshot.edges = dict(self.edges)
+        snapshot.synced_at = self.synced_at
+        snapshot.token = self.token
+        return snapshot
+
+    def new_token(self, synced_at: float) -> str:
+        self.synced_at = synced_at
+        self.token = secrets.token_urlsafe(16)
+        return self.token
+
+
+class ProjectSnapshotStore:
+    """LRU store of project snapshots keyed by base URL, user and project"""
+
+    def __init__(self, max_entries: int = 10):
+        self.max_entries = max_entries
+        self._snapshots: "OrderedDict[Tuple[str, str, str], ProjectSnapshot]" = OrderedDict()
+
+    @staticmethod
+    def make_key(base_url: str, username: str, api_token: str, project_key: str) -> Tuple[str, str, str]:
+        token_hash = hashlib.sha256(api_token.encode("utf-8")).hexdigest()[:16]
+        return (base_url.rstrip("/"), f"{username}:{token_hash}", project_key.upper())
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[ProjectSnapshot]:
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            self._snapshots.move_to_end(key)
+        return snapshot
+
+    def put(self, key: Tuple[str, str, str], snapshot: ProjectSnapshot):
+        if self.max_entries <= 0:
+            return
+        self._snapshots[key] = snapshot
+        self._snapshots.move_to_end(key)
+        while len(self._snapshots) > self.max_entries:
+            self._snapshots.popitem(last=False)
+
+
+project_snapshots = ProjectSnapshotStore(max_entries=int(os.getenv("PROJECT_SNAPSHOT_MAX_ENTRIES", 10)))
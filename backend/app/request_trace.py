@@ -0,0 +1,206 @@
+import functools
+import os
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from app.shared_cache import SharedRecordStore, shared_records
+
+# Header that turns tracing on for one request, e.g. `X-Debug-Trace: 1`
+TRACE_HEADER = b"x-debug-trace"
+
+
+class RequestTrace:
+    """
+    Waterfall of the upstream calls and hot-path sections of one request
+
+    Calls are recorded with their start offset from the beginning of the
+    request, so concurrent calls show up as overlapping bars. Sections
+    (node processing, edge building) are summed per name; their totals are
+    inclusive of nested sections.
+    """
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.started_at = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.calls: List[Dict[str, Any]] = []
+        self.sections: Dict[str, Dict[str, float]] = {}
+
+    def offset_ms(self, moment: float) -> float:
+        return round((moment - self.started_at) * 1000, 3)
+
+    def add_call(self, kind: str, name: str, started_at: float, **details):
+        self.calls.append({
+            "kind": kind,
+            "name": name,
+            "start_ms": self.offset_ms(started_at),
+            "duration_ms": round((time.perf_counter() - started_at) * 1000, 3),
+            **details,
+        })
+
+    def add_section(self, name: str, seconds: float):
+        section = self.sections.setdefault(name, {"count": 0, "total_ms": 0.0})
+        section["count"] += 1
+        section["total_ms"] += seconds * 1000
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Call count, summed duration and bytes per kind of call"""
+        kinds: Dict[str, Dict[str, Any]] = {}
+        for call in self.calls:
+            kind = kinds.setdefault(call["kind"], {"count": 0, "total_ms": 0.0, "bytes": 0})
+            kind["count"] += 1
+            kind["total_ms"] += call["duration_ms"]
+            kind["bytes"] += call.get("bytes") or 0
+        return kinds
+
+    def server_timing(self) -> str:
+        """Server-Timing header value; only what happened before the response started"""
+        entries = []
+        for kind, totals in self.summary().items():
+            entries.append(f'{kind};dur={totals["total_ms"]:.1f};desc="{totals["count"]} calls"')
+        for name, section in self.sections.items():
+            entries.append(f'{name};dur={section["total_ms"]:.1f};desc="{section["count"]}x"')
+        entries.append(f"total;dur={(time.perf_counter() - self.started_at) * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "duration_ms": self.duration_ms,
+            "summary": {kind: {**totals, "total_ms": round(totals["total_ms"], 3)}
+                        for kind, totals in self.summary().items()},
+            "sections": {name: {"count": section["count"], "total_ms": round(section["total_ms"], 3)}
+                         for name, section in self.sections.items()},
+            "calls": sorted(self.calls, key=lambda call: call["start_ms"]),
+        }
+
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+
+
+def trace_call(kind: str, name: str, started_at: float, **details):
+    """Record a finished call (started at perf_counter() `started_at`) on the current trace, if any"""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add_call(kind, name, started_at, **details)
+
+
+@contextmanager
+def trace_section(name: str):
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_section(name, time.perf_counter() - started_at)
+
+
+def traced(name: str):
+    """Decorator adding a function's time to the current trace under `name`"""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            trace = current_trace.get()
+            if trace is None:
+                return function(*args, **kwargs)
+            started_at = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                trace.add_section(name, time.perf_counter() - started_at)
+        return wrapper
+    return decorate
+
+
+class TraceStore:
+    """
+    The most recent finished traces, kept for GET /api/debug/traces/{trace_id}
+
+    With several server workers finished traces are also written to the
+    `shared` record store, so any worker can answer for them.
+    """
+
+    def __init__(self, max_entries: int = 50, shared: Optional[SharedRecordStore] = None):
+        self.max_entries = max_entries
+        self.shared = shared if shared is not None and shared.enabled else None
+        self._traces: "OrderedDict[str, RequestTrace]" = OrderedDict()
+
+    def put(self, trace: RequestTrace):
+        self._traces[trace.id] = trace
+        while len(self._traces) > self.max_entries:
+            self._traces.popitem(last=False)
+        if self.shared is not None:
+            self.shared.enqueue("trace", trace.id, trace.to_dict())
+
+    def get(self, trace_id: str) -> Optional[RequestTrace]:
+        return self._traces.get(trace_id)
+
+    async def get_dict(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """A trace's to_dict(), also for traces recorded by another worker"""
+        trace = self._traces.get(trace_id)
+        if trace is not None:
+            return trace.to_dict()
+        if self.shared is None:
+            return None
+        return await self.shared.get("trace", trace_id)
+
+
+class RequestTraceMiddleware:
+    """
+    Trace requests that carry the X-Debug-Trace header
+
+    The response gets a Server-Timing header summarising the upstream calls
+    and sections so far, and an X-Trace-Id header naming the full JSON trace,
+    which is complete once the response has been sent (streamed responses
+    included).
+    """
+
+    def __init__(self, app, store: "TraceStore", enabled: bool = True):
+        self.app = app
+        self.store = store
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(scope.get("method", ""), scope.get("path", ""))
+        token = current_trace.set(trace)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                headers.append((b"x-trace-id", trace.id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_trace.reset(token)
+            trace.duration_ms = trace.offset_ms(time.perf_counter())
+            self.store.put(trace)
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        for name, value in scope.get("headers", []):
+            if name == TRACE_HEADER:
+                return value.strip().lower() not in (b"", b"0", b"false")
+        return False
+
+
+trace_store = TraceStore(max_entries=int(os.getenv("REQUEST_TRACE_MAX_ENTRIES", 50)), shared=shared_records)
+REQUEST_TRACE_ENABLED = os.getenv("REQUEST_TRACE_ENABLED", "true").lower() == "true"
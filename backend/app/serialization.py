@@ -0,0 +1,131 @@
+import gzip
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.metrics import RESPONSE_ENCODE_DURATION, RESPONSE_SIZE
+from app.request_trace import trace_section
+
+# Optional fast/compact encoders; without them responses fall back to stdlib JSON and gzip
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+def _parse_quality_list(header: str) -> Dict[str, float]:
+    """{"value": q} from an Accept or Accept-Encoding header"""
+    qualities = {}
+    for part in header.split(","):
+        value, *params = [item.strip() for item in part.split(";")]
+        if not value:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        qualities[value.lower()] = quality
+    return qualities
+
+
+class ResponseEncoder:
+    """
+    Encodes trusted internal payloads (graph nodes and edges) straight to bytes
+
+    Returning the encoded Response skips FastAPI's re-validation against the
+    response model and its jsonable_encoder pass. JSON is written with orjson
+    when it is installed; clients that prefer MessagePack in Accept get that
+    instead. Bodies of at least `compress_min_bytes` are compressed with
+    brotli or gzip, whichever the client accepts (brotli preferred).
+    """
+
+    def __init__(self, compress_min_bytes: int = 1024, gzip_level: int = 5, brotli_quality: int = 4):
+        self.compress_min_bytes = compress_min_bytes
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    @property
+    def formats(self):
+        return ["json"] + (["msgpack"] if msgpack is not None else [])
+
+    @property
+    def encodings(self):
+        return ["identity", "gzip"] + (["br"] if brotli is not None else [])
+
+    def negotiate_format(self, accept: str) -> str:
+        if msgpack is None or not accept:
+            return "json"
+        qualities = _parse_quality_list(accept)
+        msgpack_quality = max((qualities.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES), default=0.0)
+        json_quality = max(qualities.get(JSON_MEDIA_TYPE, 0.0), qualities.get("application/*", 0.0),
+                           qualities.get("*/*", 0.0))
+        return "msgpack" if msgpack_quality > 0 and msgpack_quality > json_quality else "json"
+
+    def negotiate_encoding(self, accept_encoding: str) -> str:
+        qualities = _parse_quality_list(accept_encoding)
+        wildcard = qualities.get("*", 0.0)
+        for encoding in ("br", "gzip"):
+            if encoding == "br" and brotli is None:
+                continue
+            if qualities.get(encoding, wildcard) > 0:
+                return encoding
+        return "identity"
+
+    @staticmethod
+    def encode(payload: Any, content_format: str = "json") -> Tuple[bytes, str]:
+        """Return (body, media type)"""
+        if content_format == "msgpack":
+            return msgpack.packb(payload, use_bin_type=True), MSGPACK_MEDIA_TYPES[0]
+        if orjson is not None:
+            return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS), JSON_MEDIA_TYPE
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), JSON_MEDIA_TYPE
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        if encoding == "gzip":
+            return gzip.compress(body, compresslevel=self.gzip_level)
+        return body
+
+    def response(self, request: Request, payload: Any, status_code: int = 200,
+                 headers: Optional[Dict[str, str]] = None) -> Response:
+        content_format = self.negotiate_format(request.headers.get("accept", ""))
+        started_at = time.perf_counter()
+        with trace_section("serialize"):
+            body, media_type = self.encode(payload, content_format)
+            encoding = "identity"
+            if len(body) >= self.compress_min_bytes:
+                encoding = self.negotiate_encoding(request.headers.get("accept-encoding", ""))
+                body = self.compress(body, encoding)
+        RESPONSE_ENCODE_DURATION.observe(time.perf_counter() - started_at, format=content_format, encoding=encoding)
+        RESPONSE_SIZE.observe(len(body), format=content_format, encoding=encoding)
+
+        response_headers = {"Vary": "Accept, Accept-Encoding", **(headers or {})}
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        return Response(content=body, status_code=status_code, media_type=media_type, headers=response_headers)
+
+
+response_encoder = ResponseEncoder(
+    compress_min_bytes=int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", 1024)),
+    gzip_level=int(os.getenv("RESPONSE_GZIP_LEVEL", 5)),
+    brotli_quality=int(os.getenv("RESPONSE_BROTLI_QUALITY", 4)),
+)
@@ -0,0 +1,292 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.workers import WORKER_COUNT
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# (data, fields, age in seconds) of one stored issue; fields None means the full payload
+SharedIssue = Tuple[Dict[str, Any], Optional[List[str]], float]
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(value: bytes) -> Any:
+    return orjson.loads(value) if orjson is not None else json.loads(value)
+
+
+class SharedIssueStore:
+    """
+    SQLite (WAL) copy of the issue cache, shared by all worker processes
+
+    Each worker keeps its own in-process IssueCache; entries it stores or
+    revalidates are written here too, in batches from a worker thread, and
+    a worker that misses in its own cache reads them back before calling
+    JIRA. Rows keep their wall-clock store time, so the issue cache TTL (and
+    revalidation of expired entries) means the same thing in every worker.
+    """
+
+    def __init__(self, path: str, max_entries: int = 20000, enabled: bool = True):
+        self.path = path
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._initialized = False
+        self._pending: Dict[Tuple[str, str, str], Tuple[bytes, Optional[str], Optional[str], float]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def enqueue(self, key: Tuple[str, str, str], data: Dict[str, Any], fields: Optional[Iterable[str]],
+                updated: Optional[str], age: float = 0.0):
+        """Queue an entry to be written; the write happens off the event loop"""
+        if not self.enabled:
+            return
+        encoded_fields = json.dumps(sorted(fields)) if fields is not None else None
+        self._pending[key] = (_dumps(data), encoded_fields, updated, time.time() - age)
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+            except RuntimeError:
+                # No event loop (scripts, shutdown): write straight away
+                self._write(self._take_pending())
+
+    async def get_many(self, keys: List[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], SharedIssue]:
+        if not self.enabled or not keys:
+            return {}
+        rows = await asyncio.to_thread(self._read, keys)
+        self.hits += len(rows)
+        self.misses += len(keys) - len(rows)
+        return rows
+
+    async def flush(self):
+        """Write everything queued so far; called from the app lifespan"""
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        if self._pending:
+            await asyncio.to_thread(self._write, self._take_pending())
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "pending_writes": len(self._pending),
+        }
+
+    async def _flush(self):
+        # Let the rest of this request's puts join the batch
+        await asyncio.sleep(0)
+        while self._pending:
+            await asyncio.to_thread(self._write, self._take_pending())
+
+    def _take_pending(self):
+        batch, self._pending = self._pending, {}
+        return batch
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS issues (
+                    base_url TEXT NOT NULL,
+                    user TEXT NOT NULL,
+                    issue_key TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    fields TEXT,
+                    updated TEXT,
+                    stored_at REAL NOT NULL,
+                    PRIMARY KEY (base_url, user, issue_key)
+                )"""
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_issues_stored_at ON issues (stored_at)")
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def _read(self, keys: List[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], SharedIssue]:
+        now = time.time()
+        rows = {}
+        try:
+            with closing(self._connect()) as connection:
+                for key in keys:
+                    row = connection.execute(
+                        "SELECT data, fields, stored_at FROM issues WHERE base_url = ? AND user = ? AND issue_key = ?",
+                        key
+                    ).fetchone()
+                    if row is not None:
+                        fields = json.loads(row[1]) if row[1] is not None else None
+                        rows[key] = (_loads(row[0]), fields, max(0.0, now - row[2]))
+        except sqlite3.Error as e:
+            print(f"Shared issue cache read failed: {str(e)}")
+            return {}
+        return rows
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.executemany(
+                    """INSERT INTO issues VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (base_url, user, issue_key) DO UPDATE SET
+                           data = excluded.data, fields = excluded.fields, updated = excluded.updated,
+                           stored_at = excluded.stored_at
+                       WHERE excluded.stored_at >= issues.stored_at""",
+                    [(*key, data, fields, updated, stored_at)
+                     for key, (data, fields, updated, stored_at) in batch.items()]
+                )
+                connection.execute(
+                    """DELETE FROM issues WHERE stored_at <= (
+                        SELECT stored_at FROM issues ORDER BY stored_at DESC LIMIT 1 OFFSET ?
+                    )""",
+                    (self.max_entries,)
+                )
+            self.writes += len(batch)
+        except sqlite3.Error as e:
+            print(f"Shared issue cache write failed: {str(e)}")
+
+
+class SharedRecordStore:
+    """
+    SQLite (WAL) table of small JSON records, by kind and id, shared by the workers
+
+    Holds the state other workers must be able to answer for: batch test
+    case jobs (the worker running a job publishes its progress here) and
+    finished request traces. Writes are batched off the event loop like the
+    issue store's; rows older than `max_age` seconds are dropped.
+    """
+
+    def __init__(self, path: str, max_age: float = 3600, enabled: bool = True):
+        self.path = path
+        self.max_age = max_age
+        self.enabled = enabled
+        self._initialized = False
+        self._pending: Dict[Tuple[str, str], Tuple[Optional[bytes], float]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def enqueue(self, kind: str, record_id: str, value: Optional[Dict[str, Any]]):
+        """Queue a record to be written (None deletes it); the write happens off the event loop"""
+        if not self.enabled:
+            return
+        self._pending[(kind, record_id)] = (_dumps(value) if value is not None else None, time.time())
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+            except RuntimeError:
+                self._write(self._take_pending())
+
+    async def get(self, kind: str, record_id: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        pending = self._pending.get((kind, record_id))
+        if pending is not None:
+            return _loads(pending[0]) if pending[0] is not None else None
+        return await asyncio.to_thread(self._read, kind, record_id)
+
+    async def flush(self):
+        """Write everything queued so far; called from the app lifespan"""
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        if self._pending:
+            await asyncio.to_thread(self._write, self._take_pending())
+
+    async def _flush(self):
+        await asyncio.sleep(0)
+        while self._pending:
+            await asyncio.to_thread(self._write, self._take_pending())
+
+    def _take_pending(self):
+        batch, self._pending = self._pending, {}
+        return batch
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS records (
+                    kind TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    stored_at REAL NOT NULL,
+                    PRIMARY KEY (kind, id)
+                )"""
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_records_stored_at ON records (stored_at)")
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def _read(self, kind: str, record_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with closing(self._connect()) as connection:
+                row = connection.execute(
+                    "SELECT data FROM records WHERE kind = ? AND id = ? AND stored_at >= ?",
+                    (kind, record_id, time.time() - self.max_age)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Shared record read failed: {str(e)}")
+            return None
+        return _loads(row[0]) if row is not None else None
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)",
+                    [(kind, record_id, data, stored_at)
+                     for (kind, record_id), (data, stored_at) in batch.items() if data is not None]
+                )
+                connection.executemany(
+                    "DELETE FROM records WHERE kind = ? AND id = ?",
+                    [key for key, (data, _) in batch.items() if data is None]
+                )
+                connection.execute("DELETE FROM records WHERE stored_at < ?", (time.time() - self.max_age,))
+        except sqlite3.Error as e:
+            print(f"Shared record write failed: {str(e)}")
+
+
+# On by default once there is more than one worker to share with
+SHARED_STATE_ENABLED = (os.getenv("SHARED_CACHE_ENABLED") or str(WORKER_COUNT > 1)).lower() == "true"
+
+shared_issue_store = SharedIssueStore(
+    path=os.getenv("SHARED_CACHE_PATH", os.path.join("cache", "shared_cache.sqlite3")),
+    max_entries=int(os.getenv("SHARED_CACHE_MAX_ENTRIES", 20000)),
+    enabled=SHARED_STATE_ENABLED,
+)
+
+shared_records = SharedRecordStore(
+    path=os.getenv("SHARED_CACHE_PATH", os.path.join("cache", "shared_cache.sqlite3")),
+    # Long enough for finished test case jobs to be collected
+    max_age=float(os.getenv("TEST_CASE_JOB_RETENTION", 3600)),
+    enabled=SHARED_STATE_ENABLED,
+)
@@ -0,0 +1,128 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one call
+
+    While a call for a key is in flight, other callers for that key wait for
+    its result (or exception) instead of making their own. Nothing is kept
+    once the call finishes; caching is left to the caller. If the caller that
+    owns a call is cancelled, the waiters make the call themselves.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            self.calls += 1
+            leader = self._inflight.get(key)
+            if leader is None:
+                break
+            self.shared += 1
+            try:
+                return await asyncio.shield(leader)
+            except asyncio.CancelledError:
+                if not leader.cancelled():
+                    raise
+                # Counted again on retry
+                self.calls -= 1
+                self.shared -= 1
+
+        future = self._start(key)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._fail(future, e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key, future)
+
+    async def do_many(self, prefix: Tuple, keys: List[Hashable],
+                      fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]) -> Dict[Hashable, Any]:
+        """
+        Batch form of `do`: `fn` receives the keys nobody else is fetching
+
+        Each key is tracked on its own as (*prefix, key), so a batch can share
+        some keys with one in-flight batch and others with another. `fn`
+        returns a dictionary of key to value; keys it leaves out are missing
+        from the result.
+        """
+        results: Dict[Hashable, Any] = {}
+        waiting: Dict[Hashable, asyncio.Future] = {}
+        leading: Dict[Hashable, asyncio.Future] = {}
+        for key in dict.fromkeys(keys):
+            self.calls += 1
+            leader = self._inflight.get((*prefix, key))
+            if leader is not None:
+                self.shared += 1
+                waiting[key] = leader
+            else:
+                leading[key] = self._start((*prefix, key))
+
+        if leading:
+            try:
+                fetched = await fn(list(leading))
+            except BaseException as e:
+                for future in leading.values():
+                    self._fail(future, e)
+                raise
+            else:
+                for key, future in leading.items():
+                    future.set_result(fetched.get(key))
+                    if key in fetched:
+                        results[key] = fetched[key]
+            finally:
+                for key, future in leading.items():
+                    self._finish((*prefix, key), future)
+
+        retry_keys = []
+        for key, leader in waiting.items():
+            try:
+                value = await asyncio.shield(leader)
+            except asyncio.CancelledError:
+                if not leader.cancelled():
+                    raise
+                # Counted again on retry
+                self.calls -= 1
+                self.shared -= 1
+                retry_keys.append(key)
+                continue
+            if value is not None:
+                results[key] = value
+        if retry_keys:
+            results.update(await self.do_many(prefix, retry_keys, fn))
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "fetched": self.calls - self.shared,
+            "in_flight": len(self._inflight),
+            "dedup_rate": round(self.shared / self.calls, 4) if self.calls else 0.0,
+        }
+
+    def _start(self, key: Hashable) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        return future
+
+    @staticmethod
+    def _fail(future: asyncio.Future, error: BaseException):
+        if isinstance(error, asyncio.CancelledError):
+            future.cancel()
+        else:
+            future.set_exception(error)
+            future.exception()  # mark retrieved when nobody was waiting
+
+    def _finish(self, key: Hashable, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
@@ -0,0 +1,81 @@
+import json
+from typing import Any, Dict, List, Optional
+
+
+class IncrementalArrayParser:
+    """
+    Pull complete objects out of a JSON array while the document is still streaming
+
+    Feed text chunks as they arrive; every call returns the objects of the
+    array stored under `key` (e.g. "steps") whose closing brace has been seen
+    since the previous call. The scan keeps its position and string/escape
+    state between calls, so each character is looked at once.
+    """
+
+    def __init__(self, key: str):
+        self._marker = f'"{key}"'
+        self._buffer = ""
+        self._position = 0
+        self._in_array = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._buffer += chunk
+        if self._finished:
+            return []
+        if not self._in_array and not self._find_array_start():
+            return []
+        return self._scan()
+
+    def _find_array_start(self) -> bool:
+        marker_at = self._buffer.find(self._marker)
+        if marker_at < 0:
+            return False
+        colon_at = self._buffer.find(":", marker_at + len(self._marker))
+        if colon_at < 0:
+            return False
+        bracket_at = self._buffer.find("[", colon_at + 1)
+        if bracket_at < 0 or self._buffer[colon_at + 1:bracket_at].strip():
+            return False
+        self._in_array = True
+        self._position = bracket_at + 1
+        return True
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        objects = []
+        buffer = self._buffer
+        while self._position < len(buffer):
+            char = buffer[self._position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._object_start = self._position
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    try:
+                        value = json.loads(buffer[self._object_start:self._position + 1])
+                        if isinstance(value, dict):
+                            objects.append(value)
+                    except ValueError:
+                        pass
+                    self._object_start = None
+            elif char == "]" and self._depth == 0:
+                self._finished = True
+                self._position += 1
+                break
+            self._position += 1
+        return objects
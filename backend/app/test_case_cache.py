@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Dict, Optional
+
+
+class TestCaseCache:
+    """
+    Persistent, content-addressed cache of generated test cases (SQLite)
+
+    An entry is keyed by a hash of the model, system prompt, user prompt and
+    generation options, so any change to the issue content that reaches the
+    prompt produces a new key. When a test case is stored for an issue, the
+    entries generated from older content of that issue on the same JIRA site
+    (`scope`, the normalized base URL) are deleted. The cache
+    is capped at `max_entries`, evicting the least recently used entries.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1000, enabled: bool = True):
+        self.path = path
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._initialized = False
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_prompt: str, options: Dict[str, Any]) -> str:
+        payload = json.dumps([model, system_prompt, user_prompt, options], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def content_hash(user_prompt: str) -> str:
+        return hashlib.sha256(user_prompt.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        test_case = await asyncio.to_thread(self._get, key)
+        if test_case is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return test_case
+
+    @staticmethod
+    def make_scope(base_url: Optional[str]) -> str:
+        """The JIRA site an issue key belongs to; "" when the caller didn't say"""
+        return (base_url or "").rstrip("/")
+
+    async def put(self, key: str, scope: str, issue_key: str, content_hash: str, test_case: Dict[str, Any]):
+        if not self.enabled:
+            return
+        await asyncio.to_thread(self._put, key, scope, issue_key, content_hash, test_case)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS test_cases (
+                    cache_key TEXT PRIMARY KEY,
+                    issue_key TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    test_case TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    scope TEXT NOT NULL DEFAULT ''
+                )"""
+            )
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(test_cases)")}
+            if "scope" not in columns:
+                # Caches created before entries were scoped by JIRA site
+                connection.execute("ALTER TABLE test_cases ADD COLUMN scope TEXT NOT NULL DEFAULT ''")
+            connection.execute("DROP INDEX IF EXISTS idx_test_cases_issue")
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_test_cases_scope_issue ON test_cases (scope, issue_key)")
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_test_cases_last_used ON test_cases (last_used_at)")
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with closing(self._connect()) as connection, connection:
+                row = connection.execute("SELECT test_case FROM test_cases WHERE cache_key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                connection.execute("UPDATE test_cases SET last_used_at = ? WHERE cache_key = ?", (time.time(), key))
+                return json.loads(row[0])
+        except sqlite3.Error as e:
+            print(f"Test case cache read failed: {str(e)}")
+            return None
+
+    def _put(self, key: str, scope: str, issue_key: str, content_hash: str, test_case: Dict[str, Any]):
+        now = time.time()
+        try:
+            with closing(self._connect()) as connection, connection:
+                # Drop test cases generated from older content of the same issue on the same site
+                connection.execute(
+                    "DELETE FROM test_cases WHERE scope = ? AND issue_key = ? AND content_hash != ?",
+                    (scope, issue_key, content_hash)
+                )
+                connection.execute(
+                    """INSERT OR REPLACE INTO test_cases
+                       (cache_key, issue_key, content_hash, test_case, created_at, last_used_at, scope)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    (key, issue_key, content_hash, json.dumps(test_case), now, now, scope)
+                )
+                connection.execute(
+                    """DELETE FROM test_cases WHERE cache_key IN (
+                        SELECT cache_key FROM test_cases ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                    )""",
+                    (self.max_entries,)
+                )
+        except sqlite3.Error as e:
+            print(f"Test case cache write failed: {str(e)}")
+
+
+test_case_cache = TestCaseCache(
+    path=os.getenv("TEST_CASE_CACHE_PATH", os.path.join("cache", "test_cases.sqlite3")),
+    max_entries=int(os.getenv("TEST_CASE_CACHE_MAX_ENTRIES", 1000)),
+    enabled=os.getenv("TEST_CASE_CACHE_ENABLED", "true").lower() == "true",
+)
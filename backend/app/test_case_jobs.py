@@ -0,0 +1,202 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.llm_scheduler import LLMSchedulerBusy
+from app.shared_cache import SharedRecordStore, shared_records
+
+# generate_fn(issue_data, bypass_cache) -> {"test_case", "source", "cache", "error"}
+GenerateFn = Callable[[Dict[str, Any], bool], Awaitable[Dict[str, Any]]]
+
+
+class TestCaseJob:
+    """A batch of issues whose test cases are generated in the background"""
+
+    def __init__(self, issues: List[Dict[str, Any]], bypass_cache: bool):
+        self.id = uuid.uuid4().hex
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.status = "queued"
+        self.bypass_cache = bypass_cache
+        self.issues = issues
+        self.items: List[Dict[str, Any]] = [
+            {"index": index, "key": issue.get("key"), "status": "pending", "source": None, "test_case": None, "error": None}
+            for index, issue in enumerate(issues)
+        ]
+        self.tasks: List[asyncio.Task] = []
+
+    def to_dict(self, include_results: bool = True) -> Dict[str, Any]:
+        done = sum(1 for item in self.items if item["status"] == "done")
+        failed = sum(1 for item in self.items if item["status"] == "failed")
+        fallback = sum(1 for item in self.items if item["source"] == "fallback")
+        total = len(self.items)
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "total": total,
+            "completed": done,
+            "failed": failed,
+            "fallback": fallback,
+            "progress": round((done + failed) / total, 4) if total else 1.0,
+        }
+        if include_results:
+            data["items"] = self.items
+        return data
+
+
+class TestCaseJobManager:
+    """
+    Runs batch test case jobs with a small pool of workers per job
+
+    Each job gets `workers_per_job` workers pulling issues from a queue; the
+    number of generations actually running in Ollama is bounded by the shared
+    Ollama limit inside `generate_fn`. Finished jobs are kept for
+    `retention_seconds` so clients can collect the results, and at most
+    `max_jobs` jobs are remembered.
+
+    With several server workers a job runs in the worker that accepted it,
+    which publishes its state to the `shared` record store on every change;
+    the other workers answer polls from there, and a cancel they receive is
+    left there as a request the running worker checks every
+    `cancel_poll_interval` seconds.
+    """
+
+    def __init__(self, workers_per_job: int = 2, retention_seconds: float = 3600, max_jobs: int = 100,
+                 shared: Optional[SharedRecordStore] = None, cancel_poll_interval: float = 1.0):
+        self.workers_per_job = max(1, workers_per_job)
+        self.retention_seconds = retention_seconds
+        self.max_jobs = max_jobs
+        self.shared = shared if shared is not None and shared.enabled else None
+        self.cancel_poll_interval = cancel_poll_interval
+        self._jobs: "OrderedDict[str, TestCaseJob]" = OrderedDict()
+
+    def submit(self, issues: List[Dict[str, Any]], generate_fn: GenerateFn, bypass_cache: bool = False) -> TestCaseJob:
+        self._prune()
+        job = TestCaseJob(issues, bypass_cache)
+        self._jobs[job.id] = job
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for index in range(len(issues)):
+            queue.put_nowait(index)
+
+        job.status = "running"
+        worker_count = min(self.workers_per_job, len(issues)) or 1
+        job.tasks = [asyncio.ensure_future(self._worker(job, queue, generate_fn)) for _ in range(worker_count)]
+        asyncio.ensure_future(self._finish_when_done(job))
+        if self.shared is not None:
+            asyncio.ensure_future(self._watch_cancel_requests(job))
+        self._publish(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[TestCaseJob]:
+        return self._jobs.get(job_id)
+
+    async def get_state(self, job_id: str, include_results: bool = True) -> Optional[Dict[str, Any]]:
+        """A job's to_dict(), also for jobs running in another worker"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict(include_results)
+        if self.shared is None:
+            return None
+        state = await self.shared.get("job", job_id)
+        if state is not None and not include_results:
+            state.pop("items", None)
+        return state
+
+    def cancel(self, job_id: str) -> Optional[TestCaseJob]:
+        job = self._jobs.get(job_id)
+        if job is not None and job.status == "running":
+            for task in job.tasks:
+                task.cancel()
+            job.status = "cancelled"
+            self._publish(job)
+        return job
+
+    async def cancel_state(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a job, also one running in another worker; returns its state without results"""
+        job = self.cancel(job_id)
+        if job is not None:
+            return job.to_dict(include_results=False)
+        state = await self.get_state(job_id, include_results=False)
+        if state is not None and state["status"] == "running":
+            self.shared.enqueue("job_cancel", job_id, {"requested_at": time.time()})
+            state["status"] = "cancelled"
+        return state
+
+    async def shutdown(self):
+        """Cancel all running jobs; called from the app lifespan"""
+        tasks = [task for job in self._jobs.values() for task in job.tasks if not task.done()]
+        for job in self._jobs.values():
+            if job.status == "running":
+                job.status = "cancelled"
+                self._publish(job)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _publish(self, job: TestCaseJob):
+        if self.shared is not None:
+            self.shared.enqueue("job", job.id, job.to_dict())
+
+    async def _watch_cancel_requests(self, job: TestCaseJob):
+        """Cancel `job` when another worker received the DELETE for it"""
+        while job.status == "running":
+            await asyncio.sleep(self.cancel_poll_interval)
+            if job.status == "running" and await self.shared.get("job_cancel", job.id) is not None:
+                self.cancel(job.id)
+                self.shared.enqueue("job_cancel", job.id, None)
+
+    async def _worker(self, job: TestCaseJob, queue: asyncio.Queue, generate_fn: GenerateFn):
+        while True:
+            try:
+                index = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            item = job.items[index]
+            item["status"] = "running"
+            self._publish(job)
+            try:
+                result = await generate_fn(job.issues[index], job.bypass_cache)
+                item.update(status="done", source=result["source"], test_case=result["test_case"], error=result["error"])
+            except asyncio.CancelledError:
+                item["status"] = "pending"
+                raise
+            except LLMSchedulerBusy as e:
+                # The LLM queue is full: put the issue back and wait for room
+                item["status"] = "pending"
+                queue.put_nowait(index)
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                item.update(status="failed", error=str(e))
+            self._publish(job)
+
+    async def _finish_when_done(self, job: TestCaseJob):
+        await asyncio.gather(*job.tasks, return_exceptions=True)
+        if job.status == "running":
+            job.status = "completed"
+        job.finished_at = time.time()
+        self._publish(job)
+
+    def _prune(self):
+        now = time.time()
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at and now - job.finished_at > self.retention_seconds]:
+            del self._jobs[job_id]
+        while len(self._jobs) >= self.max_jobs:
+            oldest_id = next((job_id for job_id, job in self._jobs.items() if job.finished_at), None)
+            if oldest_id is None:
+                break
+            del self._jobs[oldest_id]
+
+
+test_case_jobs = TestCaseJobManager(
+    workers_per_job=int(os.getenv("TEST_CASE_JOB_WORKERS", os.getenv("OLLAMA_CONCURRENCY", 2))),
+    retention_seconds=float(os.getenv("TEST_CASE_JOB_RETENTION", 3600)),
+    max_jobs=int(os.getenv("TEST_CASE_JOB_MAX_JOBS", 100)),
+    shared=shared_records,
+)
@@ -0,0 +1,98 @@
+import os
+import sys
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def uvicorn_cli_workers() -> Optional[int]:
+    """
+    Worker count of a `uvicorn app.main:app` command line, or None when the
+    app wasn't started by the uvicorn CLI (run.py, tests)
+
+    Worker processes inherit the parent's sys.argv, so each of them sees the
+    --workers option; without it uvicorn falls back to WEB_CONCURRENCY.
+    """
+    if not sys.argv:
+        return None
+    program = sys.argv[0]
+    if os.path.splitext(os.path.basename(program))[0] != "uvicorn" and \
+            os.path.basename(os.path.dirname(program)) != "uvicorn":
+        return None
+    args = sys.argv[1:]
+    for index, arg in enumerate(args):
+        if arg == "--workers" and index + 1 < len(args):
+            return int(args[index + 1])
+        if arg.startswith("--workers="):
+            return int(arg.split("=", 1)[1])
+    if "--reload" in args:
+        return 1
+    return int(os.getenv("WEB_CONCURRENCY", 1))
+
+
+def get_worker_count() -> int:
+    """
+    Worker processes serving the app
+
+    run.py passes its --workers value on as WORKERS; a plain uvicorn command
+    line is read directly. When both are given they must agree, otherwise
+    the server-wide limits would be split the wrong way.
+    """
+    configured = os.getenv("WORKERS")
+    started = uvicorn_cli_workers()
+    if configured and started is not None and int(configured) != started:
+        raise RuntimeError(
+            f"WORKERS={configured} but uvicorn was started with {started} worker(s); "
+            "set WORKERS to match or start the server with run.py"
+        )
+    return max(1, int(configured or started or 1))
+
+
+# Limits meant for the whole server are split between the workers with `per_worker`
+WORKER_COUNT = get_worker_count()
+
+
+def per_worker(total: float, minimum: float = 1):
+    """This worker's share of a server-wide limit (at least `minimum`)"""
+    share = total / WORKER_COUNT
+    return max(minimum, int(share) if isinstance(total, int) else share)
+
+
+class LeaderLock:
+    """
+    Exclusive file lock naming the one worker that runs a singleton task
+
+    The first worker to `acquire` holds the lock until it exits (the OS
+    releases it, also on a crash, and the next worker to start takes over).
+    Without fcntl (Windows) every caller is the leader.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        if fcntl is None:
+            return True
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lock_file = open(self.path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
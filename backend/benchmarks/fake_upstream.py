@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+"""
+Synthetic stand-in for the JIRA REST API and Ollama
+
+Serves a generated project through the endpoints the backend uses
+(/rest/api/2/issue/{key}, /rest/api/2/search, /rest/api/2/myself and
+Ollama's /api/generate), with configurable size, link density, hierarchy
+depth, injected latency and 429 responses. Calls are counted per endpoint so
+benchmarks can report how many upstream requests an operation needed.
+
+Run it on its own to point a local backend at it:
+
+    python -m benchmarks.fake_upstream --issues 2000 --port 9000
+    # then JIRA_BASE_URL=http://localhost:9000 and OLLAMA_API_BASE=http://localhost:9000
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LINK_TYPES = [
+    {"name": "Relates", "inward": "relates to", "outward": "relates to"},
+    {"name": "Blocks", "inward": "is blocked by", "outward": "blocks"},
+    {"name": "Tests", "inward": "is tested by", "outward": "tests"},
+]
+# Issue types by hierarchy level; issues outside the hierarchy use FLAT_TYPES
+HIERARCHY_TYPES = ["Epic", "Story", "Sub-task"]
+FLAT_TYPES = ["Story", "Requirement", "Test", "Bug"]
+
+_KEY_IN = re.compile(r"key\s+in\s*\(([^)]*)\)", re.IGNORECASE)
+_UPDATED_SINCE = re.compile(r"updated\s*>=\s*-(\d+)m", re.IGNORECASE)
+
+FAKE_TEST_CASE = {
+    "summary": "Verify the synthetic issue",
+    "description": "Generated by the fake Ollama server",
+    "precondition": "The synthetic project exists",
+    "type": "Functional",
+    "priority": "Medium",
+    "steps": [
+        {"step": "Open the issue", "expected": "The issue is shown", "data": None},
+        {"step": "Check the linked issues", "expected": "All links are listed", "data": None},
+        {"step": "Check the parent", "expected": "The parent is shown", "data": None},
+    ],
+}
+
+
+def format_jira_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+
+
+class SyntheticProject:
+    """
+    A generated JIRA project
+
+    Issues form a hierarchy `hierarchy_depth` levels deep (each parent has
+    `branching` children) and carry on average `link_density` outward links
+    to random other issues; like JIRA, every link is listed on both ends.
+    """
+
+    def __init__(self, key: str = "BENCH", issue_count: int = 100, link_density: float = 1.5,
+                 hierarchy_depth: int = 3, branching: int = 5, seed: int = 42):
+        self.key = key
+        self.issues: Dict[str, Dict[str, Any]] = {}
+        self.order: List[str] = []
+        self.updated_at: Dict[str, float] = {}
+        rng = random.Random(seed)
+        now = time.time()
+
+        keys = [f"{key}-{index + 1}" for index in range(issue_count)]
+        levels = []
+        for index, issue_key in enumerate(keys):
+            parent_index = (index - 1) // branching if index else None
+            if parent_index is not None and levels[parent_index] + 1 < hierarchy_depth:
+                level = levels[parent_index] + 1
+            else:
+                parent_index, level = None, 0
+            levels.append(level)
+
+            issue_type = HIERARCHY_TYPES[min(level, len(HIERARCHY_TYPES) - 1)] if hierarchy_depth > 1 \
+                else FLAT_TYPES[index % len(FLAT_TYPES)]
+            updated = now - rng.uniform(3600, 90 * 86400)
+            fields = {
+                "summary": f"Synthetic issue {index + 1}",
+                "issuetype": {"name": issue_type},
+                "status": {"name": rng.choice(["To Do", "In Progress", "Done"])},
+                "priority": {"name": rng.choice(["Low", "Medium", "High"])},
+                "description": f"Description of synthetic issue {index + 1}. " * rng.randint(2, 20),
+                "created": format_jira_time(updated - 86400),
+                "updated": format_jira_time(updated),
+                "assignee": {"displayName": f"User {index % 17}"},
+                "reporter": {"displayName": f"User {index % 11}"},
+                "creator": {"displayName": f"User {index % 11}"},
+                "labels": ["synthetic"],
+                "components": [],
+                "comment": {"comments": [{"body": "Looks good", "author": {"displayName": "Reviewer"}}]},
+                "issuelinks": [],
+            }
+            if parent_index is not None:
+                parent_key = keys[parent_index]
+                fields["parent"] = {"id": str(10000 + parent_index), "key": parent_key}
+            self.issues[issue_key] = {"id": str(10000 + index), "key": issue_key, "fields": fields}
+            self.order.append(issue_key)
+            self.updated_at[issue_key] = updated
+
+        if issue_count > 1:
+            for index, issue_key in enumerate(keys):
+                link_count = int(link_density) + (1 if rng.random() < link_density % 1 else 0)
+                for _ in range(link_count):
+                    target_index = rng.randrange(issue_count - 1)
+                    if target_index >= index:
+                        target_index += 1
+                    self._link(issue_key, keys[target_index], rng.choice(LINK_TYPES), len(self.issues) + index)
+
+    def _link(self, source_key: str, target_key: str, link_type: Dict[str, str], link_id: int):
+        source = self.issues[source_key]
+        target = self.issues[target_key]
+        source["fields"]["issuelinks"].append({
+            "id": str(link_id), "type": link_type,
+            "outwardIssue": {"id": target["id"], "key": target_key,
+                             "fields": {"issuetype": target["fields"]["issuetype"]}},
+        })
+        target["fields"]["issuelinks"].append({
+            "id": str(link_id), "type": link_type,
+            "inwardIssue": {"id": source["id"], "key": source_key,
+                            "fields": {"issuetype": source["fields"]["issuetype"]}},
+        })
+
+    def touch(self, issue_key: str):
+        """Mark an issue as updated now, for incremental refresh benchmarks"""
+        now = time.time()
+        self.updated_at[issue_key] = now
+        self.issues[issue_key]["fields"]["updated"] = format_jira_time(now)
+
+    def most_linked_key(self) -> str:
+        return max(self.order, key=lambda issue_key: len(self.issues[issue_key]["fields"]["issuelinks"]))
+
+
+class FakeUpstream:
+    """
+    The fake JIRA and Ollama servers as one FastAPI app
+
+    Args:
+        project: The synthetic project to serve
+        latency: Seconds added to every JIRA response (plus up to 20% jitter)
+        throttle_rate: Share of JIRA requests answered 429 with Retry-After
+        retry_after: Retry-After seconds sent with those 429s
+        max_page_size: Largest search page returned, as JIRA Cloud caps maxResults
+        ollama_latency: Seconds a generation takes
+        ollama_tokens_per_second: Reported generation speed
+    """
+
+    def __init__(self, project: Optional[SyntheticProject] = None, latency: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: float = 1.0, max_page_size: int = 100,
+                 ollama_latency: float = 0.0, ollama_tokens_per_second: float = 20.0, seed: int = 7):
+        self.project = project or SyntheticProject()
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.max_page_size = max_page_size
+        self.ollama_latency = ollama_latency
+        self.ollama_tokens_per_second = ollama_tokens_per_second
+        self.calls: Counter = Counter()
+        self._rng = random.Random(seed)
+        self.app = self._create_app()
+
+    def reset_calls(self):
+        self.calls.clear()
+
+    def _create_app(self) -> FastAPI:
+        app = FastAPI(title="Fake JIRA and Ollama")
+
+        @app.get("/rest/api/2/myself")
+        async def myself():
+            response = await self._jira_call("myself")
+            return response or {"displayName": "Benchmark User", "accountId": "bench"}
+
+        @app.get("/rest/api/2/issue/{issue_key}")
+        async def get_issue(issue_key: str, fields: Optional[str] = None):
+            throttled = await self._jira_call("issue")
+            if throttled:
+                return throttled
+            issue = self.project.issues.get(issue_key)
+            if issue is None:
+                return JSONResponse({"errorMessages": ["Issue does not exist or you do not have permission to see it."]},
+                                    status_code=404)
+            return self._project_fields(issue, fields)
+
+        @app.get("/rest/api/2/search")
+        async def search_get(request: Request):
+            params = request.query_params
+            return await self._search(params.get("jql", ""), int(params.get("startAt", 0)),
+                                      int(params.get("maxResults", 50)), params.get("fields"))
+
+        @app.post("/rest/api/2/search")
+        async def search_post(request: Request):
+            body = await request.json()
+            fields = body.get("fields")
+            return await self._search(body.get("jql", ""), int(body.get("startAt", 0)),
+                                      int(body.get("maxResults", 50)),
+                                      ",".join(fields) if isinstance(fields, list) else fields)
+
+        @app.post("/api/generate")
+        async def generate(request: Request):
+            body = await request.json()
+            self.calls["ollama_generate"] += 1
+            text = json.dumps(FAKE_TEST_CASE)
+            eval_count = max(1, len(text) // 4)
+            eval_duration = int(eval_count / self.ollama_tokens_per_second * 1e9)
+            if not body.get("stream"):
+                await asyncio.sleep(self.ollama_latency)
+                return {"model": body.get("model"), "response": text, "done": True,
+                        "eval_count": eval_count, "eval_duration": eval_duration}
+
+            async def stream():
+                chunks = [text[index:index + 16] for index in range(0, len(text), 16)]
+                for chunk in chunks:
+                    await asyncio.sleep(self.ollama_latency / len(chunks))
+                    yield json.dumps({"response": chunk, "done": False}) + "\n"
+                yield json.dumps({"response": "", "done": True,
+                                  "eval_count": eval_count, "eval_duration": eval_duration}) + "\n"
+            return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+        @app.get("/_fake/calls")
+        async def get_calls():
+            return dict(self.calls)
+
+        @app.post("/_fake/reset")
+        async def reset():
+            self.reset_calls()
+            return {"reset": True}
+
+        return app
+
+    async def _jira_call(self, endpoint: str) -> Optional[JSONResponse]:
+        """Count the call, apply the injected latency, and maybe answer 429"""
+        self.calls[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency * (1 + self._rng.uniform(0, 0.2)))
+        if self.throttle_rate and self._rng.random() < self.throttle_rate:
+            self.calls["throttled"] += 1
+            return JSONResponse({"errorMessages": ["Rate limit exceeded."]}, status_code=429,
+                                headers={"Retry-After": str(self.retry_after), "X-RateLimit-Remaining": "0"})
+        return None
+
+    async def _search(self, jql: str, start_at: int, max_results: int, fields: Optional[str]):
+        throttled = await self._jira_call("search")
+        if throttled:
+            return throttled
+        project = self.project
+
+        key_match = _KEY_IN.search(jql)
+        if key_match:
+            keys = [key.strip().strip('"') for key in key_match.group(1).split(",")]
+            matches = [key for key in keys if key in project.issues]
+        else:
+            matches = project.order
+            since_match = _UPDATED_SINCE.search(jql)
+            if since_match:
+                since = time.time() - int(since_match.group(1)) * 60
+                matches = [key for key in matches if project.updated_at[key] >= since]
+
+        page_size = max(0, min(max_results, self.max_page_size))
+        page = matches[start_at:start_at + page_size]
+        return {
+            "startAt": start_at,
+            "maxResults": page_size,
+            "total": len(matches),
+            "issues": [self._project_fields(project.issues[key], fields) for key in page],
+        }
+
+    @staticmethod
+    def _project_fields(issue: Dict[str, Any], fields: Optional[str]) -> Dict[str, Any]:
+        if not fields or fields in ("*all", "*navigable"):
+            return issue
+        names = set(fields.split(","))
+        return {"id": issue["id"], "key": issue["key"],
+                "fields": {name: value for name, value in issue["fields"].items() if name in names}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic JIRA project and a fake Ollama")
+    parser.add_argument("--issues", type=int, default=500, help="Issues in the project")
+    parser.add_argument("--project", default="BENCH", help="Project key")
+    parser.add_argument("--link-density", type=float, default=1.5, help="Average outward links per issue")
+    parser.add_argument("--hierarchy-depth", type=int, default=3, help="Levels of parent/child issues")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every JIRA call")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of JIRA calls answered 429")
+    parser.add_argument("--ollama-latency", type=float, default=2.0, help="Seconds per generation")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+
+    import uvicorn
+    project = SyntheticProject(args.project, args.issues, args.link_density, args.hierarchy_depth)
+    upstream = FakeUpstream(project, latency=args.latency, throttle_rate=args.throttle_rate,
+                            ollama_latency=args.ollama_latency)
+    print(f"Serving {args.issues} synthetic issues in project {args.project}; "
+          f"most linked issue: {project.most_linked_key()}")
+    uvicorn.run(upstream.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
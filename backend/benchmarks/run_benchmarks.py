@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+"""
+Benchmarks for the graph and test case endpoints against the fake upstream
+
+For each graph size a fake JIRA/Ollama server (benchmarks/fake_upstream.py)
+is started in a subprocess with a synthetic project, and the backend app is
+driven in-process through /api/jira/visualize, /api/jira/visualize-project
+and /api/jira/generate-test-case. Each scenario reports wall time (median of
+the repeats), upstream calls per request, and the peak Python memory of one
+extra run traced with tracemalloc. "cold" runs use fresh credentials, so
+no cached issue or pooled connection is reused; "warm" runs repeat the
+same credentials. Response sizes are bytes on the wire.
+
+With visualize-project selected, the project graph is also serialized in
+every available format and content encoding, next to the pydantic
+validation + stdlib json path FastAPI would take with the response model,
+reporting encode time and bytes per node.
+
+Run from the backend directory:
+
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --sizes 10,100,1000 --latency 0.05 --json results.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable, Dict, List
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = "10,100,1000,5000,20000"
+PROJECT_KEY = "BENCH"
+CENTRAL_ISSUE = f"{PROJECT_KEY}-1"
+SCENARIOS = ["visualize", "visualize-project", "generate-test-case"]
+
+
+def free_port() -> int:
+    with contextlib.closing(socket.socket()) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeUpstreamProcess:
+    """The fake upstream server for one graph size, in a subprocess"""
+
+    def __init__(self, args, issue_count: int):
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.command = [
+            sys.executable, "-m", "benchmarks.fake_upstream",
+            "--port", str(self.port),
+            "--project", PROJECT_KEY,
+            "--issues", str(issue_count),
+            "--link-density", str(args.link_density),
+            "--hierarchy-depth", str(args.hierarchy_depth),
+            "--latency", str(args.latency),
+            "--throttle-rate", str(args.throttle_rate),
+            "--ollama-latency", str(args.ollama_latency),
+        ]
+        self.process = None
+
+    async def __aenter__(self):
+        self.process = subprocess.Popen(self.command, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL)
+        async with httpx.AsyncClient() as client:
+            for _ in range(600):
+                if self.process.poll() is not None:
+                    raise RuntimeError(f"Fake upstream exited with code {self.process.returncode}")
+                try:
+                    await client.get(f"{self.base_url}/_fake/calls")
+                    return self
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+        raise RuntimeError("Fake upstream did not start within 60 seconds")
+
+    async def __aexit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait(timeout=10)
+
+    async def reset_calls(self):
+        async with httpx.AsyncClient() as client:
+            await client.post(f"{self.base_url}/_fake/reset")
+
+    async def calls(self) -> Dict[str, int]:
+        async with httpx.AsyncClient() as client:
+            return (await client.get(f"{self.base_url}/_fake/calls")).json()
+
+
+def scenario_request(scenario: str, base_url: str, username: str, bypass_cache: bool, slim: bool = False):
+    credentials = {
+        "username": username,
+        "api_token": "benchmark-token",
+        "base_url": base_url,
+        "project_id": PROJECT_KEY,
+        "central_jira_id": CENTRAL_ISSUE,
+    }
+    query = "?slim=true" if slim else ""
+    if scenario == "visualize":
+        return f"/api/jira/visualize{query}", credentials
+    if scenario == "visualize-project":
+        return f"/api/jira/visualize-project{query}", credentials
+    return "/api/jira/generate-test-case", {
+        "issueData": {
+            "key": CENTRAL_ISSUE,
+            "summary": "Synthetic issue 1",
+            "issue_type": "Epic",
+            "status": "To Do",
+            "description": "Description of synthetic issue 1.",
+        },
+        "bypass_cache": bypass_cache,
+    }
+
+
+async def measure(client: httpx.AsyncClient, upstream: FakeUpstreamProcess, path: str, body: Dict[str, Any],
+                  trace_memory: bool = False) -> Dict[str, Any]:
+    await upstream.reset_calls()
+    if trace_memory:
+        tracemalloc.start()
+    started_at = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        response = await client.post(path, json=body)
+    duration = time.perf_counter() - started_at
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} returned {response.status_code}: {response.text[:200]}")
+    calls = await upstream.calls()
+    return {"seconds": duration, "calls": calls, "peak_bytes": peak, "response_bytes": response.num_bytes_downloaded}
+
+
+async def run_scenario(client: httpx.AsyncClient, upstream: FakeUpstreamProcess, scenario: str,
+                       mode: str, repeats: int, slim: bool = False) -> Dict[str, Any]:
+    warm_user = f"bench-{uuid.uuid4().hex[:8]}"
+
+    def request(run: int):
+        username = warm_user if mode == "warm" else f"bench-{uuid.uuid4().hex[:8]}"
+        return scenario_request(scenario, upstream.base_url, username, bypass_cache=mode == "cold", slim=slim)
+
+    if mode == "warm":
+        await measure(client, upstream, *request(0))
+    runs = [await measure(client, upstream, *request(run)) for run in range(repeats)]
+    memory_run = await measure(client, upstream, *request(repeats), trace_memory=True)
+
+    last_calls = runs[-1]["calls"]
+    return {
+        "scenario": scenario,
+        "mode": mode,
+        "median_seconds": statistics.median(run["seconds"] for run in runs),
+        "min_seconds": min(run["seconds"] for run in runs),
+        "upstream_calls": sum(count for name, count in last_calls.items() if name != "throttled"),
+        "calls_by_endpoint": last_calls,
+        "peak_memory_mb": memory_run["peak_bytes"] / 1024 / 1024,
+        "response_kb": runs[-1]["response_bytes"] / 1024,
+    }
+
+
+def timed(function: Callable, repeats: int = 3):
+    """(median seconds, last result) of calling `function`"""
+    durations = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - started_at)
+    return statistics.median(durations), result
+
+
+def serialization_results(payload: Dict[str, Any], size: int) -> List[Dict[str, Any]]:
+    from fastapi.encoders import jsonable_encoder
+    from app.main import GraphData
+    from app.serialization import response_encoder
+
+    node_count = max(1, len(payload["nodes"]))
+    results = []
+
+    def add(content_format: str, encoding: str, seconds: float, body: bytes):
+        results.append({
+            "issues": size,
+            "format": content_format,
+            "encoding": encoding,
+            "encode_ms": seconds * 1000,
+            "bytes": len(body),
+            "bytes_per_node": len(body) / node_count,
+        })
+
+    seconds, body = timed(lambda: json.dumps(jsonable_encoder(GraphData(**payload))).encode("utf-8"))
+    add("pydantic+json", "identity", seconds, body)
+    for content_format in response_encoder.formats:
+        encode_seconds, body = timed(lambda: response_encoder.encode(payload, content_format)[0])
+        for encoding in response_encoder.encodings:
+            compress_seconds, compressed = timed(lambda: response_encoder.compress(body, encoding))
+            add(content_format, encoding, encode_seconds + compress_seconds, compressed)
+    return results
+
+
+async def run_benchmarks(args) -> Dict[str, List[Dict[str, Any]]]:
+    # Imported late: the app reads its settings from the environment at import time
+    from app.main import app
+
+    results = []
+    serialization = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), \
+            httpx.AsyncClient(transport=transport, base_url="http://backend", timeout=None) as client:
+        for size in args.sizes:
+            async with FakeUpstreamProcess(args, size) as upstream:
+                os.environ["OLLAMA_API_BASE"] = upstream.base_url
+                for scenario in args.scenarios:
+                    for mode in ("cold", "warm"):
+                        result = await run_scenario(client, upstream, scenario, mode, args.repeats, args.slim)
+                        result["issues"] = size
+                        results.append(result)
+                        print_result(result)
+                if "visualize-project" in args.scenarios:
+                    path, body = scenario_request("visualize-project", upstream.base_url, "bench-serialize", False, args.slim)
+                    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                        payload = (await client.post(path, json=body)).json()
+                    serialization.extend(serialization_results(payload, size))
+
+    if serialization:
+        print()
+        print(f"{'issues':>7} {'format':<14} {'encoding':<9} {'encode ms':>10} {'KB':>10} {'bytes/node':>11}")
+        for row in serialization:
+            print(f"{row['issues']:>7} {row['format']:<14} {row['encoding']:<9} {row['encode_ms']:>10.2f} "
+                  f"{row['bytes'] / 1024:>10.1f} {row['bytes_per_node']:>11.1f}")
+    return {"results": results, "serialization": serialization}
+
+
+def print_header():
+    print(f"{'issues':>7} {'scenario':<19} {'mode':<5} {'median s':>9} {'min s':>8} "
+          f"{'calls':>6} {'peak MB':>8} {'resp KB':>9}")
+
+
+def print_result(result: Dict[str, Any]):
+    print(f"{result['issues']:>7} {result['scenario']:<19} {result['mode']:<5} "
+          f"{result['median_seconds']:>9.3f} {result['min_seconds']:>8.3f} {result['upstream_calls']:>6} "
+          f"{result['peak_memory_mb']:>8.1f} {result['response_kb']:>9.1f}", flush=True)
+
+
+def parse_list(value: str, convert: Callable = str) -> List:
+    return [convert(item.strip()) for item in value.split(",") if item.strip()]
+
+
+def configure_environment(args, cache_dir: str):
+    """Settings for the app under test; explicit environment variables win"""
+    defaults = {
+        "JIRA_RATE_LIMIT": "0",
+        "GRAPH_STORE_ENABLED": "false",
+        "TEST_CASE_CACHE_PATH": os.path.join(cache_dir, "test_cases.sqlite3"),
+        "REQUEST_TRACE_ENABLED": "false",
+    }
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the graph and test case endpoints")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma-separated issue counts (default {DEFAULT_SIZES})")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per scenario and mode")
+    parser.add_argument("--link-density", type=float, default=1.5, help="Average outward links per issue")
+    parser.add_argument("--hierarchy-depth", type=int, default=3, help="Levels of parent/child issues")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every JIRA call")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of JIRA calls answered 429")
+    parser.add_argument("--ollama-latency", type=float, default=0.0, help="Seconds per fake generation")
+    parser.add_argument("--slim", action="store_true", help="Request slim graph nodes (?slim=true)")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+    args.sizes = parse_list(args.sizes, int)
+    args.scenarios = parse_list(args.scenarios)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    sys.path.insert(0, BACKEND_DIR)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        configure_environment(args, cache_dir)
+        print_header()
+        results = asyncio.run(run_benchmarks(args))
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"settings": {k: v for k, v in vars(args).items() if k != "json_path"},
+                       **results}, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
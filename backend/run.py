@@ -1,13 +1,41 @@
-import uvicorn
+import argparse
 import os
+
+import uvicorn
 from dotenv import load_dotenv
 
 load_dotenv()
 
-if __name__ == "__main__":
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the JIRA Visualization API")
+    parser.add_argument("--production", action="store_true",
+                        default=os.getenv("APP_ENV", "development").lower() == "production",
+                        help="Run without the reloader, with --workers processes (default from APP_ENV)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", 1)),
+                        help="Worker processes in production mode (default from WORKERS)")
+    args = parser.parse_args()
+
+    host = os.getenv("HOST", "0.0.0.0")
+    port = int(os.getenv("PORT", 8000))
+    if not args.production:
+        os.environ["WORKERS"] = "1"
+        uvicorn.run("app.main:app", host=host, port=port, reload=True)
+        return
+
+    # Workers read WORKERS to split server-wide limits and share the issue cache
+    workers = max(1, args.workers)
+    os.environ["WORKERS"] = str(workers)
     uvicorn.run(
         "app.main:app",
-        host=os.getenv("HOST", "0.0.0.0"),
-        port=int(os.getenv("PORT", 8000)),
-        reload=True
+        host=host,
+        port=port,
+        workers=workers,
+        # On SIGTERM, wait this long for in-flight requests (e.g. streamed test
+        # case generations) before the lifespan drains batch jobs
+        timeout_graceful_shutdown=float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", 60)),
     )
+
+
+if __name__ == "__main__":
+    main()
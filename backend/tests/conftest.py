@@ -0,0 +1,87 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+
+import pytest
+
+# Keep the app's SQLite files out of backend/cache and the optional stores off;
+# set before app.main is imported, as the stores read these at import time
+_STATE_DIR = tempfile.mkdtemp(prefix="jira-viz-tests-")
+os.environ.setdefault("TEST_CASE_CACHE_PATH", os.path.join(_STATE_DIR, "test_cases.sqlite3"))
+os.environ.setdefault("GRAPH_STORE_PATH", os.path.join(_STATE_DIR, "graph_store.sqlite3"))
+os.environ.setdefault("SHARED_CACHE_PATH", os.path.join(_STATE_DIR, "shared_cache.sqlite3"))
+os.environ.setdefault("GRAPH_SYNC_LOCK_PATH", os.path.join(_STATE_DIR, "graph_sync.lock"))
+os.environ["GRAPH_STORE_ENABLED"] = "false"
+os.environ["JIRA_PROJECT_ID"] = ""
+os.environ.pop("WORKERS", None)
+
+import uvicorn
+from fastapi.testclient import TestClient
+
+from app import main
+from app.main import app
+from benchmarks.fake_upstream import FakeUpstream, SyntheticProject
+
+
+class FakeServer:
+    """A FakeUpstream served by uvicorn on a free local port, in a background thread"""
+
+    def __init__(self, upstream: FakeUpstream):
+        self.upstream = upstream
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self._server = uvicorn.Server(uvicorn.Config(upstream.app, host="127.0.0.1", port=self.port,
+                                                     log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        deadline = time.time() + 10
+        while not self._server.started:
+            if time.time() > deadline:
+                raise RuntimeError("Fake upstream did not start")
+            time.sleep(0.02)
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+@pytest.fixture
+def fake_project():
+    """The synthetic project served to a test; override with indirect parametrization if needed"""
+    return SyntheticProject(issue_count=120)
+
+
+@pytest.fixture
+def fake_jira(fake_project):
+    server = FakeServer(FakeUpstream(fake_project, ollama_latency=0.05))
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def credentials(fake_jira):
+    """Credentials for the fake site; a fresh user keeps the app's caches apart between tests"""
+    return {
+        "username": f"user-{uuid.uuid4().hex[:8]}",
+        "api_token": "token",
+        "base_url": fake_jira.base_url,
+        "project_id": fake_jira.upstream.project.key,
+        "central_jira_id": f"{fake_jira.upstream.project.key}-1",
+    }
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # The app's shutdown drains the process-wide LLM scheduler for good; each
+    # test client runs the lifespan again, so start it admitting
+    monkeypatch.setattr(main.llm_scheduler, "draining", False)
+    with TestClient(app) as test_client:
+        yield test_client
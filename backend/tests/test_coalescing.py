@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from app import main
+from app.batching import BatchLoader
+from app.singleflight import SingleFlight
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"key": "A-1"}
+
+    async def run():
+        return await asyncio.gather(*(flight.do("A-1", fetch) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert results == [{"key": "A-1"}] * 5
+    assert flight.shared == 4
+
+
+def test_single_flight_shares_errors_then_forgets_them():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("A-1", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(calls) == 1
+
+    with pytest.raises(ValueError):
+        asyncio.run(flight.do("A-1", fetch))
+    assert len(calls) == 2
+
+
+def test_batch_loader_batches_keys_of_one_turn():
+    batches = []
+
+    async def load_batch(keys):
+        batches.append(list(keys))
+        return {key: key.lower() for key in keys if key != "MISSING"}
+
+    async def run():
+        loader = BatchLoader(load_batch, max_batch_size=3)
+        first = await asyncio.gather(*(loader.load(key) for key in ["A", "B", "A", "C", "D", "MISSING"]))
+        again = await loader.load("B")
+        return first, again
+
+    first, again = asyncio.run(run())
+
+    assert first == ["a", "b", "a", "c", "d", None]
+    assert sorted(len(batch) for batch in batches) == [2, 3]
+    assert sorted(key for batch in batches for key in batch) == ["A", "B", "C", "D", "MISSING"]
+    assert again == "b"
+
+
+def test_concurrent_issue_fetches_share_one_call(client, credentials, fake_jira):
+    jira_credentials = main.JiraCredentials(**credentials)
+
+    async def fetch_concurrently():
+        return await asyncio.gather(*(main.fetch_issue(jira_credentials, "BENCH-2") for _ in range(5)))
+
+    issues = client.portal.call(fetch_concurrently)
+
+    assert [issue["key"] for issue in issues] == ["BENCH-2"] * 5
+    assert fake_jira.upstream.calls["issue"] == 1
+
+
+def test_search_by_keys_splits_long_key_lists(client, credentials, fake_jira):
+    jira_credentials = main.JiraCredentials(**credentials)
+    keys = [f"BENCH-{index}" for index in range(1, 121)]
+
+    found = client.portal.call(main.search_issues_by_keys, jira_credentials, keys)
+
+    assert sorted(found) == sorted(keys)
+    chunks = -(-len(keys) // main.JIRA_BATCH_SIZE)
+    assert chunks > 1
+    assert fake_jira.upstream.calls["search"] == chunks
@@ -0,0 +1,121 @@
+import json
+
+from fastapi.responses import JSONResponse
+
+from app import main
+from app.graph_store import GraphStore
+
+
+def read_stream(response):
+    records = [json.loads(line) for line in response.text.splitlines() if line]
+    nodes = [node for record in records if record["type"] == "nodes" for node in record["nodes"]]
+    edges = [edge for record in records if record["type"] == "edges" for edge in record["edges"]]
+    return records, nodes, edges
+
+
+def fail_searches(fake_jira, status_code, should_fail):
+    """Answer the fake's searches whose JQL `should_fail` accepts with `status_code`; returns the restore function"""
+    search = fake_jira.upstream._search
+
+    async def failing_search(jql, *args):
+        if should_fail(jql):
+            return JSONResponse({"errorMessages": ["Injected failure"]}, status_code=status_code,
+                                headers={"Retry-After": "7"})
+        return await search(jql, *args)
+
+    fake_jira.upstream._search = failing_search
+    return lambda: setattr(fake_jira.upstream, "_search", search)
+
+
+def test_project_graph_matches_stream(client, credentials):
+    graph = client.post("/api/jira/visualize-project", json=credentials).json()
+    response = client.post("/api/jira/visualize-project/stream", json=credentials)
+
+    assert response.status_code == 200
+    records, nodes, edges = read_stream(response)
+    assert records[-1]["type"] == "summary"
+    assert records[-1]["nodes"] == len(graph["nodes"]) == 120
+    assert {node["id"] for node in nodes} == {node["id"] for node in graph["nodes"]}
+    assert {edge["id"] for edge in edges} == {edge["id"] for edge in graph["edges"]}
+
+
+def test_project_stream_server_sent_events(client, credentials):
+    response = client.post("/api/jira/visualize-project/stream", json=credentials,
+                           headers={"Accept": "text/event-stream"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events[0] == "nodes"
+    assert events[-1] == "summary"
+
+
+def test_project_stream_slim_nodes(client, credentials):
+    response = client.post("/api/jira/visualize-project/stream?slim=true", json=credentials)
+
+    _, nodes, _ = read_stream(response)
+    for node in nodes:
+        assert "description" not in node["data"]
+        assert node["data"]["priority"] in ("Low", "Medium", "High")
+        assert node["data"]["description_length"] > 0
+
+
+def test_project_stream_token_enables_delta(client, credentials, fake_jira):
+    records, _, _ = read_stream(client.post("/api/jira/visualize-project/stream", json=credentials))
+    token = records[-1]["sync_token"]
+    assert token
+
+    fake_jira.upstream.project.issues["BENCH-3"]["fields"]["summary"] = "Changed"
+    fake_jira.upstream.project.touch("BENCH-3")
+    delta = client.post("/api/jira/visualize-project/delta", json={**credentials, "sync_token": token}).json()
+
+    assert delta["full"] is False
+    assert [node["data"]["key"] for node in delta["changed_nodes"]] == ["BENCH-3"]
+    assert delta["changed_nodes"][0]["data"]["summary"] == "Changed"
+
+
+def test_delta_without_known_token_is_full(client, credentials):
+    delta = client.post("/api/jira/visualize-project/delta", json={**credentials, "sync_token": "unknown"}).json()
+
+    assert delta["full"] is True
+    assert len(delta["added_nodes"]) == 120
+
+
+def test_delta_retry_after_failed_page_returns_change(client, credentials, fake_jira):
+    token = client.post("/api/jira/visualize-project", json=credentials).json()["sync_token"]
+    fake_jira.upstream.project.issues["BENCH-4"]["fields"]["summary"] = "Changed"
+    fake_jira.upstream.project.touch("BENCH-4")
+
+    # The changed-issues page arrives, then the issue count query fails
+    restore = fail_searches(fake_jira, 500, lambda jql: "updated" not in jql)
+    failed = client.post("/api/jira/visualize-project/delta", json={**credentials, "sync_token": token})
+    assert failed.status_code == 500
+
+    restore()
+    retry = client.post("/api/jira/visualize-project/delta", json={**credentials, "sync_token": token})
+
+    assert retry.status_code == 200
+    assert retry.json()["full"] is False
+    assert [node["data"]["key"] for node in retry.json()["changed_nodes"]] == ["BENCH-4"]
+
+
+def test_project_outage_keeps_upstream_status(client, credentials, fake_jira, monkeypatch):
+    monkeypatch.setattr(main.jira_rate_limiter, "max_retries", 0)
+    fail_searches(fake_jira, 503, lambda jql: True)
+    response = client.post("/api/jira/visualize-project", json=credentials)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+
+
+def test_project_stream_served_from_graph_store(client, credentials, fake_jira, monkeypatch, tmp_path):
+    live = client.post("/api/jira/visualize-project", json=credentials).json()
+    monkeypatch.setattr(main, "graph_store", GraphStore(str(tmp_path / "graph_store.sqlite3"), enabled=True))
+    client.portal.call(main.sync_project_to_graph_store, main.JiraCredentials(**credentials), "BENCH")
+
+    fake_jira.upstream.reset_calls()
+    records, nodes, edges = read_stream(client.post("/api/jira/visualize-project/stream", json=credentials))
+
+    assert sum(fake_jira.upstream.calls.values()) == 0
+    assert records[-1]["pages"] == 0
+    assert {node["id"] for node in nodes} == {node["id"] for node in live["nodes"]}
+    assert {edge["id"] for edge in edges} == {edge["id"] for edge in live["edges"]}
@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+from app.shared_cache import SharedRecordStore
+# Imported as a module so pytest doesn't try to collect TestCaseJobManager
+from app import test_case_jobs as jobs
+
+
+def issue(key):
+    return {"key": key, "summary": f"Summary of {key}", "issue_type": "Story", "status": "To Do",
+            "description": f"Description of {key}"}
+
+
+def wait_for_job(client, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/api/jira/generate-test-cases/{job_id}").json()
+        if job["status"] != "running":
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_test_case_job_generates_every_issue(client, fake_jira, monkeypatch):
+    monkeypatch.setenv("OLLAMA_API_BASE", fake_jira.base_url)
+    keys = [f"JOB-{index}" for index in range(1, 5)]
+
+    response = client.post("/api/jira/generate-test-cases", json={"issues": [issue(key) for key in keys]})
+    assert response.status_code == 202
+    assert "items" not in response.json()
+
+    job = wait_for_job(client, response.json()["job_id"])
+    assert job["status"] == "completed"
+    assert job["completed"] == len(keys)
+    assert [item["key"] for item in job["items"]] == keys
+    assert all(item["test_case"]["summary"] for item in job["items"])
+    assert fake_jira.upstream.calls["ollama_generate"] == len(keys)
+
+
+def test_unknown_test_case_job_is_404(client):
+    assert client.get("/api/jira/generate-test-cases/missing").status_code == 404
+    assert client.delete("/api/jira/generate-test-cases/missing").status_code == 404
+
+
+def test_job_state_is_shared_between_workers(tmp_path):
+    async def generate(issue_data, bypass_cache=False):
+        await asyncio.sleep(0.02 if issue_data["key"] == "JOB-1" else 10)
+        return {"source": "ollama", "test_case": {"summary": issue_data["key"]}, "error": None}
+
+    async def run():
+        store = SharedRecordStore(str(tmp_path / "shared.sqlite3"))
+        running = jobs.TestCaseJobManager(workers_per_job=2, shared=store, cancel_poll_interval=0.02)
+        other = jobs.TestCaseJobManager(shared=store, cancel_poll_interval=0.02)
+
+        job = running.submit([issue("JOB-1"), issue("JOB-2")], generate)
+        await asyncio.sleep(0.1)
+        await store.flush()
+        seen = await other.get_state(job.id)
+
+        cancelled = await other.cancel_state(job.id)
+        await store.flush()
+        for _ in range(50):
+            if job.status == "cancelled":
+                break
+            await asyncio.sleep(0.02)
+        await running.shutdown()
+        return job, seen, cancelled
+
+    job, seen, cancelled = asyncio.run(run())
+
+    assert seen["status"] == "running"
+    assert [item["status"] for item in seen["items"]] == ["done", "running"]
+    assert cancelled["status"] == "cancelled"
+    assert "items" not in cancelled
+    assert job.status == "cancelled"
+    assert job.items[0]["test_case"] == {"summary": "JOB-1"}
@@ -0,0 +1,100 @@
+from collections import Counter
+
+from app import main
+
+
+def graph_ids(graph):
+    node_ids = [node["id"] for node in graph["nodes"]]
+    edge_ids = [edge["id"] for edge in graph["edges"]]
+    return node_ids, edge_ids
+
+
+def dangling_edges(graph):
+    node_ids = {node["id"] for node in graph["nodes"]}
+    return [edge for edge in graph["edges"] if edge["source"] not in node_ids or edge["target"] not in node_ids]
+
+
+def test_visualize_returns_unique_connected_graph(client, credentials):
+    response = client.post("/api/jira/visualize", json={**credentials, "max_depth": 3})
+
+    assert response.status_code == 200
+    graph = response.json()
+    node_ids, edge_ids = graph_ids(graph)
+    assert len(node_ids) > 1
+    assert len(node_ids) == len(set(node_ids))
+    assert len(edge_ids) == len(set(edge_ids))
+    assert dangling_edges(graph) == []
+    # A link is listed on both of its issues but becomes one edge
+    links = Counter((edge["source"], edge["target"], edge["label"]) for edge in graph["edges"])
+    assert max(links.values()) == 1
+
+
+def test_visualize_node_cap_leaves_no_dangling_edges(client, credentials, monkeypatch):
+    monkeypatch.setattr(main, "VISUALIZE_MAX_NODES", 2)
+
+    for central_key in ("BENCH-1", "BENCH-5", "BENCH-20"):
+        response = client.post("/api/jira/visualize",
+                               json={**credentials, "central_jira_id": central_key, "max_depth": 3})
+
+        assert response.status_code == 200
+        graph = response.json()
+        assert len(graph["nodes"]) == 2
+        assert dangling_edges(graph) == []
+
+
+def test_visualize_slim_nodes_keep_list_fields(client, credentials):
+    response = client.post("/api/jira/visualize?slim=true", json=credentials)
+
+    assert response.status_code == 200
+    data = response.json()["nodes"][0]["data"]
+    assert set(data) == {"key", "summary", "status", "issue_type", "priority",
+                         "description_excerpt", "description_length"}
+    assert data["priority"] in ("Low", "Medium", "High")
+    assert len(data["description_excerpt"]) <= main.DESCRIPTION_EXCERPT_LENGTH
+    assert data["description_length"] >= len(data["description_excerpt"])
+
+
+def test_visualize_answers_matching_etag_with_304(client, credentials, fake_jira):
+    first = client.post("/api/jira/visualize", json=credentials)
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    fake_jira.upstream.reset_calls()
+    second = client.post("/api/jira/visualize", json=credentials, headers={"If-None-Match": etag})
+
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    # Answered from the remembered validator and the issue cache
+    assert fake_jira.upstream.calls["issue"] == 0
+
+
+def test_visualize_changed_issue_gets_new_etag(client, credentials, fake_jira):
+    etag = client.post("/api/jira/visualize", json=credentials).headers["ETag"]
+
+    fake_jira.upstream.project.issues["BENCH-1"]["fields"]["summary"] = "Renamed"
+    fake_jira.upstream.project.touch("BENCH-1")
+    main.issue_cache.clear()
+    response = client.post("/api/jira/visualize", json=credentials, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_visualize_batches_neighbour_lookups(client, credentials, fake_jira):
+    response = client.post("/api/jira/visualize", json={**credentials, "max_depth": 3})
+
+    nodes = len(response.json()["nodes"])
+    calls = fake_jira.upstream.calls
+    # One GET for the central issue; every other node comes from batched searches
+    assert calls["issue"] == 1
+    assert 0 < calls["search"] < nodes - 1
+
+
+def test_issue_details_etag(client, credentials):
+    body = {key: credentials[key] for key in ("username", "api_token", "base_url", "project_id")}
+    body["issue_key"] = "BENCH-2"
+    first = client.post("/api/jira/issue-details", json=body)
+    assert first.status_code == 200
+
+    second = client.post("/api/jira/issue-details", json=body, headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
@@ -36,10 +36,13 @@ function App() {
     return savedData ? JSON.parse(savedData) : null;
   });
 
-  const handleVisualizationData = (data) => {
-    // Save to state and session storage
+  const handleVisualizationData = (data, { partial = false } = {}) => {
+    // Save to state and session storage; partial graphs from a project stream
+    // are only rendered, the complete graph is stored once it has arrived
     setGraphData(data);
-    sessionStorage.setItem('jiraVisualizationData', JSON.stringify(data));
+    if (!partial) {
+      sessionStorage.setItem('jiraVisualizationData', JSON.stringify(data));
+    }
   };
 
   return (
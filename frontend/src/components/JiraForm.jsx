@@ -16,6 +16,9 @@ import {
 } from '@mui/material';
 import { apiService } from '../services/apiService';
 
+// How often a streamed project graph is re-rendered while it is still arriving
+const STREAM_RENDER_INTERVAL_MS = 500;
+
 const JiraForm = ({ onVisualizationData }) => {
   const navigate = useNavigate();
   const [formData, setFormData] = useState({
@@ -142,7 +145,23 @@ const JiraForm = ({ onVisualizationData }) => {
             }
           }, 2000);
           
-          data = await apiService.visualizeJiraProject(projectData);
+          // Render the graph as soon as the first page of nodes arrives and
+          // keep adding to it, instead of waiting for the whole project
+          const partial = { nodes: [], edges: [] };
+          let lastRender = 0;
+          const onBatch = (batch) => {
+            partial.nodes.push(...batch.nodes);
+            partial.edges.push(...batch.edges);
+            const now = Date.now();
+            if (partial.nodes.length === 0 || now - lastRender < STREAM_RENDER_INTERVAL_MS) return;
+            onVisualizationData({ nodes: [...partial.nodes], edges: [...partial.edges] }, { partial: true });
+            if (lastRender === 0) {
+              navigate('/visualization');
+            }
+            lastRender = now;
+          };
+          
+          data = await apiService.visualizeJiraProject(projectData, onBatch);
           
           console.log(`Loaded ${data.nodes?.length || 0} issues from project ${projectData.project_id}`);
         } catch (err) {
@@ -939,6 +939,20 @@ const JiraVisualization = ({ data }) => {
       const details = response.data;
       setIssueDetails(details);
       
+      // Project graphs use slim nodes; fill in the fields the details panel shows
+      setSelectedNode((current) => current && current.id === node.id ? {
+        ...current,
+        data: {
+          priority: details.priority,
+          assignee: details.assignee,
+          reporter: details.reporter,
+          created: details.created,
+          updated: details.updated,
+          description: details.description,
+          ...current.data,
+        },
+      } : current);
+      
       // Format JSON for display
       setDetailsJson(JSON.stringify(details, null, 2));
       
@@ -1172,6 +1186,8 @@ const JiraVisualization = ({ data }) => {
               status: issueData.status,
               description: issueData.description,
               structured_data: issueData.structured_data,
+              // The JIRA site, so regenerating only replaces this site's cached test cases
+              base_url: jiraCredentials?.base_url,
               // Include a safe subset of fields
               fields: {
                 summary: issueData.fields?.summary || issueData.summary,
@@ -43,6 +43,34 @@ apiClient.interceptors.response.use(
   }
 );
 
+// Last response and ETag per request body, so unchanged refreshes come back as 304s
+const etagCache = new Map();
+const ETAG_CACHE_MAX_ENTRIES = 50;
+
+const postWithETag = async (url, data) => {
+  const cacheKey = `${url}:${JSON.stringify(data)}`;
+  const cached = etagCache.get(cacheKey);
+  const response = await apiClient.post(url, data, {
+    headers: cached ? { 'If-None-Match': cached.etag } : {},
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+  });
+  
+  if (response.status === 304 && cached) {
+    console.log(`${url} not modified, reusing the cached response`);
+    return { ...response, data: cached.data };
+  }
+  
+  const etag = response.headers?.etag;
+  etagCache.delete(cacheKey);
+  if (etag) {
+    etagCache.set(cacheKey, { etag, data: response.data });
+    if (etagCache.size > ETAG_CACHE_MAX_ENTRIES) {
+      etagCache.delete(etagCache.keys().next().value);
+    }
+  }
+  return response;
+};
+
 export const apiService = {
   getDefaultCredentials: async () => {
     try {
@@ -87,7 +115,7 @@ export const apiService = {
     }
     
     try {
-      const response = await apiClient.post('/jira/visualize', credentials);
+      const response = await postWithETag('/jira/visualize', credentials);
       
       // Validate response data
       if (!response || !response.data) {
@@ -112,7 +140,7 @@ export const apiService = {
     }
   },
   
-  visualizeJiraProject: async (credentials) => {
+  visualizeJiraProject: async (credentials, onBatch) => {
     const projectId = credentials.project_id || 'LEARNJIRA';
     
     console.log('Requesting project visualization with:', { 
@@ -139,33 +167,79 @@ export const apiService = {
     };
     
     try {
-      const response = await apiClient.post('/jira/visualize-project', requestData);
-      
-      // Validate response data
-      if (!response || !response.data) {
-        console.error('Empty response received for project visualization');
-        throw new Error('Empty response from API');
-      }
+      // Stream the graph instead of waiting for the whole response, so large
+      // projects aren't cut off by the axios timeout
+      const data = await apiService.streamJiraProject(requestData, onBatch);
       
-      console.log(`Retrieved ${response.data.nodes?.length || 0} JIRA issues from project ${projectId}`);
-      
-      // Make sure nodes and edges are arrays
-      if (!Array.isArray(response.data.nodes) || !Array.isArray(response.data.edges)) {
-        console.error('Invalid data format: nodes or edges are not arrays', response.data);
-        
-        // Try to recover by providing empty arrays if not present
-        if (!response.data.nodes) response.data.nodes = [];
-        if (!response.data.edges) response.data.edges = [];
-      }
-      
-      console.log('Project visualization data received, nodes:', response.data?.nodes?.length);
-      return response.data;
+      console.log(`Retrieved ${data.nodes.length} JIRA issues from project ${projectId}`);
+      return data;
     } catch (error) {
       console.error('Failed to fetch project visualization data:', error);
       throw error;
     }
   },
 
+  // Read the NDJSON project stream; onBatch (optional) receives each
+  // { nodes, edges } batch as soon as it arrives
+  streamJiraProject: async (requestData, onBatch) => {
+    // Slim nodes: descriptions and people are loaded on demand (issue details / descriptions)
+    const response = await fetch(`${API_BASE_URL}/jira/visualize-project/stream?slim=true`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept': 'application/x-ndjson',
+      },
+      body: JSON.stringify(requestData),
+    });
+    
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => null);
+      throw {
+        message: errorData?.detail || 'An unexpected error occurred',
+        status: response.status,
+        data: errorData,
+      };
+    }
+    
+    const nodes = [];
+    const edges = [];
+    let syncToken = null;
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    const handleRecord = (record) => {
+      if (record.type === 'nodes') {
+        nodes.push(...record.nodes);
+        if (onBatch) onBatch({ nodes: record.nodes, edges: [] });
+      } else if (record.type === 'edges') {
+        edges.push(...record.edges);
+        if (onBatch) onBatch({ nodes: [], edges: record.edges });
+      } else if (record.type === 'error') {
+        throw { message: record.detail, status: record.status, data: record };
+      } else if (record.type === 'summary') {
+        // The token lets a later refresh use /jira/visualize-project/delta
+        syncToken = record.sync_token || null;
+        console.log('Project stream finished:', record);
+      }
+    };
+    
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
+      for (const line of lines) {
+        if (line.trim()) handleRecord(JSON.parse(line));
+      }
+    }
+    if (buffer.trim()) handleRecord(JSON.parse(buffer));
+    
+    return { nodes, edges, sync_token: syncToken };
+  },
+
   getIssueDetails: async (credentials, issueKey) => {
     console.log(`Fetching detailed information for issue: ${issueKey}`);
     
@@ -193,7 +267,7 @@ export const apiService = {
       }
       
       console.log('Issue details request:', { ...requestData, api_token: '[MASKED]' });
-      const response = await apiClient.post('/jira/issue-details', requestData);
+      const response = await postWithETag('/jira/issue-details', requestData);
       
       // Validate response data
       if (!response || !response.data) {